@@ -0,0 +1,385 @@
+# cli.py
+
+"""
+Qt のウィジェットや描画ウィンドウを作らずに、プロジェクトを一括処理するコマンドライン。
+
+    python cli.py run job.json PROJECT_DIR [PROJECT_DIR ...] --jobs 4 --report result.json
+    python cli.py index ROOT
+    python cli.py search ROOT --where 損傷種類=腐食 --where 判定区分=C
+
+run はジョブファイル（{"steps": [{"type": ..., ...}, ...]}）の手順を各プロジェクトに順に適用し、
+プロジェクトごとに別プロセスで並列に処理する。手順の種類は STEPS を参照。
+ジョブ内のファイルパスはプロジェクトフォルダからの相対パス。
+ジョブに "registration_cache": true / false を書くと、位置合わせ用の法線・共分散をプロジェクトの
+.registration_cache に保存するか（既定はプロジェクト設定 settings.registration_cache）を切り替える。
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+
+from di.container import load_point_cloud_usecase
+from di.container import save_point_cloud_usecase
+from di.container import load_model_usecase
+from di.container import save_model_usecase
+from di.container import batch_fit_parametric_models_usecase
+from di.container import evaluate_fit_usecase
+from di.container import compute_deviation_usecase
+from di.container import detect_changes_usecase
+from di.container import generate_report_usecase
+from di.container import build_search_index_usecase
+from di.container import search_projects_usecase
+from geometry_manager.geometries_manager import GeometryManager, GeometryItem
+from geometry_manager.project_model import ProjectModel
+from repository.project_repository import ProjectRepository, resolve_project_file
+from repository.sqlite_project_repository import SqliteProjectRepository
+from utils.fit_metrics import format_fit_metrics
+from utils.preprocessing import validate_pipeline
+from utils.registration_target import REGISTRATION_CACHE_DIR, registration_cache_dir
+
+MODEL_TYPES = ("model", "textured_model")
+
+class HeadlessProject:
+    """MainViewer の代わりに、1つのプロジェクトの属性・読み込んだデータ・ユースケースを持つ"""
+
+    def __init__(self, project_path: str):
+        self.project_path = os.path.abspath(project_path)
+        self.geometry_manager = GeometryManager()
+        database_repository = SqliteProjectRepository()
+        if database_repository.exists(self.project_path):
+            self.project_repository = database_repository
+        else:
+            self.project_repository = ProjectRepository()
+        if not self.project_repository.exists(self.project_path):
+            raise FileNotFoundError(f"プロジェクトが見つかりません: {self.project_path}")
+        self.project_model = ProjectModel(self.project_repository.load(self.project_path))
+        self.dirty = False
+        self.geometry_manager.registration_cache_dir = registration_cache_dir(self.project_path,
+                                                                              self.project_model.attributes)
+
+        self.load_point_cloud_usecase = load_point_cloud_usecase(self.geometry_manager)
+        self.save_point_cloud_usecase = save_point_cloud_usecase(self.geometry_manager)
+        self.load_model_usecase = load_model_usecase(self.geometry_manager)
+        self.save_model_usecase = save_model_usecase(self.geometry_manager)
+        self.batch_fit_parametric_models_usecase = batch_fit_parametric_models_usecase(self.geometry_manager)
+        self.evaluate_fit_usecase = evaluate_fit_usecase(self.geometry_manager)
+        self.compute_deviation_usecase = compute_deviation_usecase(self.geometry_manager)
+        self.detect_changes_usecase = detect_changes_usecase(self.geometry_manager)
+        self.generate_report_usecase = generate_report_usecase(self.geometry_manager)
+
+    def path(self, file_path: str) -> str:
+        """ジョブに書かれたパス（プロジェクトフォルダからの相対パス）"""
+        return os.path.join(self.project_path, file_path)
+
+    def item(self, name: str = None, geometry_type: str = "pointcloud") -> GeometryItem:
+        """名前のアイテム（省略時は最後に読み込んだ geometry_type のアイテム）"""
+        for item in reversed(self.geometry_manager.items):
+            if (name is None and item.geometry_type == geometry_type) or item.name == name:
+                return item
+        raise ValueError(f"アイテムが見つかりません: {name or geometry_type}")
+
+    def placed_items(self) -> list:
+        """読み込み済みの配置モデルのアイテム"""
+        names = {model_data.get("original_name", path[-1]) for path, model_data in self.project_model.iter_models()}
+        return [item for item in self.geometry_manager.items if item.geometry_type in MODEL_TYPES and item.name in names]
+
+    def place(self, folder_path: list, item: GeometryItem):
+        """第3階層フォルダにモデルを配置する（フォルダがなければサイドバーで作るものと同じ形で作る）"""
+        if len(folder_path) != 3:
+            raise ValueError(f"配置先は [第1階層, 第2階層, 第3階層] で指定してください: {folder_path}")
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        folder_types = ["first_level", "second_level", "third_level"]
+        for level in range(1, 4):
+            path = tuple(folder_path[:level])
+            if self.project_model.contains(path):
+                continue
+            data = {"type": folder_types[level - 1], "created_date": now, "objects": {}}
+            if level == 2:
+                data["parent"] = path[0]
+            elif level == 3:
+                data["first_level_parent"], data["second_level_parent"] = path[0], path[1]
+            self.project_model.add(path, data)
+        self.project_model.add(tuple(folder_path[:3]) + (item.name,), {
+            "type": "placed_model",
+            "original_name": item.name,
+            "geometry_type": item.geometry_type,
+            "file_path": item.file_path or "unknown_path",
+            "placed_date": now,
+            "visible": True,
+            "attributes": {},
+        })
+        self.dirty = True
+
+    def set_fit_metrics(self, model_name: str, metrics: dict):
+        """配置モデルにフィット評価の結果を書き込む（MainViewer.set_placed_model_fit_metrics と同じ）"""
+        for path, model_data in self.project_model.iter_models():
+            if model_data.get("original_name", path[-1]) != model_name:
+                continue
+            model_data["fit_metrics"] = metrics
+            if model_data.get("attributes"):
+                model_data["attributes"].update(format_fit_metrics(metrics))
+            self.dirty = True
+
+    def save(self):
+        if self.dirty:
+            snapshot = self.project_repository.snapshot(self.project_model.attributes)
+            self.project_repository.save(self.project_path, snapshot)
+            self.dirty = False
+
+# ==== 手順 ====
+# 各手順は (HeadlessProject, ジョブの手順の辞書) を受け取り、結果の要約（JSON にできる辞書）を返す
+
+def _step_load_point_cloud(project: HeadlessProject, step: dict) -> dict:
+    """file の点群を読み込む。pipeline を省略した場合はプロジェクトの前処理設定を使う（preprocess: false なら前処理なし）"""
+    pipeline = step.get("pipeline")
+    if pipeline is None and step.get("preprocess", True):
+        pipeline = project.project_model.attributes.get("settings", {}).get("preprocessing", [])
+    if pipeline:
+        validate_pipeline(pipeline)
+    stages = project.load_point_cloud_usecase.exec(project.path(step["file"]), pipeline)
+    item = project.item()
+    return {"name": item.name, "points": len(item.data.points),
+            "stages": [{"type": kind, "in": count_in, "out": count_out, "seconds": round(seconds, 3)}
+                       for kind, count_in, count_out, seconds in stages]}
+
+def _step_restore_models(project: HeadlessProject, step: dict) -> dict:
+    """階層に配置されたモデルをすべて読み込む"""
+    loaded = {item.name for item in project.geometry_manager.items}
+    entries, missing = [], []
+    for path, model_data in project.project_model.iter_models():
+        name = model_data.get("original_name", path[-1])
+        if name in loaded:
+            continue
+        file_path = resolve_project_file(project.project_path, model_data.get("file_path"))
+        if file_path is None:
+            missing.append(name)
+            continue
+        loaded.add(name)
+        entries.append((name, file_path, model_data.get("visible", True)))
+    failures = project.load_model_usecase.exec_batch(entries, max_workers=step.get("max_workers"))
+    return {"loaded": len(entries) - len(failures), "missing": missing + [name for name, _, _ in failures]}
+
+def _step_place_model(project: HeadlessProject, step: dict) -> dict:
+    """file のモデルを読み込み、path（[第1階層, 第2階層, 第3階層]）に配置する"""
+    project.load_model_usecase.exec(project.path(step["file"]))
+    item = project.geometry_manager.items[-1]
+    project.place(step["path"], item)
+    return {"name": item.name, "path": list(step["path"])}
+
+def _step_fit_members(project: HeadlessProject, step: dict) -> dict:
+    """
+    members（[{"seed": [x, y, z], "kind", "params", "path", "name"}, ...]）を点群にフィッティングし、
+    成功した部材を output_dir（既定は models）に保存して path に配置する。
+    """
+    cloud = project.item(step.get("cloud"))
+    members = step["members"]
+    results = project.batch_fit_parametric_models_usecase.exec(
+        cloud, [(member["seed"], member["kind"], member["params"]) for member in members],
+        max_workers=step.get("max_workers"), roi_margin=step.get("roi_margin", 0.5),
+        multiscale=step.get("multiscale", True))
+
+    output_dir = project.path(step.get("output_dir", "models"))
+    os.makedirs(output_dir, exist_ok=True)
+    fitted, failed = [], []
+    for index, (member, result) in enumerate(zip(members, results)):
+        name = member.get("name") or f"{member['kind']}_{index:03d}"
+        if result["model"] is None:
+            failed.append({"name": name, "error": str(result["error"] or "フィッティングできませんでした")})
+            continue
+        item = GeometryItem(name, result["model"], "model", os.path.join(output_dir, f"{name}.ply"))
+        project.save_model_usecase.exec(item.file_path, [item])
+        project.geometry_manager.add_items([item])
+        project.place(member["path"], item)
+        if result["metrics"]:
+            project.set_fit_metrics(name, result["metrics"])
+        fitted.append({"name": name, "fitness": result["fitness"], "rmse": result["rmse"]})
+    return {"fitted": fitted, "failed": failed}
+
+def _step_evaluate_fit(project: HeadlessProject, step: dict) -> dict:
+    """読み込み済みの配置モデルと点群の一致度を求め、配置モデルの属性に書き込む"""
+    cloud = project.item(step.get("cloud"))
+    metrics = {}
+    for item in project.placed_items():
+        metrics[item.name] = project.evaluate_fit_usecase.exec(item, cloud, step.get("threshold", 0.05))
+        project.set_fit_metrics(item.name, metrics[item.name])
+    return {"metrics": metrics}
+
+def _step_deviation(project: HeadlessProject, step: dict) -> dict:
+    """点群の配置モデルからの偏差を求める（output を指定した場合は点ごとの値を .npy で保存）"""
+    cloud = project.item(step.get("cloud"))
+    values = project.compute_deviation_usecase.exec(cloud, project.placed_items() or None)
+    if step.get("output"):
+        np.save(project.path(step["output"]), values)
+    finite = np.abs(values[np.isfinite(values)])
+    return {"points": len(values), "mean_abs": float(finite.mean()) if len(finite) else None,
+            "p95_abs": float(np.percentile(finite, 95)) if len(finite) else None}
+
+def _step_detect_changes(project: HeadlessProject, step: dict) -> dict:
+    """
+    reference（前回の点検）と compared（今回）の点群の変化量を求め、配置モデルごとに集計する。
+    method は "m3c2"（既定）か "c2c"。register: false なら位置合わせしない。output を指定した場合は点ごとの値を .npy で保存。
+    """
+    reference = project.item(step["reference"])
+    compared = project.item(step["compared"])
+    values = project.detect_changes_usecase.exec(
+        reference, compared, method=step.get("method", "m3c2"), register=step.get("register", True),
+        max_distance=step.get("max_distance", 0.5), tile_size=step.get("tile_size", 10.0),
+        model_items=project.placed_items() or None, max_workers=step.get("max_workers"))
+    if step.get("output"):
+        np.save(project.path(step["output"]), values)
+    finite = values[np.isfinite(values)]
+    return {"points": len(values), "matched": int(len(finite)),
+            "p95_abs": float(np.percentile(np.abs(finite), 95)) if len(finite) else None,
+            "summary": compared.cache["change"]["summary"]}
+
+def _step_export_point_cloud(project: HeadlessProject, step: dict) -> dict:
+    cloud = project.item(step.get("cloud"))
+    project.save_point_cloud_usecase.exec(project.path(step["file"]), [cloud])
+    return {"file": step["file"]}
+
+def _step_export_json(project: HeadlessProject, step: dict) -> dict:
+    with open(project.path(step["file"]), "w", encoding="utf-8") as f:
+        json.dump(project.project_model.attributes, f, ensure_ascii=False, indent=2)
+    return {"file": step["file"]}
+
+def _step_report(project: HeadlessProject, step: dict) -> dict:
+    """点検調書を file（拡張子で CSV / HTML / PDF）に書き出す。snapshots: false ならスナップショットを描画しない"""
+    written = project.generate_report_usecase.exec(project.project_path, project.project_model.attributes,
+                                                   project.path(step["file"]), snapshots=step.get("snapshots", True))
+    return {"files": [os.path.relpath(path, project.project_path) for path in written]}
+
+STEPS = {
+    "load_point_cloud": _step_load_point_cloud,
+    "restore_models": _step_restore_models,
+    "place_model": _step_place_model,
+    "fit_members": _step_fit_members,
+    "evaluate_fit": _step_evaluate_fit,
+    "deviation": _step_deviation,
+    "detect_changes": _step_detect_changes,
+    "export_point_cloud": _step_export_point_cloud,
+    "export_json": _step_export_json,
+    "report": _step_report,
+}
+
+def validate_job(job: dict):
+    """ジョブの手順の種類を確認する（不正なら ValueError）"""
+    steps = job.get("steps")
+    if not isinstance(steps, list) or not steps:
+        raise ValueError("ジョブには steps のリストが必要です")
+    for step in steps:
+        if step.get("type") not in STEPS:
+            raise ValueError(f"未対応の手順です: {step.get('type')}（{', '.join(STEPS)}）")
+
+def run_project(project_path: str, job: dict) -> dict:
+    """1つのプロジェクトにジョブを適用する（ワーカープロセス内で実行）。途中で失敗したらそれまでの変更だけを保存する"""
+    t = time.perf_counter()
+    summary = {"project": os.path.abspath(project_path), "ok": False, "steps": [], "error": None}
+    project = None
+    try:
+        project = HeadlessProject(project_path)
+        if "registration_cache" in job:
+            project.geometry_manager.registration_cache_dir = (
+                os.path.join(project.project_path, REGISTRATION_CACHE_DIR) if job["registration_cache"] else None)
+        for step in job["steps"]:
+            step_t = time.perf_counter()
+            result = STEPS[step["type"]](project, step)
+            summary["steps"].append({"type": step["type"], "seconds": round(time.perf_counter() - step_t, 3),
+                                     **result})
+            print(f"[CLI] {project.project_path}: {step['type']} {time.perf_counter() - step_t:.1f}s")
+        summary["ok"] = True
+    except Exception as e:
+        summary["error"] = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+    finally:
+        if project is not None:
+            try:
+                project.save()
+            except Exception as e:
+                summary["ok"] = False
+                summary["error"] = summary["error"] or f"保存に失敗しました: {e}"
+    summary["seconds"] = round(time.perf_counter() - t, 3)
+    return summary
+
+# ==== コマンド ====
+
+def _command_run(args) -> int:
+    with open(args.job, "r", encoding="utf-8") as f:
+        job = json.load(f)
+    validate_job(job)
+
+    summaries = []
+    if args.jobs <= 1 or len(args.projects) == 1:
+        for project_path in args.projects:
+            summaries.append(run_project(project_path, job))
+            print(json.dumps(summaries[-1], ensure_ascii=False, default=str), flush=True)
+    else:
+        # 手順の中でもプロセスプールを使うので fork ではなく spawn で起動する
+        with ProcessPoolExecutor(max_workers=args.jobs, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(run_project, project_path, job) for project_path in args.projects]
+            for future in as_completed(futures):
+                summaries.append(future.result())
+                print(json.dumps(summaries[-1], ensure_ascii=False, default=str), flush=True)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, ensure_ascii=False, indent=2, default=str)
+    failed = [summary["project"] for summary in summaries if not summary["ok"]]
+    print(f"[CLI] {len(summaries) - len(failed)}/{len(summaries)} プロジェクトを処理しました", file=sys.stderr)
+    return 1 if failed else 0
+
+def _command_index(args) -> int:
+    result = build_search_index_usecase().exec(args.root, max_workers=args.jobs)
+    for path, error in result["failures"]:
+        print(f"[CLI] 読み込めませんでした: {path}: {error}", file=sys.stderr)
+    return 1 if result["failures"] else 0
+
+def _command_search(args) -> int:
+    conditions = []
+    for condition in args.where:
+        name, sep, value = condition.partition("=")
+        if not sep:
+            raise SystemExit(f"条件は 属性名=値 の形式で指定してください: {condition}")
+        conditions.append((name.strip(), value.strip()))
+    results = search_projects_usecase().exec(args.root, conditions, args.keyword,
+                                             rating_at_least=not args.exact_rating, limit=args.limit)
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bridge Cloud Drafter のプロジェクトをGUIなしで一括処理する")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="ジョブファイルの手順を各プロジェクトに適用する")
+    run.add_argument("job", help="ジョブファイル（JSON）")
+    run.add_argument("projects", nargs="+", help="プロジェクトフォルダ")
+    run.add_argument("--jobs", type=int, default=1, help="並列に処理するプロジェクト数")
+    run.add_argument("--report", help="プロジェクトごとの結果を書き出す JSON ファイル")
+    run.set_defaults(func=_command_run)
+
+    index = commands.add_parser("index", help="横断検索の索引を更新する")
+    index.add_argument("root", help="プロジェクトをまとめたフォルダ")
+    index.add_argument("--jobs", type=int, default=None, help="読み込みのプロセス数")
+    index.set_defaults(func=_command_index)
+
+    search = commands.add_parser("search", help="横断検索の索引から部材を探す")
+    search.add_argument("root", help="プロジェクトをまとめたフォルダ")
+    search.add_argument("--where", action="append", default=[], help="属性名=値（複数指定はすべてを満たすもの）")
+    search.add_argument("--keyword", help="名前・値に含む語")
+    search.add_argument("--exact-rating", action="store_true", help="判定区分を「以上」ではなく一致で探す")
+    search.add_argument("--limit", type=int, default=1000)
+    search.set_defaults(func=_command_search)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
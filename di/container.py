@@ -2,9 +2,26 @@ from usecase.io.load_point_cloud_usecase import LoadPointCloudUsecase
 from usecase.io.save_point_cloud_usecase import SavePointCloudUsecase
 from usecase.io.load_model_usecase import LoadModelUsecase
 from usecase.io.save_model_usecase import SaveModelUsecase
+from usecase.io.load_texture_usecase import LoadTextureUsecase
+from usecase.io.build_octree_usecase import BuildOctreeUsecase
+from usecase.io.load_octree_usecase import LoadOctreeUsecase
 from usecase.model.generate_parametric_model_usecase import GenerateParametricModelUsecase
+from usecase.model.batch_fit_parametric_models_usecase import BatchFitParametricModelsUsecase
+from usecase.model.evaluate_fit_usecase import EvaluateFitUsecase
+from usecase.analysis.compute_deviation_usecase import ComputeDeviationUsecase
+from usecase.analysis.segment_point_cloud_usecase import SegmentPointCloudUsecase
+from usecase.analysis.extract_sections_usecase import ExtractSectionsUsecase
+from usecase.analysis.detect_changes_usecase import DetectChangesUsecase
+from usecase.project.persist_project_usecase import PersistProjectUsecase
+from usecase.project.build_search_index_usecase import BuildSearchIndexUsecase
+from usecase.project.search_projects_usecase import SearchProjectsUsecase
+from usecase.project.generate_report_usecase import GenerateReportUsecase
 from repository.point_cloud_repository import PointCloudRepository
 from repository.model_repository import ModelRepository
+from repository.octree_repository import OctreeRepository
+from repository.project_repository import ProjectRepository
+from repository.sqlite_project_repository import SqliteProjectRepository
+from repository.search_index_repository import SearchIndexRepository
 from geometry_manager.geometries_manager import GeometryManager
 
 def load_point_cloud_usecase(manager: GeometryManager) -> LoadPointCloudUsecase:
@@ -27,7 +44,70 @@ def save_model_usecase(manager: GeometryManager) -> SaveModelUsecase:
     usecase = SaveModelUsecase(manager, repository)
     return usecase
 
+def load_texture_usecase(manager: GeometryManager) -> LoadTextureUsecase:
+    repository = ModelRepository()
+    usecase = LoadTextureUsecase(manager, repository)
+    return usecase
+
+def build_octree_usecase(manager: GeometryManager) -> BuildOctreeUsecase:
+    point_cloud_repository = PointCloudRepository()
+    octree_repository = OctreeRepository()
+    usecase = BuildOctreeUsecase(manager, point_cloud_repository, octree_repository)
+    return usecase
+
+def load_octree_usecase(manager: GeometryManager) -> LoadOctreeUsecase:
+    repository = OctreeRepository()
+    usecase = LoadOctreeUsecase(manager, repository)
+    return usecase
+
 def generate_parametric_model_usecase(manager: GeometryManager) -> GenerateParametricModelUsecase:
     repository = ModelRepository()
     usecase = GenerateParametricModelUsecase(manager, repository)
-    return usecase
\ No newline at end of file
+    return usecase
+
+def batch_fit_parametric_models_usecase(manager: GeometryManager) -> BatchFitParametricModelsUsecase:
+    repository = ModelRepository()
+    usecase = BatchFitParametricModelsUsecase(manager, repository)
+    return usecase
+
+def evaluate_fit_usecase(manager: GeometryManager) -> EvaluateFitUsecase:
+    usecase = EvaluateFitUsecase(manager)
+    return usecase
+
+def compute_deviation_usecase(manager: GeometryManager) -> ComputeDeviationUsecase:
+    usecase = ComputeDeviationUsecase(manager)
+    return usecase
+
+def segment_point_cloud_usecase(manager: GeometryManager) -> SegmentPointCloudUsecase:
+    repository = PointCloudRepository()
+    usecase = SegmentPointCloudUsecase(manager, repository)
+    return usecase
+
+def extract_sections_usecase(manager: GeometryManager) -> ExtractSectionsUsecase:
+    usecase = ExtractSectionsUsecase(manager)
+    return usecase
+
+def detect_changes_usecase(manager: GeometryManager) -> DetectChangesUsecase:
+    usecase = DetectChangesUsecase(manager)
+    return usecase
+
+def persist_project_usecase() -> PersistProjectUsecase:
+    repository = ProjectRepository()
+    database_repository = SqliteProjectRepository()
+    usecase = PersistProjectUsecase(repository, database_repository)
+    return usecase
+
+def build_search_index_usecase() -> BuildSearchIndexUsecase:
+    repository = SearchIndexRepository()
+    usecase = BuildSearchIndexUsecase(repository)
+    return usecase
+
+def search_projects_usecase() -> SearchProjectsUsecase:
+    repository = SearchIndexRepository()
+    usecase = SearchProjectsUsecase(repository)
+    return usecase
+
+def generate_report_usecase(manager: GeometryManager) -> GenerateReportUsecase:
+    repository = ModelRepository()
+    usecase = GenerateReportUsecase(manager, repository)
+    return usecase
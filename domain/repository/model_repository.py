@@ -7,7 +7,7 @@ class IModelRepository(ABC):
         pass
 
     @abstractmethod
-    def load_obj(self, obj_file_path: str):
+    def load_obj(self, obj_file_path: str) -> o3d.geometry.TriangleMesh:
         pass
     
     @abstractmethod
@@ -21,4 +21,8 @@ class IModelRepository(ABC):
 
     @abstractmethod
     def Tpillar_generate_parametric_model(self, dist_list):
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def generate_parametric_model(self, kind: str, params) -> o3d.geometry.TriangleMesh:
+        pass
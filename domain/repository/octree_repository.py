@@ -0,0 +1,31 @@
+from abc import ABC, abstractmethod
+import numpy as np
+
+class IOctreeRepository(ABC):
+    @abstractmethod
+    def save_metadata(self, directory: str, metadata: dict):
+        pass
+
+    @abstractmethod
+    def load_metadata(self, directory: str) -> dict:
+        pass
+
+    @abstractmethod
+    def save_node(self, directory: str, name: str, records: np.ndarray):
+        pass
+
+    @abstractmethod
+    def load_node(self, directory: str, name: str) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def append_chunk(self, directory: str, chunk_id: int, records: np.ndarray):
+        pass
+
+    @abstractmethod
+    def load_chunk(self, directory: str, chunk_id: int) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def remove_chunks(self, directory: str):
+        pass
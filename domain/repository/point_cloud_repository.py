@@ -9,3 +9,7 @@ class IPointCloudRepository(ABC):
     @abstractmethod
     def save(self, path: str, pcd: o3d.geometry.PointCloud):
         pass
+
+    @abstractmethod
+    def iter_chunks(self, path: str, chunk_size: int):
+        pass
@@ -0,0 +1,22 @@
+from abc import ABC, abstractmethod
+
+class IProjectRepository(ABC):
+    @abstractmethod
+    def exists(self, project_path: str) -> bool:
+        pass
+
+    @abstractmethod
+    def load(self, project_path: str) -> dict:
+        pass
+
+    @abstractmethod
+    def snapshot(self, attributes: dict):
+        pass
+
+    @abstractmethod
+    def save(self, project_path: str, snapshot):
+        pass
+
+    @abstractmethod
+    def append_journal(self, project_path: str, records: list):
+        pass
@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+
+class ISearchIndexRepository(ABC):
+    @abstractmethod
+    def stamps(self, root: str) -> dict:
+        pass
+
+    @abstractmethod
+    def update(self, root: str, projects: list, removed: list):
+        pass
+
+    @abstractmethod
+    def search(self, root: str, conditions: list, keyword: str = None, limit: int = 1000) -> list:
+        pass
+
+    @abstractmethod
+    def attribute_names(self, root: str) -> list:
+        pass
@@ -8,23 +8,50 @@ class GeometryItem:
         self.file_path = file_path
         self.visible = True
         self.selected = False
+        # 法線・KD木など data から計算した派生データ（data を変更したら invalidate_cache する）
+        self.cache = {}
+        # data を変更するたびに増える（他のアイテムにキャッシュした結果が古いかどうかの判定用）
+        self.version = 0
+
+    def invalidate_cache(self):
+        self.cache.clear()
+        self.version += 1
 
 class GeometryManager(QObject):
     updated = pyqtSignal()
     selection_changed = pyqtSignal()
+    texture_loaded = pyqtSignal(str)
+    # 偏差などの点ごとの値が変わった（名前のアイテムだけ表示し直す）
+    scalars_changed = pyqtSignal(str)
+    # 断面の抽出結果が変わった（名前のアイテムの断面表示を更新する）
+    sections_changed = pyqtSignal(str)
 
     def __init__(self):
         super().__init__()
         self.items: list[GeometryItem] = []
+        # 位置合わせ用の法線・共分散の保存先（None なら保存しない。プロジェクトを開いたときに設定する）
+        self.registration_cache_dir = None
 
     def add(self, name: str, data, geometry_type: str, file_path: str = None):
         self.items.append(GeometryItem(name, data, geometry_type, file_path))
         self.updated.emit()
 
+    def add_items(self, items: list[GeometryItem]):
+        """複数のアイテムをまとめて追加（updatedは1回だけ発火）"""
+        if not items:
+            return
+        self.items.extend(items)
+        self.updated.emit()
+
     def select(self, name: str):
+        self.select_many([name])
+
+    def select_many(self, names: list):
+        """names のアイテムだけを選択状態にする（サイドバーの複数選択用。変化があったときだけ通知）"""
+        names = set(names)
         selection_changed = False
         for item in self.items:
-            new_selected = (item.name == name)
+            new_selected = item.name in names
             if item.selected != new_selected:
                 selection_changed = True
             item.selected = new_selected
@@ -38,6 +65,18 @@ class GeometryManager(QObject):
                 item.visible = visible     
         self.updated.emit()
 
+    def transform(self, name: str, transformation):
+        """アイテムを剛体変換し、空間インデックスなどのキャッシュを破棄する"""
+        for item in self.items:
+            if item.name != name:
+                continue
+            if item.geometry_type == "octree":
+                raise ValueError(f"タイル点群は変換できません: {name}")
+            geometry = item.data["mesh"] if isinstance(item.data, dict) else item.data
+            geometry.transform(transformation)
+            item.invalidate_cache()
+        self.updated.emit()
+
     def get_visible_items(self):
         return [item for item in self.items if item.visible]
 
@@ -0,0 +1,144 @@
+# 階層ごとの子の格納先（第3階層フォルダの子は配置モデル）
+CHILD_KEYS = {0: "folders", 1: "second_level_folders", 2: "third_level_folders", 3: "models"}
+MODEL_LEVEL = 4
+
+class ProjectNode:
+    def __init__(self, node_id: int, path: tuple, data: dict):
+        self.id = node_id
+        self.path = path
+        self.data = data
+
+    @property
+    def level(self) -> int:
+        """1〜3: 第1〜第3階層フォルダ, 4: 配置モデル"""
+        return len(self.path)
+
+    @property
+    def name(self) -> str:
+        return self.path[-1]
+
+class ProjectModel:
+    """
+    プロジェクト属性（folders → second_level_folders → third_level_folders → models の入れ子の辞書）を
+    パス（(第1階層, 第2階層, 第3階層, モデル名) のタプル）で引けるようにする索引。
+    属性の辞書そのものを保存するので、保存形式は変わらない。階層の追加・削除はこのクラスを通して行い、索引を同時に更新する。
+    ノードIDは索引を作り直すまで変わらない。
+    """
+
+    def __init__(self, attributes: dict = None):
+        self.reset(attributes if attributes is not None else {})
+
+    def reset(self, attributes: dict):
+        """属性の辞書を差し替えて索引を作り直す（プロジェクトの読み込み時など）"""
+        self.attributes = attributes
+        self._nodes = {}
+        self._by_id = {}
+        self._next_id = 1
+        self._index_children((), attributes)
+
+    def _index_children(self, path: tuple, data: dict):
+        if len(path) >= MODEL_LEVEL:
+            return
+        for name, child in data.get(CHILD_KEYS[len(path)], {}).items():
+            self._index(path + (name,), child)
+
+    def _index(self, path: tuple, data: dict) -> ProjectNode:
+        node = ProjectNode(self._next_id, path, data)
+        self._next_id += 1
+        self._nodes[path] = node
+        self._by_id[node.id] = node
+        self._index_children(path, data)
+        return node
+
+    # ==== 参照 ====
+
+    def node(self, path) -> ProjectNode:
+        return self._nodes.get(tuple(path))
+
+    def node_by_id(self, node_id: int) -> ProjectNode:
+        return self._by_id.get(node_id)
+
+    def get(self, path) -> dict:
+        """パスのフォルダまたは配置モデルの辞書（なければ None）"""
+        node = self._nodes.get(tuple(path))
+        return None if node is None else node.data
+
+    def contains(self, path) -> bool:
+        return tuple(path) in self._nodes
+
+    def children(self, path=()) -> list:
+        """直下のフォルダまたは配置モデルのノード"""
+        path = tuple(path)
+        data = self.attributes if not path else self.get(path)
+        if data is None or len(path) >= MODEL_LEVEL:
+            return []
+        return [self._nodes[path + (name,)] for name in data.get(CHILD_KEYS[len(path)], {})]
+
+    def iter_nodes(self):
+        """すべてのフォルダと配置モデルのノード（親が子より先）"""
+        return iter(list(self._nodes.values()))
+
+    def iter_models(self, path=()):
+        """配置モデルの (パス, 配置モデル情報) を列挙（path を渡した場合はそのフォルダ以下だけ）"""
+        path = tuple(path)
+        if not path:
+            for model_path, node in list(self._nodes.items()):
+                if len(model_path) == MODEL_LEVEL:
+                    yield model_path, node.data
+            return
+        stack = [path]
+        while stack:
+            node = self._nodes.get(stack.pop())
+            if node is None:
+                continue
+            if node.level == MODEL_LEVEL:
+                yield node.path, node.data
+            else:
+                stack.extend(child.path for child in reversed(self.children(node.path)))
+
+    def key_path(self, path, *keys) -> list:
+        """属性の辞書の中でのキーの並び（ジャーナルの変更記録用）"""
+        result = []
+        for level, name in enumerate(path):
+            result += [CHILD_KEYS[level], name]
+        return result + list(keys)
+
+    def get_attributes(self, path) -> dict:
+        data = self.get(path)
+        return None if data is None else data.get("attributes")
+
+    # ==== 変更 ====
+
+    def set_attributes(self, path, attributes: dict):
+        data = self.get(path)
+        if data is None:
+            raise KeyError(f"見つかりません: {' > '.join(path)}")
+        data["attributes"] = attributes
+
+    def add(self, path, data: dict) -> ProjectNode:
+        """path の親の下にフォルダまたは配置モデルを追加する（同名があれば置き換える）"""
+        path = tuple(path)
+        parent = self.attributes if len(path) == 1 else self.get(path[:-1])
+        if parent is None:
+            raise KeyError(f"親フォルダが見つかりません: {' > '.join(path[:-1])}")
+        if path in self._nodes:
+            self.remove(path)
+        parent.setdefault(CHILD_KEYS[len(path) - 1], {})[path[-1]] = data
+        return self._index(path, data)
+
+    def remove(self, path):
+        """フォルダ（配下を含む）または配置モデルを削除する"""
+        path = tuple(path)
+        node = self._nodes.get(path)
+        if node is None:
+            return
+        parent = self.attributes if len(path) == 1 else self.get(path[:-1])
+        parent.get(CHILD_KEYS[len(path) - 1], {}).pop(path[-1], None)
+        stack = [path]
+        while stack:
+            current = self._nodes.pop(stack.pop(), None)
+            if current is None:
+                continue
+            self._by_id.pop(current.id, None)
+            if current.level < MODEL_LEVEL:
+                stack.extend(current.path + (name,) for name in current.data.get(CHILD_KEYS[current.level], {}))
@@ -3,17 +3,37 @@
 import os
 import json
 import sys
-from PyQt5.QtWidgets import QApplication, QAction, QMainWindow, QFileDialog, QMessageBox, QWidget, QHBoxLayout, QInputDialog, QDialog
-from PyQt5.QtCore import QDateTime
+import numpy as np
+from PyQt5.QtWidgets import QApplication, QAction, QMainWindow, QFileDialog, QMessageBox, QWidget, QHBoxLayout, QInputDialog, QDialog, QProgressDialog, QDockWidget
+from PyQt5.QtCore import QDateTime, Qt
 
 from di.container import load_point_cloud_usecase
 from di.container import save_point_cloud_usecase
 from di.container import load_model_usecase
 from di.container import save_model_usecase
+from di.container import build_octree_usecase
+from di.container import load_octree_usecase
+from di.container import evaluate_fit_usecase
+from di.container import compute_deviation_usecase
+from di.container import segment_point_cloud_usecase
+from di.container import extract_sections_usecase
+from di.container import detect_changes_usecase
+from di.container import persist_project_usecase
+from di.container import build_search_index_usecase
+from di.container import search_projects_usecase
+from di.container import generate_report_usecase
 from ui.point_cloud_ui import PointCloudUi
 from ui.sidebar_ui import SideBarUi
 from ui.attribute_ui import AttributeUi
+from ui.search_ui import SearchUi
 from geometry_manager.geometries_manager import GeometryManager
+from geometry_manager.project_model import ProjectModel
+from utils.fit_metrics import format_fit_metrics
+from utils.change_detection import format_change_summary
+from utils.preprocessing import validate_pipeline
+from utils.registration_target import registration_cache_dir
+from utils.ratings import RATING_SCALES, ratings_at_least
+from repository.project_repository import resolve_project_file
 
 class MainViewer(QMainWindow):
     def __init__(self):
@@ -34,9 +54,28 @@ class MainViewer(QMainWindow):
 
         # usecaseの初期化
         self.load_point_cloud_usecase = load_point_cloud_usecase(self.geometry_manager)
+        # 点群の読み込み・前処理はワーカースレッドで行い、経過と完了をシグナルで受け取る
+        self.load_point_cloud_progress = None
+        self.load_point_cloud_usecase.progress.connect(self._on_point_cloud_load_progress)
+        self.load_point_cloud_usecase.finished.connect(self._on_point_cloud_loaded)
+        self.load_point_cloud_usecase.failed.connect(self._on_point_cloud_load_failed)
         self.save_point_cloud_usecase = save_point_cloud_usecase(self.geometry_manager)
         self.load_model_usecase = load_model_usecase(self.geometry_manager)
         self.save_model_usecase = save_model_usecase(self.geometry_manager)
+        self.build_octree_usecase = build_octree_usecase(self.geometry_manager)
+        self.load_octree_usecase = load_octree_usecase(self.geometry_manager)
+        self.evaluate_fit_usecase = evaluate_fit_usecase(self.geometry_manager)
+        self.compute_deviation_usecase = compute_deviation_usecase(self.geometry_manager)
+        self.extract_sections_usecase = extract_sections_usecase(self.geometry_manager)
+        self.detect_changes_usecase = detect_changes_usecase(self.geometry_manager)
+        self.segment_point_cloud_usecase = segment_point_cloud_usecase(self.geometry_manager)
+        # プロジェクト属性の保存（まとめて・バックグラウンドで書き込む）
+        self.persist_project_usecase = persist_project_usecase()
+        self.persist_project_usecase.save_failed.connect(self._on_project_save_failed)
+        # 複数プロジェクトの横断検索
+        self.build_search_index_usecase = build_search_index_usecase()
+        self.search_projects_usecase = search_projects_usecase()
+        self.generate_report_usecase = generate_report_usecase(self.geometry_manager)
 
         # トップメニュー作成
         self._create_menu_bar()
@@ -52,10 +91,27 @@ class MainViewer(QMainWindow):
 
         self.setCentralWidget(central_widget)
 
+        # 横断検索のパネル（メニューから表示する）
+        self.search_ui = SearchUi(self)
+        self.search_dock = QDockWidget("横断検索", self)
+        self.search_dock.setWidget(self.search_ui)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.search_dock)
+        self.search_dock.hide()
+
         # プロジェクト管理用の変数
         self.current_project_name = None
         self.current_project_path = None
-        self.project_attributes = {}  # プロジェクトの属性データ
+        self.project_model = ProjectModel()  # プロジェクトの属性データ（階層の索引付き）
+
+    @property
+    def project_attributes(self) -> dict:
+        """プロジェクトの属性データ（保存される辞書そのもの）"""
+        return self.project_model.attributes
+
+    @project_attributes.setter
+    def project_attributes(self, attributes: dict):
+        # 差し替えたら階層の索引も作り直す
+        self.project_model.reset(attributes)
 
     def _create_menu_bar(self):
         menu_bar = self.menuBar()
@@ -73,6 +129,16 @@ class MainViewer(QMainWindow):
         save_point_action.triggered.connect(self._on_click_save_point)
         file_menu.addAction(save_point_action)
 
+        # 大規模点群をタイル化して読み込む
+        build_octree_action = QAction("点群をタイル化して読み込む", self)
+        build_octree_action.triggered.connect(self._on_click_build_octree)
+        file_menu.addAction(build_octree_action)
+
+        # タイル化済みの点群を開く
+        load_octree_action = QAction("タイル点群を開く", self)
+        load_octree_action.triggered.connect(self._on_click_load_octree)
+        file_menu.addAction(load_octree_action)
+
         # モデルを読み込む
         load_model_action = QAction("モデルを読み込む", self)
         load_model_action.triggered.connect(self._on_click_load_model)
@@ -89,6 +155,43 @@ class MainViewer(QMainWindow):
         # テクスチャマッピング
         texture_mapping_action = QAction("テクスチャマッピング", self)
 
+        # フィット評価（選択したモデルと点群の一致度）
+        evaluate_fit_action = QAction("フィット評価", self)
+        evaluate_fit_action.triggered.connect(self._on_click_evaluate_fit)
+        tools_menu.addAction(evaluate_fit_action)
+
+        # 偏差表示（選択した点群と表示中のモデルの符号付き距離）
+        deviation_action = QAction("偏差表示", self)
+        deviation_action.triggered.connect(self._on_click_show_deviation)
+        tools_menu.addAction(deviation_action)
+
+        clear_deviation_action = QAction("偏差表示を解除", self)
+        clear_deviation_action.triggered.connect(self._on_click_clear_deviation)
+        tools_menu.addAction(clear_deviation_action)
+
+        # 部材セグメンテーション（選択した点群を部材候補に分割）
+        segment_action = QAction("部材セグメンテーション", self)
+        segment_action.triggered.connect(self._on_click_segment_point_cloud)
+        tools_menu.addAction(segment_action)
+
+        # 断面抽出（選択した点群を橋軸方向に一定間隔で切る）
+        sections_action = QAction("断面抽出", self)
+        sections_action.triggered.connect(self._on_click_extract_sections)
+        tools_menu.addAction(sections_action)
+
+        clear_sections_action = QAction("断面表示を解除", self)
+        clear_sections_action.triggered.connect(self._on_click_clear_sections)
+        tools_menu.addAction(clear_sections_action)
+
+        # 変化検出（選択した2時期の点群の差）
+        detect_changes_action = QAction("変化検出", self)
+        detect_changes_action.triggered.connect(self._on_click_detect_changes)
+        tools_menu.addAction(detect_changes_action)
+
+        clear_changes_action = QAction("変化表示を解除", self)
+        clear_changes_action.triggered.connect(self._on_click_clear_changes)
+        tools_menu.addAction(clear_changes_action)
+
         # モデル生成メニュー
         generate_model_menu = menu_bar.addMenu("モデル生成")
 
@@ -108,17 +211,75 @@ class MainViewer(QMainWindow):
         load_project_action.triggered.connect(self._on_click_load_project)
         project_menu.addAction(load_project_action)
 
+        # 点群読み込み時の前処理の設定
+        preprocessing_action = QAction("点群の前処理設定", self)
+        preprocessing_action.triggered.connect(self._on_click_preprocessing_settings)
+        project_menu.addAction(preprocessing_action)
+
+        # 判定区分での検索（指定した区分以上の部材）
+        search_rating_action = QAction("判定区分で検索", self)
+        search_rating_action.triggered.connect(self._on_click_search_rating)
+        project_menu.addAction(search_rating_action)
+
+        # SQLiteでの管理（大規模なプロジェクト向け）とJSONへの書き出し
+        use_database_action = QAction("SQLiteで管理する", self)
+        use_database_action.triggered.connect(self._on_click_use_database)
+        project_menu.addAction(use_database_action)
+
+        export_json_action = QAction("JSONに書き出す", self)
+        export_json_action.triggered.connect(self._on_click_export_project_json)
+        project_menu.addAction(export_json_action)
+
+        # 複数プロジェクトの横断検索（索引を使うのでプロジェクトを開かずに探せる）
+        cross_search_action = QAction("プロジェクト横断検索", self)
+        cross_search_action.triggered.connect(self._on_click_cross_project_search)
+        project_menu.addAction(cross_search_action)
+
+        # 点検調書（部材ごとの属性・スナップショット・写真）の書き出し
+        report_action = QAction("点検調書を出力", self)
+        report_action.triggered.connect(self._on_click_generate_report)
+        project_menu.addAction(report_action)
+
 
     def _on_click_load_point(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "点群ファイルを選択", "", "PLY Files (*.ply);;All Files (*)")
         if file_path:
+            if self.load_point_cloud_progress is not None:
+                QMessageBox.warning(self, "警告", "別の点群を読み込んでいます。終わってから読み込んでください。")
+                return
+            pipeline = self._preprocessing_pipeline()
             try:
-                self.load_point_cloud_usecase.exec(file_path)
-                QMessageBox.information(self, "成功", f"点群を読み込みました")
+                self.load_point_cloud_usecase.start(file_path, pipeline)
             except Exception as e:
                 QMessageBox.critical(self, "エラー", f"読み込みに失敗しました：\n{e}")
+                return
+            progress = QProgressDialog("点群を前処理しています..." if pipeline else "点群を読み込んでいます...", None, 0, 0, self)
+            progress.setWindowTitle("前処理" if pipeline else "点群の読み込み")
+            progress.setWindowModality(Qt.WindowModal)
+            progress.setMinimumDuration(0)
+            progress.show()
+            self.load_point_cloud_progress = progress
         else:
             QMessageBox.critical(self, "エラー", f"ファイルを選択してください")
+
+    def _close_point_cloud_progress(self):
+        if self.load_point_cloud_progress is not None:
+            self.load_point_cloud_progress.close()
+            self.load_point_cloud_progress = None
+
+    def _on_point_cloud_load_progress(self, message: str):
+        if self.load_point_cloud_progress is not None:
+            self.load_point_cloud_progress.setLabelText(message)
+
+    def _on_point_cloud_loaded(self, stages: list):
+        self._close_point_cloud_progress()
+        summary = "\n".join(f"{kind}: {count_in} → {count_out} 点 ({seconds:.2f}秒)"
+                            for kind, count_in, count_out, seconds in stages)
+        QMessageBox.information(self, "成功", f"点群を読み込みました" + (f"\n\n{summary}" if summary else ""))
+
+    def _on_point_cloud_load_failed(self, error: str):
+        self._close_point_cloud_progress()
+        QMessageBox.critical(self, "エラー", f"読み込みに失敗しました：\n{error}")
     
     def _on_click_save_point(self):
         items = self.geometry_manager.get_selected_items()
@@ -135,6 +296,48 @@ class MainViewer(QMainWindow):
         else:
             QMessageBox.critical(self, "エラー", f"ファイルを選択してください")
     
+    def _on_click_build_octree(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "点群ファイルを選択", "", "点群 (*.ply *.las *.laz);;PLY Files (*.ply);;LAS Files (*.las *.laz);;All Files (*)")
+        if not file_path:
+            QMessageBox.critical(self, "エラー", f"ファイルを選択してください")
+            return
+        out_dir = QFileDialog.getExistingDirectory(self, "タイル点群の保存先フォルダを選択", os.path.dirname(file_path))
+        if not out_dir:
+            return
+        out_dir = os.path.join(out_dir, f"{os.path.splitext(os.path.basename(file_path))[0]}_octree")
+
+        progress = QProgressDialog("点群をタイル化しています...", None, 0, 0, self)
+        progress.setWindowTitle("タイル化")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.show()
+
+        def on_progress(message):
+            progress.setLabelText(message)
+            QApplication.processEvents()
+
+        try:
+            self.build_octree_usecase.exec(file_path, out_dir, progress_callback=on_progress)
+            progress.close()
+            self.load_octree_usecase.exec(out_dir)
+            QMessageBox.information(self, "成功", f"点群をタイル化しました：\n{out_dir}")
+        except Exception as e:
+            progress.close()
+            QMessageBox.critical(self, "エラー", f"タイル化に失敗しました：\n{e}")
+
+    def _on_click_load_octree(self):
+        octree_dir = QFileDialog.getExistingDirectory(self, "タイル点群のフォルダを選択（octree.jsonを含むフォルダ）")
+        if not octree_dir:
+            return
+        if not os.path.exists(os.path.join(octree_dir, "octree.json")):
+            QMessageBox.warning(self, "警告", "選択されたフォルダにoctree.jsonが見つかりません。")
+            return
+        try:
+            self.load_octree_usecase.exec(octree_dir)
+            QMessageBox.information(self, "成功", f"タイル点群を読み込みました")
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"読み込みに失敗しました：\n{e}")
+
     def _on_click_load_model(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "モデルファイルを選択", "", "3Dモデル (*.stl *.obj);;STL Files (*.stl);;OBJ Files (*.obj);;All Files (*)(*.stl *.obj);;STL Files (*.stl);;OBJ Files (*.obj);;All Files (*)")
         if file_path:
@@ -161,6 +364,292 @@ class MainViewer(QMainWindow):
         else:
             QMessageBox.critical(self, "エラー", f"ファイルを選択してください")
         
+    def _preprocessing_pipeline(self) -> list:
+        """プロジェクトに設定された点群の前処理（プロジェクトがなければ前処理なし）"""
+        return self.project_attributes.get("settings", {}).get("preprocessing", [])
+
+    def _on_click_preprocessing_settings(self):
+        if not self.current_project_path:
+            QMessageBox.warning(self, "警告", "プロジェクトを作成または読み込んでください。")
+            return
+        current = json.dumps(self._preprocessing_pipeline(), ensure_ascii=False, indent=2)
+        text, ok = QInputDialog.getMultiLineText(
+            self,
+            "点群の前処理設定",
+            "前処理のリスト（JSON）。種類: crop_box, voxel_downsample, statistical_outlier, radius_outlier, estimate_normals\n"
+            '例: [{"type": "voxel_downsample", "voxel_size": 0.02}, {"type": "statistical_outlier", "nb_neighbors": 20, "std_ratio": 2.0}]',
+            current
+        )
+        if not ok:
+            return
+        try:
+            pipeline = json.loads(text) if text.strip() else []
+            if not isinstance(pipeline, list):
+                raise ValueError("リスト形式で入力してください")
+            validate_pipeline(pipeline)
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"前処理の設定が正しくありません：\n{e}")
+            return
+        self.project_attributes.setdefault("settings", {})["preprocessing"] = pipeline
+        self._save_project_attributes()
+
+    def _on_click_generate_report(self):
+        if not self.current_project_path:
+            QMessageBox.warning(self, "警告", "プロジェクトを開いてください")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "点検調書を出力", os.path.join(self.current_project_path, f"{self.current_project_name}_点検調書.html"),
+                                                   "HTML (*.html);;PDF (*.pdf);;CSV (*.csv)")
+        if not file_path:
+            return
+        # 保存待ちの変更を書き込んでから出力する
+        self.persist_project_usecase.flush()
+        progress = QProgressDialog("点検調書を出力しています...", "中止", 0, 0, self)
+        progress.setWindowTitle("点検調書")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.show()
+
+        def on_progress(done, total):
+            progress.setMaximum(total)
+            progress.setValue(done)
+            QApplication.processEvents()
+            return not progress.wasCanceled()
+
+        try:
+            written = self.generate_report_usecase.exec(self.current_project_path, self.project_attributes, file_path,
+                                                        progress_callback=on_progress)
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"点検調書の出力に失敗しました：\n{e}")
+            return
+        finally:
+            progress.close()
+        QMessageBox.information(self, "点検調書", "次のファイルに出力しました：\n" + "\n".join(written))
+
+    def _on_click_cross_project_search(self):
+        self.search_dock.show()
+        self.search_dock.raise_()
+
+    def _on_click_search_rating(self):
+        if not self.current_project_path:
+            QMessageBox.warning(self, "警告", "プロジェクトを開いてください")
+            return
+        ratings = [rating for scale in RATING_SCALES for rating in scale]
+        rating, ok = QInputDialog.getItem(self, "判定区分で検索", "この区分以上の部材を検索:", ratings, ratings.index("C"), False)
+        if not ok:
+            return
+        results = self.persist_project_usecase.query(self.project_attributes, "判定区分", ratings_at_least(rating))
+        lines = [f"{' > '.join(path)}: {value}" for path, value in results]
+        QMessageBox.information(self, "判定区分で検索", f"判定区分 {rating} 以上: {len(results)} 件\n" + "\n".join(lines[:50]) +
+                                (f"\n...ほか {len(lines) - 50} 件" if len(lines) > 50 else ""))
+
+    def _on_click_use_database(self):
+        if not self.current_project_path:
+            QMessageBox.warning(self, "警告", "プロジェクトを開いてください")
+            return
+        if self.persist_project_usecase.uses_database():
+            QMessageBox.information(self, "情報", "このプロジェクトはすでにSQLiteで管理しています")
+            return
+        try:
+            self.persist_project_usecase.use_database(self.project_attributes)
+            QMessageBox.information(self, "成功", "プロジェクトをSQLite（project.sqlite）に取り込みました。\n以降の変更はSQLiteに保存されます。")
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"SQLiteへの取り込みに失敗しました：\n{e}")
+
+    def _on_click_export_project_json(self):
+        if not self.current_project_path:
+            QMessageBox.warning(self, "警告", "プロジェクトを開いてください")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "JSONに書き出す", os.path.join(self.current_project_path, "project_attributes_export.json"), "JSON (*.json)")
+        if not file_path:
+            return
+        try:
+            self.persist_project_usecase.export_json(self.project_attributes, file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"書き出しに失敗しました：\n{e}")
+
+    def _choose_item(self, title: str, label: str, items: list, exclude=None):
+        """読み込み済みのアイテムから1つを選ばせる（候補が1つならそのまま使う。キャンセル時は None）"""
+        items = [item for item in items if item is not exclude]
+        if not items:
+            return None
+        if len(items) == 1:
+            return items[0]
+        names = [item.name for item in items]
+        name, ok = QInputDialog.getItem(self, title, label, names, 0, False)
+        return items[names.index(name)] if ok else None
+
+    def _on_click_evaluate_fit(self):
+        items = self.geometry_manager.get_selected_items()
+        model_items = [item for item in items if item.geometry_type in ("model", "textured_model")]
+        if len(model_items) != 1:
+            QMessageBox.critical(self, "エラー", f"評価するモデルを1つ選択してください")
+            return
+        # 点群も選択していればそれを使い、なければ読み込み済みの点群から選ぶ
+        cloud_items = [item for item in items if item.geometry_type == "pointcloud"]
+        if len(cloud_items) != 1:
+            cloud_items = [item for item in self.geometry_manager.items if item.geometry_type == "pointcloud"]
+        if not cloud_items:
+            QMessageBox.critical(self, "エラー", f"評価に使う点群を読み込んでください")
+            return
+        cloud_item = self._choose_item("フィット評価", "評価に使う点群:", cloud_items)
+        if cloud_item is None:
+            return
+        try:
+            metrics = self.evaluate_fit_usecase.exec(model_items[0], cloud_item)
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"フィット評価に失敗しました：\n{e}")
+            return
+        self.set_placed_model_fit_metrics(model_items[0].name, metrics)
+        lines = [f"{key}: {value}" for key, value in format_fit_metrics(metrics).items()]
+        QMessageBox.information(self, "フィット評価", f"{model_items[0].name}\n" + "\n".join(lines))
+
+    def _on_click_show_deviation(self):
+        cloud_items = [item for item in self.geometry_manager.get_selected_items() if item.geometry_type == "pointcloud"]
+        if not cloud_items:
+            QMessageBox.critical(self, "エラー", f"偏差を表示する点群を選択してください")
+            return
+        try:
+            for item in cloud_items:
+                self.compute_deviation_usecase.exec(item)
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"偏差の計算に失敗しました：\n{e}")
+
+    def _on_click_clear_deviation(self):
+        for item in self.geometry_manager.get_selected_items():
+            self.compute_deviation_usecase.clear(item)
+
+    def _on_click_extract_sections(self):
+        cloud_items = [item for item in self.geometry_manager.get_selected_items() if item.geometry_type == "pointcloud"]
+        if len(cloud_items) != 1:
+            QMessageBox.critical(self, "エラー", f"断面を抽出する点群を1つ選択してください")
+            return
+        interval, ok = QInputDialog.getDouble(self, "断面抽出", "断面の間隔 [m]:", 1.0, 0.01, 1000.0, 2)
+        if not ok:
+            return
+        thickness, ok = QInputDialog.getDouble(self, "断面抽出", "断面の厚さ [m]:", 0.05, 0.001, 10.0, 3)
+        if not ok:
+            return
+        # 断面を切る軸。主軸（PCA）のときは origin / axis を渡さずユースケース側で求める
+        axis_choices = ["主軸（PCA）", "X軸", "Y軸", "右クリックで選んだ2点"]
+        choice, ok = QInputDialog.getItem(self, "断面抽出", "断面を切る軸:", axis_choices, 0, False)
+        if not ok:
+            return
+        points = np.asarray(cloud_items[0].data.points)
+        origin, axis = None, None
+        if choice == "X軸":
+            origin, axis = points.mean(axis=0), np.array([1.0, 0.0, 0.0])
+        elif choice == "Y軸":
+            origin, axis = points.mean(axis=0), np.array([0.0, 1.0, 0.0])
+        elif choice == "右クリックで選んだ2点":
+            picked = self.point_cloud_ui.picked_positions
+            if len(picked) < 2 or np.linalg.norm(picked[1] - picked[0]) == 0:
+                QMessageBox.critical(self, "エラー", "3Dビューで軸の始点と終点を右クリックで選んでください")
+                return
+            origin, axis = picked[0], picked[1] - picked[0]
+        try:
+            self.extract_sections_usecase.exec(cloud_items[0], interval=interval, thickness=thickness,
+                                               origin=origin, axis=axis)
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"断面の抽出に失敗しました：\n{e}")
+
+    def _on_click_clear_sections(self):
+        for item in self.geometry_manager.get_selected_items():
+            self.extract_sections_usecase.clear(item)
+
+    def _on_click_detect_changes(self):
+        # 2つ選択していればその2つから、そうでなければ読み込み済みの点群から選ぶ
+        cloud_items = [item for item in self.geometry_manager.get_selected_items() if item.geometry_type == "pointcloud"]
+        if len(cloud_items) != 2:
+            cloud_items = [item for item in self.geometry_manager.items if item.geometry_type == "pointcloud"]
+        if len(cloud_items) < 2:
+            QMessageBox.critical(self, "エラー", f"比較する2時期の点群を読み込んでください")
+            return
+        reference_item = self._choose_item("変化検出", "基準（前回の点検）の点群:", cloud_items)
+        if reference_item is None:
+            return
+        compared_item = self._choose_item("変化検出", "比較（今回の点検）の点群:", cloud_items, exclude=reference_item)
+        if compared_item is None:
+            return
+        method, ok = QInputDialog.getItem(self, "変化検出", "方法:", ["m3c2", "c2c"], 0, False)
+        if not ok:
+            return
+
+        progress = QProgressDialog("変化量を計算しています...", "キャンセル", 0, 0, self)
+        progress.setWindowTitle("変化検出")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.show()
+
+        def on_progress(done, total):
+            progress.setMaximum(total)
+            progress.setValue(done)
+            QApplication.processEvents()
+            return not progress.wasCanceled()
+
+        try:
+            values = self.detect_changes_usecase.exec(reference_item, compared_item, method=method,
+                                                      progress_callback=on_progress)
+            progress.close()
+        except Exception as e:
+            progress.close()
+            QMessageBox.critical(self, "エラー", f"変化検出に失敗しました：\n{e}")
+            return
+        if values is None:
+            return
+        summary = compared_item.cache["change"]["summary"]
+        lines = [f"{name}: {text}" for name, text in format_change_summary(summary).items()]
+        QMessageBox.information(self, "変化検出", f"{reference_item.name} → {compared_item.name}\n" +
+                                ("\n".join(lines) if lines else "集計する配置モデルが表示されていません"))
+
+    def _on_click_clear_changes(self):
+        for item in self.geometry_manager.get_selected_items():
+            self.detect_changes_usecase.clear(item)
+
+    def _on_click_segment_point_cloud(self):
+        cloud_items = [item for item in self.geometry_manager.get_selected_items() if item.geometry_type == "pointcloud"]
+        if len(cloud_items) != 1:
+            QMessageBox.critical(self, "エラー", f"分割する点群を1つ選択してください")
+            return
+        voxel_size, ok = QInputDialog.getDouble(self, "部材セグメンテーション", "ボクセルサイズ [m]:", 0.05, 0.001, 10.0, 3)
+        if not ok:
+            return
+        # プロジェクトを開いていればセグメントを保存し、第3階層フォルダに配置できるようにする
+        out_dir = os.path.join(self.current_project_path, "segments") if self.current_project_path else None
+
+        progress = QProgressDialog("部材候補に分割しています...", "キャンセル", 0, 0, self)
+        progress.setWindowTitle("部材セグメンテーション")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.show()
+
+        def on_progress(done, total):
+            progress.setMaximum(total)
+            progress.setValue(done)
+            QApplication.processEvents()
+            return not progress.wasCanceled()
+
+        try:
+            items = self.segment_point_cloud_usecase.exec(cloud_items[0], voxel_size=voxel_size, out_dir=out_dir,
+                                                          progress_callback=on_progress)
+            progress.close()
+            QMessageBox.information(self, "成功", f"{len(items)} 個の部材候補に分割しました")
+        except Exception as e:
+            progress.close()
+            QMessageBox.critical(self, "エラー", f"分割に失敗しました：\n{e}")
+
+    def set_placed_model_fit_metrics(self, model_name: str, metrics: dict):
+        """配置モデルの属性にフィット評価の結果を書き込んで保存する"""
+        updated = False
+        for name, model_data in self._iter_placed_models():
+            if model_data.get("original_name", name) != model_name:
+                continue
+            model_data["fit_metrics"] = metrics
+            if model_data.get("attributes"):
+                model_data["attributes"].update(format_fit_metrics(metrics))
+            updated = True
+        if updated:
+            self._save_project_attributes()
+
     def _point_cloud_ui_show(self):
         self.point_cloud_ui.show()
 
@@ -210,6 +699,8 @@ class MainViewer(QMainWindow):
             
             # プロジェクト属性ファイルの初期化
             self._initialize_project_attributes()
+            self.geometry_manager.registration_cache_dir = registration_cache_dir(self.current_project_path,
+                                                                                  self.project_attributes)
             
             # UIレイアウトを変更
             self._atribute_ui_show()
@@ -225,26 +716,26 @@ class MainViewer(QMainWindow):
 
     def _on_click_load_project(self):
         """プロジェクト読み込みボタンが押された時の処理"""
+        # プロジェクトフォルダの選択
+        project_dir = QFileDialog.getExistingDirectory(
+            self, 
+            "読み込むプロジェクトフォルダを選択"
+        )
+        
+        if project_dir:
+            self._load_project(project_dir)
+
+    def _load_project(self, project_dir):
+        """プロジェクトフォルダを読み込む（メニュー・横断検索の結果から）"""
         try:
-            # プロジェクトフォルダの選択
-            project_dir = QFileDialog.getExistingDirectory(
-                self, 
-                "読み込むプロジェクトフォルダを選択"
-            )
-            
-            if not project_dir:
-                return
-            
             # project_attributes.jsonファイルの存在確認
-            attributes_file = os.path.join(project_dir, "project_attributes.json")
-            if not os.path.exists(attributes_file):
+            if not self.persist_project_usecase.exists(project_dir):
                 QMessageBox.warning(self, "警告", "選択されたフォルダにproject_attributes.jsonが見つかりません。")
                 return
             
-            # プロジェクト属性を読み込み
+            # プロジェクト属性を読み込み（保存待ちの変更があれば先に書き込む）
             try:
-                with open(attributes_file, 'r', encoding='utf-8') as f:
-                    self.project_attributes = json.load(f)
+                self.project_attributes = self.persist_project_usecase.open(project_dir)
             except Exception as e:
                 QMessageBox.critical(self, "エラー", f"プロジェクトファイルの読み込みに失敗しました：\n{e}")
                 return
@@ -253,6 +744,7 @@ class MainViewer(QMainWindow):
             project_info = self.project_attributes.get("project_info", {})
             self.current_project_name = project_info.get("name", os.path.basename(project_dir))
             self.current_project_path = project_dir
+            self.geometry_manager.registration_cache_dir = registration_cache_dir(project_dir, self.project_attributes)
             
             # UIをプロジェクトモードに変更
             self._atribute_ui_show()
@@ -261,6 +753,13 @@ class MainViewer(QMainWindow):
             # ウィンドウタイトルを更新
             self.setWindowTitle(f"Bridge Cloud Drafter - {self.current_project_name}")
             
+            # 配置済みモデルを復元
+            failures = self._restore_placed_models()
+            if failures:
+                QMessageBox.warning(self, "警告", 
+                                    "次のモデルを読み込めませんでした：\n" +
+                                    "\n".join(f"{name} ({file_path})" for name, file_path, _ in failures))
+            
             # 成功メッセージ
             QMessageBox.information(self, "プロジェクト読み込み", 
                                 f"プロジェクト '{self.current_project_name}' を読み込みました\n"
@@ -270,6 +769,51 @@ class MainViewer(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "エラー", f"プロジェクトの読み込みに失敗しました：\n{e}")
 
+    def _restore_placed_models(self):
+        """第3階層フォルダに配置されたモデルを並列に読み込み、まとめてシーンに追加"""
+        loaded_names = {item.name for item in self.geometry_manager.items}
+        entries = []
+        missing = []
+        for name, model_data in self._iter_placed_models():
+            original_name = model_data.get("original_name", name)
+            if original_name in loaded_names:
+                continue
+            file_path = self._resolve_project_file_path(model_data.get("file_path"))
+            if file_path is None:
+                missing.append((original_name, model_data.get("file_path"), FileNotFoundError()))
+                continue
+            loaded_names.add(original_name)
+            entries.append((original_name, file_path, model_data.get("visible", True)))
+
+        if not entries:
+            return missing
+
+        progress = QProgressDialog("配置モデルを読み込んでいます...", "キャンセル", 0, len(entries), self)
+        progress.setWindowTitle("プロジェクト読み込み")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setValue(0)
+
+        def on_progress(done, total):
+            progress.setValue(done)
+            QApplication.processEvents()
+            return not progress.wasCanceled()
+
+        try:
+            failures = self.load_model_usecase.exec_batch(entries, progress_callback=on_progress)
+        finally:
+            progress.close()
+        return missing + failures
+
+    def _iter_placed_models(self):
+        """プロジェクト属性から (モデル名, 配置モデル情報) を列挙"""
+        for path, model_data in self.project_model.iter_models():
+            yield path[-1], model_data
+
+    def _resolve_project_file_path(self, file_path):
+        """保存されたファイルパスを解決する（別のPCで作成されたプロジェクトはプロジェクトフォルダ配下から探す）"""
+        return resolve_project_file(self.current_project_path, file_path)
+
     def _on_click_close_project(self):
         """プロジェクトを閉じる処理"""
         if not self.current_project_name:
@@ -283,6 +827,9 @@ class MainViewer(QMainWindow):
                                     QMessageBox.No)
         
         if reply == QMessageBox.Yes:
+            # 保存待ちの変更を書き込む
+            self.persist_project_usecase.close()
+
             # プロジェクト情報をクリア
             self.current_project_name = None
             self.current_project_path = None
@@ -308,19 +855,20 @@ class MainViewer(QMainWindow):
             "folders": {},  # 追加：第1階層フォルダ管理
             "objects": {}  # オブジェクトごとの属性データ
         }
-        self._save_project_attributes()
+        self.persist_project_usecase.create(self.current_project_path, self.project_attributes)
 
     def _save_project_attributes(self):
-        """プロジェクト属性をJSONファイルに保存"""
+        """プロジェクト属性の保存を予約（短時間の連続した変更は1回の書き込みにまとめる）"""
         if not self.current_project_path:
             return
-        
-        attributes_file = os.path.join(self.current_project_path, "project_attributes.json")
-        try:
-            with open(attributes_file, 'w', encoding='utf-8') as f:
-                json.dump(self.project_attributes, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            QMessageBox.critical(self, "エラー", f"属性データの保存に失敗しました：\n{e}")
+        self.persist_project_usecase.mark_dirty(self.project_attributes)
+
+    def _record_project_change(self, path: list, value):
+        """プロジェクト属性の1か所を変更し、変更だけをジャーナルに追記する（表示状態の切り替えなど頻繁な小さい変更用）"""
+        self.persist_project_usecase.record(self.project_attributes, path, value)
+
+    def _on_project_save_failed(self, message: str):
+        QMessageBox.critical(self, "エラー", f"属性データの保存に失敗しました：\n{message}")
 
     def _load_project_attributes(self, project_path=None):
         """プロジェクト属性をJSONファイルから読み込み"""
@@ -330,12 +878,10 @@ class MainViewer(QMainWindow):
         if not project_path:
             return
         
-        attributes_file = os.path.join(project_path, "project_attributes.json")
         try:
-            if os.path.exists(attributes_file):
-                with open(attributes_file, 'r', encoding='utf-8') as f:
-                    self.project_attributes = json.load(f)
-                    return True
+            if self.persist_project_usecase.exists(project_path):
+                self.project_attributes = self.persist_project_usecase.open(project_path)
+                return True
         except Exception as e:
             QMessageBox.critical(self, "エラー", f"属性データの読み込みに失敗しました：\n{e}")
         return False
@@ -352,6 +898,11 @@ class MainViewer(QMainWindow):
         self.project_attributes["objects"][object_name] = attributes
         self._save_project_attributes()
 
+    def closeEvent(self, event):
+        # 保存待ちのプロジェクト属性を書き込んでから終了する
+        self.persist_project_usecase.flush()
+        super().closeEvent(event)
+
 def main():
     app = QApplication(sys.argv)
     viewer = MainViewer()
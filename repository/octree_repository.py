@@ -0,0 +1,46 @@
+# repository/octree_repository.py
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+from domain.repository.octree_repository import IOctreeRepository
+from utils.octree import NODE_DTYPE
+
+METADATA_FILE = "octree.json"
+
+class OctreeRepository(IOctreeRepository):
+    """タイル化した点群（ノードごとに1ファイル）の読み書き"""
+
+    def save_metadata(self, directory: str, metadata: dict):
+        with open(os.path.join(directory, METADATA_FILE), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False)
+
+    def load_metadata(self, directory: str) -> dict:
+        with open(os.path.join(directory, METADATA_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_node(self, directory: str, name: str, records: np.ndarray):
+        nodes_dir = os.path.join(directory, "nodes")
+        os.makedirs(nodes_dir, exist_ok=True)
+        np.save(os.path.join(nodes_dir, f"{name}.npy"), records)
+
+    def load_node(self, directory: str, name: str) -> np.ndarray:
+        return np.load(os.path.join(directory, "nodes", f"{name}.npy"))
+
+    def append_chunk(self, directory: str, chunk_id: int, records: np.ndarray):
+        chunks_dir = os.path.join(directory, "chunks")
+        os.makedirs(chunks_dir, exist_ok=True)
+        with open(os.path.join(chunks_dir, f"{chunk_id}.bin"), "ab") as f:
+            records.astype(NODE_DTYPE, copy=False).tofile(f)
+
+    def load_chunk(self, directory: str, chunk_id: int) -> np.ndarray:
+        path = os.path.join(directory, "chunks", f"{chunk_id}.bin")
+        if not os.path.exists(path):
+            return np.empty(0, dtype=NODE_DTYPE)
+        return np.fromfile(path, dtype=NODE_DTYPE)
+
+    def remove_chunks(self, directory: str):
+        shutil.rmtree(os.path.join(directory, "chunks"), ignore_errors=True)
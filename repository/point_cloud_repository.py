@@ -1,11 +1,113 @@
 # repository/point_cloud_repository.py
 
+from pathlib import Path
+
+import numpy as np
 import open3d as o3d
 from domain.repository.point_cloud_repository import IPointCloudRepository
 
+_PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4", "double": "f8", "float64": "f8",
+}
+
 class PointCloudRepository(IPointCloudRepository):
     def load(self, path: str) -> o3d.geometry.PointCloud:
         return o3d.io.read_point_cloud(path)
-    
-    def save(self, path: str, pcd): 
-        o3d.io.write_point_cloud(path, pcd)
\ No newline at end of file
+
+    def save(self, path: str, pcd):
+        o3d.io.write_point_cloud(path, pcd)
+
+    def iter_chunks(self, path: str, chunk_size: int = 2_000_000):
+        """
+        点群ファイルを chunk_size 点ずつ (xyz, colors) で返す。colorsは0〜1のfloat、色がなければNone。
+        バイナリPLYはメモリマップ、LAS/LAZはlaspyで読むため、メモリに載らない点群も扱える。
+        """
+        suffix = Path(path).suffix.lower()
+        if suffix in (".las", ".laz"):
+            yield from self._iter_las_chunks(path, chunk_size)
+            return
+
+        if suffix == ".ply":
+            header = self._read_ply_header(path)
+            if header is not None:
+                yield from self._iter_binary_ply_chunks(path, header, chunk_size)
+                return
+
+        # ASCII PLY などはOpen3Dで一括読み込みしてから分割する
+        pcd = self.load(path)
+        points = np.asarray(pcd.points)
+        colors = np.asarray(pcd.colors) if pcd.has_colors() else None
+        for start in range(0, len(points), chunk_size):
+            end = start + chunk_size
+            yield points[start:end], (colors[start:end] if colors is not None else None)
+
+    def _read_ply_header(self, path: str):
+        """バイナリPLYのヘッダを解析し、vertex要素のdtypeとデータ開始位置を返す（対応外の形式はNone）"""
+        with open(path, "rb") as f:
+            if f.readline().strip() != b"ply":
+                return None
+            fmt = None
+            elements = []
+            while True:
+                line = f.readline()
+                if not line:
+                    return None
+                tokens = line.decode("ascii", errors="replace").split()
+                if not tokens or tokens[0] in ("comment", "obj_info"):
+                    continue
+                if tokens[0] == "format":
+                    fmt = tokens[1]
+                elif tokens[0] == "element":
+                    elements.append({"name": tokens[1], "count": int(tokens[2]), "properties": []})
+                elif tokens[0] == "property":
+                    if tokens[1] == "list":
+                        # vertex要素の前にリスト要素があると位置が計算できない
+                        elements[-1]["properties"] = None
+                    elif elements[-1]["properties"] is not None:
+                        elements[-1]["properties"].append((tokens[2], _PLY_TYPES[tokens[1]]))
+                elif tokens[0] == "end_header":
+                    offset = f.tell()
+                    break
+
+        if fmt not in ("binary_little_endian", "binary_big_endian"):
+            return None
+        if not elements or elements[0]["name"] != "vertex" or not elements[0]["properties"]:
+            return None
+
+        endian = "<" if fmt == "binary_little_endian" else ">"
+        dtype = np.dtype([(name, endian + code) for name, code in elements[0]["properties"]])
+        return {"dtype": dtype, "count": elements[0]["count"], "offset": offset}
+
+    def _iter_binary_ply_chunks(self, path: str, header: dict, chunk_size: int):
+        vertices = np.memmap(path, dtype=header["dtype"], mode="r",
+                             offset=header["offset"], shape=(header["count"],))
+        names = header["dtype"].names
+        color_names = next((c for c in (("red", "green", "blue"), ("r", "g", "b")) if all(n in names for n in c)), None)
+        for start in range(0, header["count"], chunk_size):
+            chunk = vertices[start:start + chunk_size]
+            xyz = np.column_stack([chunk["x"], chunk["y"], chunk["z"]]).astype(np.float64)
+            colors = None
+            if color_names:
+                colors = np.column_stack([chunk[n] for n in color_names]).astype(np.float64)
+                if header["dtype"][color_names[0]].kind in "iu":
+                    colors /= np.iinfo(header["dtype"][color_names[0]]).max
+            yield xyz, colors
+
+    def _iter_las_chunks(self, path: str, chunk_size: int):
+        try:
+            import laspy
+        except ImportError as e:
+            raise ImportError("LAS/LAZファイルの読み込みには laspy が必要です（pip install laspy）") from e
+
+        with laspy.open(path) as reader:
+            names = set(reader.header.point_format.dimension_names)
+            has_colors = {"red", "green", "blue"} <= names
+            for points in reader.chunk_iterator(chunk_size):
+                xyz = np.column_stack([points.x, points.y, points.z]).astype(np.float64)
+                colors = None
+                if has_colors:
+                    colors = np.column_stack([points.red, points.green, points.blue]).astype(np.float64) / 65535.0
+                yield xyz, colors
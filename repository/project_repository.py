@@ -0,0 +1,108 @@
+# repository/project_repository.py
+
+import json
+import os
+import tempfile
+
+from domain.repository.project_repository import IProjectRepository
+
+ATTRIBUTES_FILE = "project_attributes.json"
+JOURNAL_FILE = "project_attributes.journal.jsonl"
+
+def apply_change(attributes: dict, record: dict):
+    """変更記録 {"path": [キー, ...], "value": 値}（"delete": true なら削除）を属性に反映する"""
+    *parents, key = record["path"]
+    node = attributes
+    for parent in parents:
+        node = node.setdefault(parent, {})
+    if record.get("delete"):
+        node.pop(key, None)
+    else:
+        node[key] = record["value"]
+
+def read_attributes(project_path: str):
+    """
+    project_attributes.json にジャーナルの変更を反映した属性を読む（ファイルは書き換えない）。
+    戻り値は (属性, 再適用した変更の件数)。ジャーナルがなければ件数は None。
+    """
+    with open(os.path.join(project_path, ATTRIBUTES_FILE), "r", encoding="utf-8") as f:
+        attributes = json.load(f)
+
+    journal = os.path.join(project_path, JOURNAL_FILE)
+    if not os.path.exists(journal):
+        return attributes, None
+    replayed = 0
+    with open(journal, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break  # 書き込み途中で落ちた最後の行
+            apply_change(attributes, record)
+            replayed += 1
+    return attributes, replayed
+
+def resolve_project_file(project_path: str, file_path: str):
+    """
+    保存されたファイルパスを解決する（見つからなければ None）。
+    別のPCで作成されたプロジェクトの場合は、プロジェクトフォルダ配下で末尾が一致するパスを探す。
+    """
+    if not file_path or file_path == "unknown_path":
+        return None
+    if os.path.exists(file_path):
+        return file_path
+    if not project_path:
+        return None
+
+    parts = [part for part in file_path.replace("\\", "/").split("/") if part]
+    for i in range(len(parts)):
+        candidate = os.path.join(project_path, *parts[i:])
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+class ProjectRepository(IProjectRepository):
+    """
+    プロジェクト属性を project_attributes.json に保存する。
+    全体の書き込みは一時ファイル + rename で行い、途中で落ちても前回の内容が残る。
+    小さな変更は追記型のジャーナルに書き、読み込み時に再適用する（全体を保存したらジャーナルは空にする）。
+    """
+
+    def exists(self, project_path: str) -> bool:
+        return os.path.exists(os.path.join(project_path, ATTRIBUTES_FILE))
+
+    def load(self, project_path: str) -> dict:
+        attributes, replayed = read_attributes(project_path)
+        if replayed is not None:
+            print(f"[Project] ジャーナルから {replayed} 件の変更を再適用しました")
+            # 反映した内容で保存し直してジャーナルを空にする（壊れた最後の行の後ろに追記しないように）
+            self.save(project_path, self.snapshot(attributes))
+        return attributes
+
+    def snapshot(self, attributes: dict) -> str:
+        """呼び出し元のスレッドで属性を文字列にする（以降の属性の変更は保存内容に影響しない）"""
+        return json.dumps(attributes, ensure_ascii=False, separators=(",", ":"))
+
+    def save(self, project_path: str, snapshot: str):
+        fd, temp_path = tempfile.mkstemp(prefix=".project_attributes.", suffix=".tmp", dir=project_path)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(snapshot)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, os.path.join(project_path, ATTRIBUTES_FILE))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        # 全体を保存したので、それまでの変更記録は不要
+        journal = os.path.join(project_path, JOURNAL_FILE)
+        if os.path.exists(journal):
+            os.remove(journal)
+
+    def append_journal(self, project_path: str, records: list):
+        with open(os.path.join(project_path, JOURNAL_FILE), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
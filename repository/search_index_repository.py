@@ -0,0 +1,106 @@
+# repository/search_index_repository.py
+
+import json
+import os
+import sqlite3
+from contextlib import closing
+
+from domain.repository.search_index_repository import ISearchIndexRepository
+
+INDEX_FILE = ".bridge_search_index.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, name TEXT NOT NULL, stamp TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY, project_id INTEGER NOT NULL, path TEXT NOT NULL, level INTEGER NOT NULL,
+    name TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS attributes (node_id INTEGER NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_nodes_project ON nodes(project_id);
+CREATE INDEX IF NOT EXISTS idx_attributes_node ON attributes(node_id);
+-- 「属性名 = 値」の検索用
+CREATE INDEX IF NOT EXISTS idx_attributes_name_value ON attributes(name, value);
+"""
+
+class SearchIndexRepository(ISearchIndexRepository):
+    """
+    複数のプロジェクトの属性の検索用索引を、プロジェクトをまとめたフォルダ（root）直下の SQLite に保存する。
+    プロジェクトごとに読み込んだ時点のファイルの状態（stamp）を持ち、変わったプロジェクトだけを入れ替える。
+    """
+
+    def _connect(self, root: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(os.path.join(root, INDEX_FILE))
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def stamps(self, root: str) -> dict:
+        """{プロジェクトのパス: stamp}"""
+        with closing(self._connect(root)) as conn:
+            return dict(conn.execute("SELECT path, stamp FROM projects"))
+
+    def update(self, root: str, projects: list, removed: list):
+        """
+        projects（utils.project_index.extract_project の戻り値のリスト）の内容を入れ替え、
+        removed のプロジェクトを索引から除く。
+        """
+        with closing(self._connect(root)) as conn, conn:
+            for project_path in removed + [project["path"] for project in projects]:
+                row = conn.execute("SELECT id FROM projects WHERE path = ?", (project_path,)).fetchone()
+                if row is None:
+                    continue
+                conn.execute("DELETE FROM attributes WHERE node_id IN (SELECT id FROM nodes WHERE project_id = ?)", row)
+                conn.execute("DELETE FROM nodes WHERE project_id = ?", row)
+                conn.execute("DELETE FROM projects WHERE id = ?", row)
+            for project in projects:
+                project_id = conn.execute("INSERT INTO projects (path, name, stamp) VALUES (?, ?, ?)",
+                                          (project["path"], project["name"], project["stamp"])).lastrowid
+                for path, values in project["nodes"]:
+                    node_id = conn.execute("INSERT INTO nodes (project_id, path, level, name) VALUES (?, ?, ?, ?)",
+                                           (project_id, json.dumps(path, ensure_ascii=False), len(path),
+                                            path[-1])).lastrowid
+                    conn.executemany("INSERT INTO attributes (node_id, name, value) VALUES (?, ?, ?)",
+                                     [(node_id, name, value) for name, value in values.items()])
+
+    def search(self, root: str, conditions: list, keyword: str = None, limit: int = 1000) -> list:
+        """
+        conditions（[(属性名, [値, ...]), ...]）をすべて満たすフォルダ・配置モデルを探す。
+        keyword を渡した場合は、さらに名前か属性の値に keyword を含むものに絞る。
+        戻り値は {"project_path", "project_name", "path", "attributes"} のリスト（プロジェクト・階層の順）。
+        """
+        where, params = [], []
+        for name, values in conditions:
+            if not values:
+                return []
+            where.append(f"n.id IN (SELECT node_id FROM attributes WHERE name = ? "
+                         f"AND value IN ({', '.join('?' * len(values))}))")
+            params += [name, *values]
+        if keyword:
+            # keyword の % と _ は文字そのものとして探す
+            pattern = "%" + keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where.append("(n.name LIKE ? ESCAPE '\\' "
+                         "OR n.id IN (SELECT node_id FROM attributes WHERE value LIKE ? ESCAPE '\\'))")
+            params += [pattern] * 2
+        if not where:
+            return []
+
+        with closing(self._connect(root)) as conn:
+            rows = conn.execute(f"SELECT n.id, p.path, p.name, n.path FROM nodes n JOIN projects p ON p.id = n.project_id "
+                                f"WHERE {' AND '.join(where)} ORDER BY p.name, p.path, n.id LIMIT ?",
+                                [*params, limit]).fetchall()
+            attributes = {}
+            node_ids = [row[0] for row in rows]
+            for start in range(0, len(node_ids), 500):
+                chunk = node_ids[start:start + 500]
+                for node_id, name, value in conn.execute(
+                        f"SELECT node_id, name, value FROM attributes WHERE node_id IN ({', '.join('?' * len(chunk))}) "
+                        f"ORDER BY rowid", chunk):
+                    attributes.setdefault(node_id, {})[name] = value
+
+        return [{"project_path": project_path, "project_name": project_name, "path": json.loads(path),
+                 "attributes": attributes.get(node_id, {})}
+                for node_id, project_path, project_name, path in rows]
+
+    def attribute_names(self, root: str) -> list:
+        """索引にある属性名（検索条件の候補）"""
+        with closing(self._connect(root)) as conn:
+            return [name for name, in conn.execute("SELECT DISTINCT name FROM attributes ORDER BY name")]
@@ -0,0 +1,344 @@
+# repository/sqlite_project_repository.py
+
+import json
+import os
+import sqlite3
+from contextlib import closing
+from urllib.request import pathname2url
+
+from domain.repository.project_repository import IProjectRepository
+from repository.project_repository import apply_change
+
+DATABASE_FILE = "project.sqlite"
+
+# 階層ごとの子の格納先（第3階層フォルダの子は配置モデル）
+_CHILD_KEYS = {1: "second_level_folders", 2: "third_level_folders", 3: "models"}
+_IMAGE_KEYWORDS = ["画像", "写真", "損傷写真", "点検写真", "全体写真"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS folders (
+    path TEXT PRIMARY KEY, parent TEXT, level INTEGER NOT NULL, name TEXT NOT NULL,
+    position INTEGER NOT NULL, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS models (
+    path TEXT PRIMARY KEY, folder TEXT NOT NULL, name TEXT NOT NULL, position INTEGER NOT NULL,
+    geometry_type TEXT, file_path TEXT, visible INTEGER, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS attributes (
+    owner TEXT NOT NULL, name TEXT NOT NULL, position INTEGER NOT NULL, value TEXT, is_json INTEGER NOT NULL,
+    PRIMARY KEY (owner, name));
+CREATE TABLE IF NOT EXISTS images (
+    owner TEXT NOT NULL, name TEXT NOT NULL, path TEXT NOT NULL, PRIMARY KEY (owner, name));
+CREATE INDEX IF NOT EXISTS idx_folders_parent ON folders(parent);
+CREATE INDEX IF NOT EXISTS idx_models_folder ON models(folder);
+-- 判定区分・損傷種類・要素番号などの「属性名 = 値」の検索用
+CREATE INDEX IF NOT EXISTS idx_attributes_name_value ON attributes(name, value);
+CREATE INDEX IF NOT EXISTS idx_images_path ON images(path);
+"""
+
+# 保存形式の版（PRAGMA user_version）。
+# 1: data にキーの並びをそのまま残し、attributes・子の辞書は {} を置いておく。meta にも並び順（position）を持つ
+_FORMAT_VERSION = 1
+
+# テーブルごとの列と主キー（行は列の順のタプル）
+_TABLES = {
+    "meta": ("key", "value", "position"),
+    "folders": ("path", "parent", "level", "name", "position", "data"),
+    "models": ("path", "folder", "name", "position", "geometry_type", "file_path", "visible", "data"),
+    "attributes": ("owner", "name", "position", "value", "is_json"),
+    "images": ("owner", "name", "path"),
+}
+_PRIMARY_KEYS = {"meta": ("key",), "folders": ("path",), "models": ("path",),
+                 "attributes": ("owner", "name"), "images": ("owner", "name")}
+
+def _path_key(path: list) -> str:
+    return json.dumps(path, ensure_ascii=False)
+
+def _data_text(node: dict, *table_keys) -> str:
+    """別の表に入れるキー（attributes・子の辞書）は {} にして、キーの並びごと保存する"""
+    data = {key: {} if key in table_keys and isinstance(value, dict) else value for key, value in node.items()}
+    return json.dumps(data, ensure_ascii=False)
+
+def _meta_row(attributes: dict, key: str) -> tuple:
+    value = {} if key == "folders" else attributes[key]
+    return key, json.dumps(value, ensure_ascii=False), list(attributes).index(key)
+
+def _folder_row(path: list, position: int, folder: dict) -> tuple:
+    key = _path_key(path)
+    parent = _path_key(path[:-1]) if len(path) > 1 else None
+    return key, parent, len(path), path[-1], position, _data_text(folder, "attributes", _CHILD_KEYS[len(path)])
+
+def _model_row(path: list, position: int, model: dict) -> tuple:
+    key = _path_key(path)
+    visible = model.get("visible")
+    return (key, _path_key(path[:-1]), path[-1], position, model.get("geometry_type"), model.get("file_path"),
+            None if visible is None else int(visible), _data_text(model, "attributes"))
+
+def _attribute_row(owner: str, position: int, name: str, value) -> tuple:
+    is_json = not isinstance(value, str)
+    text = json.dumps(value, ensure_ascii=False) if is_json else value
+    return owner, name, position, text, int(is_json)
+
+def _image_row(owner: str, name: str, value):
+    if isinstance(value, str) and any(keyword in name for keyword in _IMAGE_KEYWORDS) and os.path.splitext(value)[1]:
+        return owner, name, value
+    return None
+
+def flatten_project(attributes: dict) -> dict:
+    """入れ子の属性を {テーブル名: {主キー: 行}} にする"""
+    rows = {table: {} for table in _TABLES}
+
+    def add_attributes(owner: str, values):
+        if not isinstance(values, dict):
+            return
+        for position, (name, value) in enumerate(values.items()):
+            rows["attributes"][(owner, name)] = _attribute_row(owner, position, name, value)
+            image = _image_row(owner, name, value)
+            if image is not None:
+                rows["images"][(owner, name)] = image
+
+    def add_folder(path: list, position: int, folder: dict):
+        level = len(path)
+        row = _folder_row(path, position, folder)
+        rows["folders"][(row[0],)] = row
+        add_attributes(row[0], folder.get("attributes"))
+        for child_position, (name, child) in enumerate(folder.get(_CHILD_KEYS[level], {}).items()):
+            if level < 3:
+                add_folder(path + [name], child_position, child)
+                continue
+            model_row = _model_row(path + [name], child_position, child)
+            rows["models"][(model_row[0],)] = model_row
+            add_attributes(model_row[0], child.get("attributes"))
+
+    for key in attributes:
+        rows["meta"][(key,)] = _meta_row(attributes, key)
+    for position, (name, folder) in enumerate(attributes.get("folders", {}).items()):
+        add_folder([name], position, folder)
+    return rows
+
+def _split_change_path(path: list):
+    """
+    変更記録のパスを (階層のパス, 階層の中のキーの並び) に分ける。
+    例: ["folders", "A", "second_level_folders", "B", "attributes", "判定区分"] -> (["A", "B"], ["attributes", "判定区分"])
+    """
+    names = []
+    keys = list(path)
+    while len(names) < 4 and len(keys) >= 2 and keys[0] == ("folders" if not names else _CHILD_KEYS[len(names)]):
+        names.append(keys[1])
+        keys = keys[2:]
+    return names, keys
+
+def _read_project(conn: sqlite3.Connection):
+    """データベースの行から入れ子の属性を組み立てる。戻り値は (属性, 保存形式の版)"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    # 読み取り専用で開いた旧形式のデータベースには meta.position がない
+    meta_columns = [row[1] for row in conn.execute("PRAGMA table_info(meta)")]
+    meta_order = "position, rowid" if "position" in meta_columns else "rowid"
+    meta = conn.execute(f"SELECT key, value FROM meta ORDER BY {meta_order}").fetchall()
+    folders = conn.execute("SELECT path, parent, level, name, position, data FROM folders "
+                           "ORDER BY level, position").fetchall()
+    models = conn.execute("SELECT path, folder, name, position, data FROM models "
+                          "ORDER BY position").fetchall()
+    attributes = conn.execute("SELECT owner, name, value, is_json FROM attributes "
+                              "ORDER BY owner, position").fetchall()
+
+    owner_attributes = {}
+    for owner, name, value, is_json in attributes:
+        owner_attributes.setdefault(owner, {})[name] = json.loads(value) if is_json else value
+
+    def restore(path: str, data: str, child_key: str = None) -> dict:
+        node = json.loads(data)
+        if version < _FORMAT_VERSION:
+            # 旧形式: attributes・子の辞書は data に入っていないので後ろに足す
+            if path in owner_attributes:
+                node["attributes"] = owner_attributes[path]
+            if child_key:
+                node[child_key] = {}
+            return node
+        if isinstance(node.get("attributes"), dict):
+            node["attributes"] = owner_attributes.get(path, {})
+        if child_key and isinstance(node.get(child_key), dict):
+            node[child_key] = {}
+        return node
+
+    result = {key: json.loads(value) for key, value in meta}
+    result["folders"] = {}
+    nodes = {}
+    for path, parent, level, name, _, data in folders:
+        folder = restore(path, data, _CHILD_KEYS[level])
+        nodes[path] = folder
+        if parent is None:
+            result["folders"][name] = folder
+        else:
+            nodes[parent][_CHILD_KEYS[level - 1]][name] = folder
+    for path, folder, name, _, data in models:
+        nodes[folder]["models"][name] = restore(path, data)
+    return result, version
+
+def read_project(project_path: str) -> dict:
+    """
+    project.sqlite を読み取り専用で開いて属性を読む（表の作成・形式の更新もしないので、ファイルは書き換えない）。
+    他のプロジェクトを索引に読み込むときなどに使う。
+    """
+    uri = f"file:{pathname2url(os.path.abspath(os.path.join(project_path, DATABASE_FILE)))}?mode=ro"
+    with closing(sqlite3.connect(uri, uri=True)) as conn:
+        return _read_project(conn)[0]
+
+class SqliteProjectRepository(IProjectRepository):
+    """
+    プロジェクト属性を SQLite（project.sqlite）に保存する。
+    フォルダ・配置モデル・属性・画像をそれぞれ表にし、属性名と値に索引を張って検索できるようにする。
+    保存時は前回保存した行と比べて、変わった行だけを書き換える。
+    """
+
+    def __init__(self):
+        # プロジェクトごとの前回保存した行と、ジャーナルの変更を反映するための属性
+        self._rows = {}
+        self._attributes = {}
+
+    def exists(self, project_path: str) -> bool:
+        return os.path.exists(os.path.join(project_path, DATABASE_FILE))
+
+    def _connect(self, project_path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(os.path.join(project_path, DATABASE_FILE))
+        conn.executescript(_SCHEMA)
+        if "position" not in [row[1] for row in conn.execute("PRAGMA table_info(meta)")]:
+            conn.execute("ALTER TABLE meta ADD COLUMN position INTEGER NOT NULL DEFAULT 0")
+        return conn
+
+    def load(self, project_path: str) -> dict:
+        with closing(self._connect(project_path)) as conn:
+            result, version = _read_project(conn)
+
+        self._attributes[project_path] = json.loads(json.dumps(result))
+        # 旧形式のデータベースは次の保存ですべての行を書き直す
+        self._rows[project_path] = flatten_project(result) if version >= _FORMAT_VERSION else None
+        return result
+
+    def snapshot(self, attributes: dict) -> str:
+        """呼び出し元のスレッドで属性を文字列にする（行への分解は保存側のスレッドで行う）"""
+        return json.dumps(attributes, ensure_ascii=False, separators=(",", ":"))
+
+    def save(self, project_path: str, snapshot: str):
+        attributes = json.loads(snapshot)
+        self._attributes[project_path] = attributes
+        self._write(project_path, flatten_project(attributes))
+
+    def append_journal(self, project_path: str, records: list):
+        """
+        SQLite は行単位で更新できるので、変更のあった行だけをすぐに書き込む。
+        属性1つの変更は attributes の1行、配置モデルの表示切り替えなどは models（folders）の1行を書き換える。
+        階層の追加・削除のような構造の変更だけは全体を分解し直して差分を書き込む。
+        """
+        if project_path not in self._attributes:
+            self.load(project_path)
+        attributes = self._attributes[project_path]
+        for record in records:
+            apply_change(attributes, record)
+        rows = self._rows.get(project_path)
+        if rows is None:
+            self._write(project_path, flatten_project(attributes))
+            return
+
+        deleted = {table: set() for table in _TABLES}
+        upserted = {table: {} for table in _TABLES}
+
+        def put(table: str, key: tuple, row):
+            if row is None:
+                if key in rows[table]:
+                    deleted[table].add(key)
+                    upserted[table].pop(key, None)
+            elif rows[table].get(key) != row:
+                upserted[table][key] = row
+                deleted[table].discard(key)
+
+        for record in records:
+            names, keys = _split_change_path(record["path"])
+            if not names:
+                if keys[0] == "folders":
+                    self._write(project_path, flatten_project(attributes))
+                    return
+                put("meta", (keys[0],), _meta_row(attributes, keys[0]) if keys[0] in attributes else None)
+                continue
+            siblings = attributes["folders"]
+            for level, name in enumerate(names[:-1], start=1):
+                siblings = siblings.get(name, {}).get(_CHILD_KEYS[level], {})
+            node = siblings.get(names[-1])
+            if not keys or node is None or (len(names) < 4 and keys[0] == _CHILD_KEYS[len(names)]):
+                # 階層そのものの追加・削除・入れ替え
+                self._write(project_path, flatten_project(attributes))
+                return
+
+            owner = _path_key(names)
+            if keys[0] != "attributes" or len(keys) == 1:
+                # フォルダ・配置モデルの行（attributes 全体の置き換えでも data の {} の有無が変わりうる）
+                position = list(siblings).index(names[-1])
+                if len(names) == 4:
+                    put("models", (owner,), _model_row(names, position, node))
+                else:
+                    put("folders", (owner,), _folder_row(names, position, node))
+            if keys[0] != "attributes":
+                continue
+
+            values = node.get("attributes")
+            values = values if isinstance(values, dict) else {}
+            if len(keys) == 1:
+                changed_names = set(values) | {name for owner_key, name in rows["attributes"] if owner_key == owner}
+            else:
+                changed_names = {keys[1]}
+            positions = list(values)
+            for name in changed_names:
+                if name in values:
+                    put("attributes", (owner, name), _attribute_row(owner, positions.index(name), name, values[name]))
+                    put("images", (owner, name), _image_row(owner, name, values[name]))
+                else:
+                    put("attributes", (owner, name), None)
+                    put("images", (owner, name), None)
+
+        with closing(self._connect(project_path)) as conn, conn:
+            changed = self._apply(conn, {table: list(keys) for table, keys in deleted.items()},
+                                  {table: list(table_rows.values()) for table, table_rows in upserted.items()})
+        for table in _TABLES:
+            for key in deleted[table]:
+                rows[table].pop(key, None)
+            rows[table].update(upserted[table])
+        print(f"[Project] SQLite: {changed} 行を更新しました")
+
+    def _apply(self, conn: sqlite3.Connection, deleted: dict, upserted: dict) -> int:
+        """{テーブル名: [主キー, ...]} の行を消し、{テーブル名: [行, ...]} の行を書き込む"""
+        changed = 0
+        for table, columns in _TABLES.items():
+            where = " AND ".join(f"{column} = ?" for column in _PRIMARY_KEYS[table])
+            conn.executemany(f"DELETE FROM {table} WHERE {where}", deleted.get(table, []))
+            conn.executemany(f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                             f"VALUES ({', '.join('?' * len(columns))})", upserted.get(table, []))
+            changed += len(deleted.get(table, [])) + len(upserted.get(table, []))
+        return changed
+
+    def _write(self, project_path: str, rows: dict):
+        old_rows = self._rows.get(project_path)
+        with closing(self._connect(project_path)) as conn, conn:
+            if old_rows is None:
+                # 初回（旧形式の読み込み後を含む）は既存の行をすべて置き換える
+                for table in _TABLES:
+                    conn.execute(f"DELETE FROM {table}")
+                conn.execute(f"PRAGMA user_version = {_FORMAT_VERSION}")
+                old_rows = {table: {} for table in _TABLES}
+            deleted = {table: [key for key in old_rows[table] if key not in rows[table]] for table in _TABLES}
+            upserted = {table: [row for key, row in rows[table].items() if old_rows[table].get(key) != row]
+                        for table in _TABLES}
+            changed = self._apply(conn, deleted, upserted)
+        self._rows[project_path] = rows
+        print(f"[Project] SQLite: {changed} 行を更新しました")
+
+    def query_attributes(self, project_path: str, name: str, values: list) -> list:
+        """
+        属性 name の値が values のいずれかであるフォルダ・配置モデルを返す（索引で検索する）。
+        戻り値は (階層のパス [第1階層, ..., モデル名], 値) のリスト。
+        """
+        if not values:
+            return []
+        placeholders = ", ".join("?" * len(values))
+        with closing(self._connect(project_path)) as conn:
+            rows = conn.execute(f"SELECT owner, value FROM attributes WHERE name = ? AND value IN ({placeholders}) "
+                                f"ORDER BY owner", [name, *values]).fetchall()
+        return [(json.loads(owner), value) for owner, value in rows]
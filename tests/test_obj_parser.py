@@ -0,0 +1,39 @@
+import numpy as np
+
+from utils.obj_parser import parse_obj
+
+
+def _parse(tmp_path, text: str) -> dict:
+    path = tmp_path / "model.obj"
+    path.write_text(text, encoding="utf-8")
+    return parse_obj(str(path))
+
+
+def test_vertices_with_w_are_not_read_as_colors(tmp_path):
+    parsed = _parse(tmp_path, "v 0 0 0 1\nv 1 0 0 1\nv 0 1 0 1\nf 1 2 3\n")
+    np.testing.assert_allclose(parsed["vertices"], [[0, 0, 0], [1, 0, 0], [0, 1, 0]])
+    assert parsed["vertex_colors"] is None
+
+
+def test_vertex_colors(tmp_path):
+    parsed = _parse(tmp_path, "v 0 0 0 1 0 0\nv 1 0 0 0 1 0\nv 0 1 0 0 0 1\nf 1 2 3\n")
+    np.testing.assert_allclose(parsed["vertices"], [[0, 0, 0], [1, 0, 0], [0, 1, 0]])
+    np.testing.assert_allclose(parsed["vertex_colors"], np.eye(3))
+
+
+def test_vertex_colors_with_w(tmp_path):
+    parsed = _parse(tmp_path, "v 0 0 0 1 0 0 1\nv 1 0 0 0 1 0 1\nv 0 1 0 0 0 1 1\nf 1 2 3\n")
+    np.testing.assert_allclose(parsed["vertex_colors"], np.eye(3))
+
+
+def test_indented_lines(tmp_path):
+    parsed = _parse(tmp_path, "  v 0 0 0\n\tv 1 0 0\n v 0 1 0\n    f 1 2 3\n")
+    np.testing.assert_allclose(parsed["vertices"], [[0, 0, 0], [1, 0, 0], [0, 1, 0]])
+    np.testing.assert_array_equal(parsed["triangles"], [[0, 1, 2]])
+
+
+def test_inline_comments(tmp_path):
+    parsed = _parse(tmp_path, "# header 1 2 3\nv 0 0 0 # origin\nv 1 0 0\nv 0 1 0  # 9 9 9\n"
+                              "  # v 5 5 5\nf 1 2 3 # 4\n")
+    np.testing.assert_allclose(parsed["vertices"], [[0, 0, 0], [1, 0, 0], [0, 1, 0]])
+    np.testing.assert_array_equal(parsed["triangles"], [[0, 1, 2]])
@@ -0,0 +1,102 @@
+import numpy as np
+
+from utils.octree import (NODE_DTYPE, OctreeNodeCache, build_subtree, build_upper_levels, cube_bounds,
+                          grid_cells, node_bounds, node_name, plan_chunks, select_visible_nodes, to_records)
+
+
+def _records(n: int = 5000, seed: int = 0):
+    xyz = np.random.default_rng(seed).uniform(0, 8, (n, 3))
+    offset, size = cube_bounds(xyz.min(axis=0), xyz.max(axis=0))
+    return to_records(xyz, None, offset), offset, size
+
+
+def test_node_name_and_bounds():
+    assert node_name(0, (0, 0, 0)) == "r"
+    assert node_name(1, (1, 0, 1)) == "r5"
+    assert node_name(2, (3, 0, 1)) == "r45"
+    np.testing.assert_allclose(node_bounds(1, (1, 0, 1), np.zeros(3), 2.0), [1, 0, 1, 2, 1, 2])
+
+
+def test_plan_chunks_covers_every_point():
+    records, offset, size = _records()
+    rel = records["xyz"].astype(np.float64)
+    resolution = 8
+    cells = grid_cells(rel, np.zeros(3), size, resolution)
+    counts = np.bincount(cells, minlength=resolution ** 3)
+    chunks, cell_to_chunk = plan_chunks(counts, resolution, max_chunk_points=1000)
+
+    assert sum(count for _, _, count in chunks) == len(records)
+    assert all(count <= 1000 for level, _, count in chunks if level < 3)
+    assert np.all(cell_to_chunk[cells] >= 0)
+
+
+def test_build_subtree_stores_each_point_once():
+    records, offset, size = _records()
+    saved = {}
+    nodes = build_subtree(records, 0, (0, 0, 0), offset, size, capacity=500, spacing=size / 16,
+                          max_depth=6, save_node=saved.__setitem__)
+
+    assert set(nodes) == set(saved)
+    assert sum(len(r) for r in saved.values()) == len(records)
+    assert all(node["count"] == len(saved[name]) for name, node in nodes.items())
+    assert all(node["count"] <= 500 for node in nodes.values() if node["children"])
+    for name, node in nodes.items():
+        assert all(child[:-1] == name for child in node["children"])
+        lo, hi = np.asarray(node["bounds"][:3]), np.asarray(node["bounds"][3:])
+        xyz = saved[name]["xyz"].astype(np.float64) + offset
+        assert np.all(xyz >= lo - 1e-4) and np.all(xyz <= hi + 1e-4)
+
+
+def test_build_upper_levels_keeps_points_in_one_node():
+    records, offset, size = _records()
+    saved = {}
+    nodes = {}
+    chunk_names = []
+    # 第1階層の8つのチャンクを別々に作ってから上のノードを組み立てる
+    rel = records["xyz"].astype(np.float64)
+    octant = (rel >= size / 2).astype(int) @ [4, 2, 1]
+    for child in range(8):
+        ijk = (child >> 2 & 1, child >> 1 & 1, child & 1)
+        nodes.update(build_subtree(records[octant == child], 1, ijk, offset, size, capacity=300,
+                                   spacing=size / 16, max_depth=6, save_node=saved.__setitem__))
+        chunk_names.append(node_name(1, ijk))
+
+    build_upper_levels(nodes, chunk_names, offset, size, capacity=300, spacing=size / 16,
+                       load_node=saved.__getitem__, save_node=saved.__setitem__)
+    assert nodes["r"]["children"] == chunk_names
+    assert 0 < nodes["r"]["count"] <= 300
+    merged = np.concatenate([saved[name] for name in nodes])
+    assert len(merged) == len(records)
+    assert len(np.unique(merged["xyz"], axis=0)) == len(records)
+
+
+def test_select_visible_nodes_respects_budget_and_frustum():
+    metadata = {"nodes": {
+        "r": {"bounds": [0, 0, 0, 2, 2, 2], "count": 10, "children": ["r0", "r4"]},
+        "r0": {"bounds": [0, 0, 0, 1, 1, 1], "count": 10, "children": []},
+        "r4": {"bounds": [1, 0, 0, 2, 1, 1], "count": 10, "children": []},
+    }}
+    # x <= 1.5 だけを残す平面（r4 は一部が入るので選ばれる）
+    planes = [(-1, 0, 0, 1.5)]
+    selected = select_visible_nodes(metadata, planes, [1, 1, 5], 30.0, 1000, point_budget=100, min_pixel_size=0)
+    assert selected[0] == "r" and set(selected) == {"r", "r0", "r4"}
+    assert select_visible_nodes(metadata, planes, [1, 1, 5], 30.0, 1000, point_budget=15, min_pixel_size=0) == ["r"]
+    assert select_visible_nodes(metadata, [(1, 0, 0, -3)], [1, 1, 5], 30.0, 1000, point_budget=100) == []
+
+
+def test_node_cache_evicts_least_recently_used():
+    loaded = []
+
+    def load(name):
+        loaded.append(name)
+        return np.zeros(10, dtype=NODE_DTYPE)
+
+    cache = OctreeNodeCache(load, [1, 2, 3], max_bytes=2 * 10 * NODE_DTYPE.itemsize)
+    xyz, rgb = cache.get(["a", "b"])
+    np.testing.assert_allclose(xyz, np.tile([1, 2, 3], (20, 1)))
+    assert rgb.shape == (20, 3)
+    cache.get(["a", "c"])  # b がいちばん古いので追い出される
+    cache.get(["a"])
+    cache.get(["b"])
+    assert loaded == ["a", "b", "c", "b"]
+    assert cache.size_bytes <= cache.max_bytes
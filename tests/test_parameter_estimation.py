@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from utils.parameter_estimation import estimate_parameters, member_frame, point_triangle_distances
+from utils.parametric_primitives import generate_primitive
+
+
+def test_member_frame_follows_main_horizontal_direction():
+    rng = np.random.default_rng(0)
+    t = rng.uniform(-10, 10, 500)
+    direction = np.array([np.cos(0.3), np.sin(0.3), 0.0])
+    points = t[:, None] * direction + rng.normal(0, 0.1, (500, 3)) + [100, 200, 5]
+
+    origin, R = member_frame(points)
+    np.testing.assert_allclose(origin, points.mean(axis=0))
+    np.testing.assert_allclose(R @ R.T, np.eye(3), atol=1e-12)
+    np.testing.assert_allclose(R[2], [0, 0, 1])
+    assert abs(R[0] @ direction) > 0.999
+
+
+def test_point_triangle_distances():
+    triangle = np.array([[[[0, 0, 0], [1, 0, 0], [0, 1, 0]]]], dtype=np.float64)
+    points = np.array([
+        [0.25, 0.25, 2.0],   # 面の上
+        [2.0, 0.0, 0.0],     # 頂点 (1, 0, 0) の先
+        [0.5, -1.0, 0.0],    # 辺の外側
+        [0.5, 0.5, 0.0],     # 斜辺上
+    ])
+    np.testing.assert_allclose(point_triangle_distances(points, triangle), [[2.0, 1.0, 1.0, 0.0]], atol=1e-12)
+
+
+def test_point_triangle_distances_takes_nearest_triangle_per_set():
+    vertices, faces = generate_primitive("slab", [4.0, 2.0, 1.0])
+    triangles = vertices[faces][None]
+    points = np.array([[2.0, 0.0, 3.0], [2.0, 0.0, 0.5], [6.0, 0.0, 0.5]])
+    np.testing.assert_allclose(point_triangle_distances(points, triangles), [[2.0, 0.5, 2.0]], atol=1e-12)
+
+
+def test_estimate_slab_parameters():
+    rng = np.random.default_rng(1)
+    length, width, thickness = 6.0, 2.0, 0.4
+    vertices, faces = generate_primitive("slab", [length, width, thickness])
+    # 表面から一様に点を取る
+    triangles = vertices[faces]
+    areas = np.linalg.norm(np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]), axis=1)
+    chosen = triangles[rng.choice(len(triangles), 2000, p=areas / areas.sum())]
+    a, b = rng.uniform(size=(2, 2000, 1))
+    flip = a + b > 1
+    a, b = np.where(flip, 1 - a, a), np.where(flip, 1 - b, b)
+    points = chosen[:, 0] + a * (chosen[:, 1] - chosen[:, 0]) + b * (chosen[:, 2] - chosen[:, 0])
+
+    params, cost, _ = estimate_parameters(points + [10, 20, 30], "slab")
+    np.testing.assert_allclose(params, [length, width, thickness], rtol=0.1)
+    assert cost < 1e-2
+
+
+def test_estimate_parameters_rejects_bad_input():
+    with pytest.raises(ValueError):
+        estimate_parameters(np.zeros((100, 3)), "unknown")
+    with pytest.raises(ValueError):
+        estimate_parameters(np.zeros((5, 3)), "slab")
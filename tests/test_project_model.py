@@ -0,0 +1,86 @@
+import pytest
+
+from geometry_manager.project_model import ProjectModel
+
+
+def _attributes() -> dict:
+    return {
+        "name": "橋梁A",
+        "folders": {
+            "上部構造": {
+                "attributes": {"判定区分": "a"},
+                "second_level_folders": {
+                    "主桁": {
+                        "third_level_folders": {
+                            "G1": {"models": {
+                                "girder_1": {"file_path": "g1.obj", "attributes": {"判定区分": "c"}},
+                                "girder_2": {"file_path": "g2.obj"},
+                            }},
+                        },
+                    },
+                },
+            },
+            "下部構造": {},
+        },
+    }
+
+
+def test_index_paths_and_children():
+    model = ProjectModel(_attributes())
+    assert [node.name for node in model.children()] == ["上部構造", "下部構造"]
+    assert [node.name for node in model.children(["上部構造", "主桁", "G1"])] == ["girder_1", "girder_2"]
+    node = model.node(["上部構造", "主桁", "G1", "girder_1"])
+    assert node.level == 4
+    assert model.node_by_id(node.id) is node
+    assert model.get_attributes(node.path) == {"判定区分": "c"}
+    assert model.children(node.path) == []
+    assert model.get(["ない"]) is None
+
+
+def test_iter_models():
+    model = ProjectModel(_attributes())
+    expected = [("上部構造", "主桁", "G1", "girder_1"), ("上部構造", "主桁", "G1", "girder_2")]
+    assert [path for path, _ in model.iter_models()] == expected
+    assert [path for path, _ in model.iter_models(["上部構造"])] == expected
+    assert list(model.iter_models(["下部構造"])) == []
+
+
+def test_add_and_remove_update_attributes_and_index():
+    attributes = _attributes()
+    model = ProjectModel(attributes)
+    node = model.add(["下部構造", "橋脚"], {"third_level_folders": {}})
+    assert attributes["folders"]["下部構造"]["second_level_folders"]["橋脚"] is node.data
+    assert model.contains(["下部構造", "橋脚"])
+
+    # 同名の追加は置き換え（古い配下は索引から消える）
+    old_id = model.node(["上部構造", "主桁", "G1", "girder_1"]).id
+    model.add(["上部構造", "主桁"], {"third_level_folders": {}})
+    assert model.node_by_id(old_id) is None
+    assert not model.contains(["上部構造", "主桁", "G1"])
+
+    model.remove(["上部構造"])
+    assert "上部構造" not in attributes["folders"]
+    assert [node.name for node in model.iter_nodes()] == ["下部構造", "橋脚"]
+
+    with pytest.raises(KeyError):
+        model.add(["ない", "子"], {})
+
+
+def test_set_attributes_and_key_path():
+    model = ProjectModel(_attributes())
+    path = ["上部構造", "主桁", "G1", "girder_2"]
+    model.set_attributes(path, {"判定区分": "b"})
+    assert model.attributes["folders"]["上部構造"]["second_level_folders"]["主桁"]["third_level_folders"]["G1"][
+        "models"]["girder_2"]["attributes"] == {"判定区分": "b"}
+    assert model.key_path(path, "attributes", "判定区分") == [
+        "folders", "上部構造", "second_level_folders", "主桁", "third_level_folders", "G1", "models", "girder_2",
+        "attributes", "判定区分"]
+    with pytest.raises(KeyError):
+        model.set_attributes(["ない"], {})
+
+
+def test_reset_rebuilds_index():
+    model = ProjectModel()
+    assert list(model.iter_nodes()) == []
+    model.reset(_attributes())
+    assert len(list(model.iter_nodes())) == 6
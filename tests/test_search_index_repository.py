@@ -0,0 +1,55 @@
+from repository.search_index_repository import SearchIndexRepository
+
+
+def _project(path: str, name: str, nodes: list, stamp: str = "1") -> dict:
+    return {"path": path, "stamp": stamp, "name": name, "nodes": nodes}
+
+
+def _index(root) -> SearchIndexRepository:
+    repository = SearchIndexRepository()
+    repository.update(str(root), [
+        _project("/p/a", "A", [
+            (["上部構造"], {"判定区分": "c", "備考": "x_1"}),
+            (["上部構造", "主桁"], {"判定区分": "a", "備考": "xy1"}),
+        ]),
+        _project("/p/b", "B", [
+            (["下部構造"], {"判定区分": "c", "損傷種類": "腐食 50%"}),
+        ]),
+    ], [])
+    return repository
+
+
+def _paths(results: list) -> list:
+    return [(result["project_name"], result["path"]) for result in results]
+
+
+def test_search_by_conditions(tmp_path):
+    repository = _index(tmp_path)
+    results = repository.search(str(tmp_path), [("判定区分", ["c", "e"])])
+    assert _paths(results) == [("A", ["上部構造"]), ("B", ["下部構造"])]
+    assert results[0]["attributes"] == {"判定区分": "c", "備考": "x_1"}
+    assert results[0]["project_path"] == "/p/a"
+    assert repository.search(str(tmp_path), [("判定区分", [])]) == []
+    assert repository.search(str(tmp_path), []) == []
+
+
+def test_keyword_matches_names_and_values(tmp_path):
+    repository = _index(tmp_path)
+    assert _paths(repository.search(str(tmp_path), [], keyword="主桁")) == [("A", ["上部構造", "主桁"])]
+    assert _paths(repository.search(str(tmp_path), [("判定区分", ["c"])], keyword="腐食")) == [("B", ["下部構造"])]
+
+
+def test_keyword_wildcards_are_literal(tmp_path):
+    repository = _index(tmp_path)
+    assert _paths(repository.search(str(tmp_path), [], keyword="x_1")) == [("A", ["上部構造"])]
+    assert _paths(repository.search(str(tmp_path), [], keyword="0%")) == [("B", ["下部構造"])]
+    assert repository.search(str(tmp_path), [], keyword="%") == repository.search(str(tmp_path), [], keyword="50%")
+
+
+def test_update_replaces_and_removes_projects(tmp_path):
+    repository = _index(tmp_path)
+    repository.update(str(tmp_path), [_project("/p/a", "A", [(["上部構造"], {"判定区分": "e"})], stamp="2")],
+                      ["/p/b"])
+    assert repository.stamps(str(tmp_path)) == {"/p/a": "2"}
+    assert _paths(repository.search(str(tmp_path), [("判定区分", ["c", "e"])])) == [("A", ["上部構造"])]
+    assert repository.attribute_names(str(tmp_path)) == ["判定区分"]
@@ -0,0 +1,59 @@
+import numpy as np
+
+from utils.sections import SectionIndex, get_section_index
+
+
+def _line_points(n: int = 101) -> np.ndarray:
+    x = np.linspace(0.0, 10.0, n)
+    return np.stack([x, np.zeros(n), x * 0.1], axis=1)
+
+
+def test_slice_matches_brute_force():
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-5, 5, (2000, 3))
+    axis = np.array([1.0, 2.0, 0.0])
+    index = SectionIndex(points, [0, 0, 0], axis)
+
+    stations = points @ (axis / np.linalg.norm(axis))
+    for station in (-3.0, 0.0, 2.5):
+        expected = np.flatnonzero(np.abs(stations - station) <= 0.1)
+        np.testing.assert_array_equal(np.sort(index.slice(station, 0.2)), expected)
+
+
+def test_range_and_sections():
+    points = _line_points()
+    index = SectionIndex(points, [0, 0, 0], [2, 0, 0])
+    assert index.range == (0.0, 10.0)
+    np.testing.assert_allclose(index.axis, [1, 0, 0])
+
+    sections = index.sections([2.0, 5.0], 0.05)
+    assert [s["station"] for s in sections] == [2.0, 5.0]
+    np.testing.assert_array_equal(sections[0]["indices"], [20])
+    # 断面の2D座標は (横断方向, 上向き)
+    np.testing.assert_allclose(sections[1]["profile"], [[0.0, 0.5]], atol=1e-12)
+
+
+def test_vertical_axis_has_orthonormal_frame():
+    index = SectionIndex(np.zeros((1, 3)), [0, 0, 0], [0, 0, 1])
+    frame = np.stack([index.u, index.v, index.axis])
+    np.testing.assert_allclose(frame @ frame.T, np.eye(3), atol=1e-12)
+
+
+def test_empty_points_range():
+    index = SectionIndex(np.empty((0, 3)), [0, 0, 0], [1, 0, 0])
+    assert index.range == (0.0, 0.0)
+    assert len(index.slice(0.0, 1.0)) == 0
+
+
+class _Item:
+    def __init__(self, points):
+        self.data = type("Cloud", (), {"points": points})()
+        self.cache = {}
+
+
+def test_get_section_index_caches_per_axis():
+    item = _Item(_line_points())
+    first = get_section_index(item, [0, 0, 0], [1, 0, 0])
+    assert get_section_index(item, [0, 0, 0], [1, 0, 0]) is first
+    assert get_section_index(item, [0, 0, 0], [0, 1, 0]) is not first
+    assert len(item.cache["section_index"]) == 2
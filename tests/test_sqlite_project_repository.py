@@ -0,0 +1,94 @@
+import copy
+import json
+import os
+
+from repository.project_repository import apply_change
+from repository.sqlite_project_repository import DATABASE_FILE, SqliteProjectRepository, read_project
+
+
+def _attributes() -> dict:
+    return {
+        "name": "橋梁A",
+        "folders": {
+            "上部構造": {
+                "attributes": {"判定区分": "a", "点検写真": "photos/1.jpg", "寸法": [1.0, 2.0]},
+                "memo": "",
+                "second_level_folders": {
+                    "主桁": {
+                        "attributes": {},
+                        "third_level_folders": {
+                            "G1": {"models": {
+                                "girder_2": {"visible": True, "file_path": "g2.obj", "attributes": {"判定区分": "c"}},
+                                "girder_1": {"file_path": "g1.obj", "geometry_type": "mesh", "visible": False},
+                            }},
+                        },
+                    },
+                },
+            },
+            "下部構造": {"second_level_folders": {}},
+        },
+        "created": "2024-01-01",
+    }
+
+
+def _save(repository, project_path, attributes):
+    repository.save(str(project_path), repository.snapshot(attributes))
+
+
+def _dump(attributes) -> str:
+    """キーの並びまで比べる"""
+    return json.dumps(attributes, ensure_ascii=False)
+
+
+def test_round_trip_keeps_key_order_and_empty_dicts(tmp_path):
+    attributes = _attributes()
+    _save(SqliteProjectRepository(), tmp_path, attributes)
+    loaded = SqliteProjectRepository().load(str(tmp_path))
+    assert _dump(loaded) == _dump(attributes)
+    assert _dump(read_project(str(tmp_path))) == _dump(attributes)
+
+
+def test_append_journal_matches_full_save(tmp_path):
+    records = [
+        {"path": ["folders", "上部構造", "attributes", "判定区分"], "value": "b"},
+        {"path": ["folders", "上部構造", "attributes", "点検写真"], "delete": True},
+        {"path": ["folders", "上部構造", "second_level_folders", "主桁", "third_level_folders", "G1", "models",
+                  "girder_1", "visible"], "value": True},
+        {"path": ["folders", "上部構造", "second_level_folders", "主桁", "attributes"], "value": {"損傷種類": "腐食"}},
+        {"path": ["name"], "value": "橋梁B"},
+        {"path": ["folders", "下部構造", "second_level_folders", "橋脚"], "value": {"third_level_folders": {}}},
+    ]
+    repository = SqliteProjectRepository()
+    _save(repository, tmp_path, _attributes())
+    for record in records:
+        repository.append_journal(str(tmp_path), [record])
+
+    expected = _attributes()
+    for record in records:
+        apply_change(expected, record)
+    assert _dump(SqliteProjectRepository().load(str(tmp_path))) == _dump(expected)
+
+    full_path = tmp_path / "full"
+    full_path.mkdir()
+    _save(SqliteProjectRepository(), full_path, copy.deepcopy(expected))
+    assert _dump(read_project(str(full_path))) == _dump(read_project(str(tmp_path)))
+
+
+def test_query_attributes(tmp_path):
+    repository = SqliteProjectRepository()
+    _save(repository, tmp_path, _attributes())
+    result = repository.query_attributes(str(tmp_path), "判定区分", ["c", "e"])
+    assert result == [(["上部構造", "主桁", "G1", "girder_2"], "c")]
+    assert repository.query_attributes(str(tmp_path), "判定区分", []) == []
+
+
+def test_read_project_does_not_write(tmp_path):
+    project_path = tmp_path / "project #1"
+    project_path.mkdir()
+    _save(SqliteProjectRepository(), project_path, _attributes())
+    database = os.path.join(project_path, DATABASE_FILE)
+    with open(database, "rb") as f:
+        before = f.read()
+    assert _dump(read_project(str(project_path))) == _dump(_attributes())
+    with open(database, "rb") as f:
+        assert f.read() == before
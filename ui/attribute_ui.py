@@ -2,7 +2,7 @@
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QTreeWidget, QTreeWidgetItem, 
                              QPushButton, QHBoxLayout, QHeaderView, QMessageBox, QInputDialog,
-                             QFileDialog, QDialog, QScrollArea, QStyledItemDelegate, QMenu)
+                             QFileDialog, QDialog, QScrollArea, QStyledItemDelegate, QMenu, QDialogButtonBox)
 from PyQt5.QtCore import Qt, QDateTime
 from PyQt5.QtGui import QPixmap, QIcon
 import os
@@ -10,6 +10,7 @@ import shutil
 import time
 
 from geometry_manager.geometries_manager import GeometryManager
+from utils.fit_metrics import format_fit_metrics
 
 class ImagePreviewDialog(QDialog):
     def __init__(self, image_path, parent=None):
@@ -137,6 +138,55 @@ class AttributeEditDelegate(QStyledItemDelegate):
             print(f"画像コピーエラー: {e}")
             return None
 
+class BulkAttributeDialog(QDialog):
+    """複数の配置モデルにまとめて設定する属性を入力するダイアログ（値を入力した属性だけを変更する）"""
+
+    def __init__(self, attribute_names: list, target_count: int, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("属性の一括編集")
+        self.setModal(True)
+        self.resize(420, 420)
+
+        label = QLabel(f"{target_count} 件の配置モデルに適用します（空欄の属性は変更しません）")
+        self.attribute_tree = QTreeWidget()
+        self.attribute_tree.setHeaderLabels(["属性名", "新しい値"])
+        self.attribute_tree.setRootIsDecorated(False)
+        self.attribute_tree.setAlternatingRowColors(True)
+        self.attribute_tree.setEditTriggers(QTreeWidget.DoubleClicked | QTreeWidget.EditKeyPressed |
+                                            QTreeWidget.SelectedClicked)
+        self.attribute_tree.header().resizeSection(0, 140)
+        for name in attribute_names:
+            self._add_row(name)
+
+        add_button = QPushButton("属性を追加")
+        add_button.clicked.connect(self._on_click_add)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(label)
+        layout.addWidget(self.attribute_tree)
+        layout.addWidget(add_button)
+        layout.addWidget(buttons)
+
+    def _add_row(self, name: str):
+        item = QTreeWidgetItem([name, ""])
+        item.setFlags(item.flags() | Qt.ItemIsEditable)
+        self.attribute_tree.addTopLevelItem(item)
+        return item
+
+    def _on_click_add(self):
+        name, ok = QInputDialog.getText(self, "属性を追加", "属性名:")
+        if ok and name.strip():
+            self.attribute_tree.editItem(self._add_row(name.strip()), 1)
+
+    def changes(self) -> dict:
+        """値を入力した {属性名: 値}"""
+        root = self.attribute_tree.invisibleRootItem()
+        return {root.child(i).text(0): root.child(i).text(1).strip()
+                for i in range(root.childCount()) if root.child(i).text(1).strip()}
+
 class AttributeUi(QWidget):
     def __init__(self, manager: GeometryManager, main_viewer=None):
         super().__init__()
@@ -147,6 +197,8 @@ class AttributeUi(QWidget):
         self.current_parent_name = None
         self.current_model_name = None
         self.current_model_hierarchy = None
+        # 表示中のフォルダ・配置モデルの階層のパス（project_model の索引のキー）
+        self.current_node_path = None
 
         self.label = QLabel("属性情報：")
         self.attribute_tree = QTreeWidget()
@@ -220,8 +272,8 @@ class AttributeUi(QWidget):
 
         self.setLayout(layout)
 
-    def show_folder_attributes(self, folder_name: str, folder_level: int, parent_name: str = None):
-        """指定されたフォルダの属性情報を表示"""
+    def show_folder_attributes(self, folder_name: str, folder_level: int, parent_name: str = None, path: list = None):
+        """指定されたフォルダの属性情報を表示（path は第1階層からのフォルダ名の並び。省略時は親の名前から作る）"""
         print(f"[AttributeUi] 属性表示開始: {folder_name}, レベル: {folder_level}, 親: {parent_name}")  # デバッグ用
         
         if not self.main_viewer:
@@ -231,6 +283,11 @@ class AttributeUi(QWidget):
         self.current_folder_name = folder_name
         self.current_folder_level = folder_level
         self.current_parent_name = parent_name
+        self.current_model_name = None
+        self.current_model_hierarchy = None
+        if path is None:
+            path = ([parent_name] if parent_name else []) + [folder_name]
+        self.current_node_path = tuple(path)
         
         # TreeWidgetをクリア
         self.attribute_tree.clear()
@@ -247,7 +304,7 @@ class AttributeUi(QWidget):
         print(f"[AttributeUi] ラベル更新完了")
         
         # 属性データを取得して表示
-        attributes = self._get_folder_attributes(folder_name, folder_level, parent_name)
+        attributes = self._get_folder_attributes(self.current_node_path)
         print(f"[AttributeUi] 取得した属性: {attributes}")
         
         if attributes:
@@ -280,6 +337,8 @@ class AttributeUi(QWidget):
             "second_level": second_level_parent,
             "third_level": third_level_parent
         }
+        self.current_node_path = tuple(model_data.get("path") or
+                                       (first_level_parent, second_level_parent, third_level_parent, model_name))
         
         # ★ 修正: tree_widget → attribute_tree
         self.attribute_tree.clear()
@@ -290,7 +349,7 @@ class AttributeUi(QWidget):
         print(f"[AttributeUi] ラベル更新完了")
         
         # 配置モデルの属性データを取得して表示
-        attributes = self._get_placed_model_attributes(model_data)
+        attributes = self._get_placed_model_attributes(self.current_node_path)
         print(f"[AttributeUi] 取得した配置モデル属性: {attributes}")
         
         if attributes:
@@ -312,181 +371,58 @@ class AttributeUi(QWidget):
         self.current_parent_name = None
         self.current_model_name = None
         self.current_model_hierarchy = None
+        self.current_node_path = None
 
-    def _get_folder_attributes(self, folder_name: str, folder_level: int, parent_name: str = None):
+    def _get_folder_attributes(self, path: tuple):
         """フォルダの属性データを取得"""
-        print(f"[AttributeUi] 属性データ取得開始: {folder_name}, レベル: {folder_level}")
+        print(f"[AttributeUi] 属性データ取得開始: {' > '.join(path)}")
         
         if not self.main_viewer:
             print(f"[AttributeUi] エラー: main_viewerが設定されていません")
             return {}
         
-        if not hasattr(self.main_viewer, 'project_attributes'):
-            print(f"[AttributeUi] エラー: project_attributesが存在しません")
+        project_model = self.main_viewer.project_model
+        if not project_model.contains(path):
+            print(f"[AttributeUi] 警告: フォルダ '{' > '.join(path)}' が見つかりません")
             return {}
         
-        project_attributes = self.main_viewer.project_attributes
-        print(f"[AttributeUi] プロジェクト属性: {project_attributes}")
-        
-        folders = project_attributes.get("folders", {})
-        print(f"[AttributeUi] フォルダデータ: {folders}")
+        attributes = project_model.get_attributes(path)
+        if attributes is None:
+            print(f"[AttributeUi] 属性が見つからないため、デフォルト属性を使用")
+            defaults = {1: self._get_default_first_level_attributes,
+                        2: self._get_default_second_level_attributes,
+                        3: self._get_default_third_level_attributes}
+            attributes = defaults[len(path)]()
         
-        if folder_level == 1:
-            # 第1階層フォルダの属性
-            print(f"[AttributeUi] 第1階層フォルダの属性を取得中...")
-            folder_data = folders.get(folder_name, {})
-            print(f"[AttributeUi] フォルダデータ '{folder_name}': {folder_data}")
-            
-            attributes = folder_data.get("attributes", None)
-            if attributes is None:
-                print(f"[AttributeUi] 属性が見つからないため、デフォルト属性を使用")
-                attributes = self._get_default_first_level_attributes()
-            
-            print(f"[AttributeUi] 第1階層属性: {attributes}")
-            return attributes
-            
-        elif folder_level == 2:
-            # 第2階層フォルダの属性
-            print(f"[AttributeUi] 第2階層フォルダの属性を取得中...")
-            if parent_name and parent_name in folders:
-                second_level_folders = folders[parent_name].get("second_level_folders", {})
-                print(f"[AttributeUi] 第2階層フォルダ一覧: {second_level_folders}")
-                
-                folder_data = second_level_folders.get(folder_name, {})
-                print(f"[AttributeUi] 第2階層フォルダデータ '{folder_name}': {folder_data}")
-                
-                attributes = folder_data.get("attributes", None)
-                if attributes is None:
-                    print(f"[AttributeUi] 第2階層属性が見つからないため、デフォルト属性を使用")
-                    attributes = self._get_default_second_level_attributes()
-                
-                print(f"[AttributeUi] 第2階層属性: {attributes}")
-                return attributes
-            else:
-                print(f"[AttributeUi] 警告: 親フォルダ '{parent_name}' が見つかりません")
-        elif folder_level == 3:
-            # 第3階層フォルダの属性
-            print(f"[AttributeUi] 第3階層フォルダの属性を取得中...")
-            # parent_nameは "第1階層 > 第2階層" の形式
-            if parent_name and " > " in parent_name:
-                first_level_parent, second_level_parent = parent_name.split(" > ")
-                
-                if first_level_parent in folders:
-                    second_level_folders = folders[first_level_parent].get("second_level_folders", {})
-                    if second_level_parent in second_level_folders:
-                        third_level_folders = second_level_folders[second_level_parent].get("third_level_folders", {})
-                        print(f"[AttributeUi] 第3階層フォルダ一覧: {third_level_folders}")
-                        
-                        folder_data = third_level_folders.get(folder_name, {})
-                        print(f"[AttributeUi] 第3階層フォルダデータ '{folder_name}': {folder_data}")
-                        
-                        attributes = folder_data.get("attributes", None)
-                        if attributes is None:
-                            print(f"[AttributeUi] 第3階層属性が見つからないため、デフォルト属性を使用")
-                            attributes = self._get_default_third_level_attributes()
-                        
-                        print(f"[AttributeUi] 第3階層属性: {attributes}")
-                        return attributes
-                    else:
-                        print(f"[AttributeUi] 警告: 第2階層フォルダ '{second_level_parent}' が見つかりません")
-                else:
-                    print(f"[AttributeUi] 警告: 第1階層フォルダ '{first_level_parent}' が見つかりません")
-            else:
-                print(f"[AttributeUi] 警告: 第3階層の親フォルダ情報が正しくありません: '{parent_name}'")
-        
-        print(f"[AttributeUi] 属性データが見つかりませんでした")
-        return {}
+        print(f"[AttributeUi] 第{len(path)}階層属性: {attributes}")
+        return attributes
 
-    def _get_placed_model_attributes(self, model_data: dict):
+    def _get_placed_model_attributes(self, path: tuple):
         """配置モデルの属性データを取得"""
-        print(f"[AttributeUi] 配置モデル属性データ取得開始: {model_data}")
+        print(f"[AttributeUi] 配置モデル属性データ取得開始: {' > '.join(path)}")
         
         if not self.main_viewer:
             print(f"[AttributeUi] エラー: main_viewerが設定されていません")
             return {}
         
-        if not hasattr(self.main_viewer, 'project_attributes'):
-            print(f"[AttributeUi] エラー: project_attributesが存在しません")
-            return {}
-        
-        project_attributes = self.main_viewer.project_attributes
-        folders = project_attributes.get("folders", {})
-        
-        first_level = model_data.get("first_level_parent", "")
-        second_level = model_data.get("second_level_parent", "")
-        third_level = model_data.get("third_level_parent", "")
-        model_name = model_data.get("name", "")
+        model_info = self.main_viewer.project_model.get(path)
+        if model_info is None:
+            print(f"[AttributeUi] エラー: モデル '{path[-1]}' が見つかりません")
+            # ★ 修正: 見つからない場合でもデフォルト属性を返す
+            model_info = {
+                "original_name": path[-1],
+                "file_path": "unknown",
+                "geometry_type": "model",
+                "placed_date": "unknown"
+            }
         
-        print(f"[AttributeUi] 階層情報: {first_level} > {second_level} > {third_level} > {model_name}")
-        print(f"[AttributeUi] プロジェクト属性全体: {project_attributes}")
-        print(f"[AttributeUi] フォルダ一覧: {list(folders.keys())}")
+        attributes = model_info.get("attributes", None)
+        if not attributes:
+            print(f"[AttributeUi] 配置モデル属性が見つからないため、デフォルト属性を使用")
+            attributes = self._get_default_model_attributes(model_info)
         
-        try:
-            # 階層構造をたどって配置モデルの属性を取得
-            if first_level in folders:
-                print(f"[AttributeUi] 第1階層フォルダ '{first_level}' 見つかりました")
-                first_level_data = folders[first_level]
-                print(f"[AttributeUi] 第1階層データ: {first_level_data}")
-                
-                second_level_folders = first_level_data.get("second_level_folders", {})
-                print(f"[AttributeUi] 第2階層フォルダ一覧: {list(second_level_folders.keys())}")
-                
-                if second_level in second_level_folders:
-                    print(f"[AttributeUi] 第2階層フォルダ '{second_level}' 見つかりました")
-                    second_level_data = second_level_folders[second_level]
-                    print(f"[AttributeUi] 第2階層データ: {second_level_data}")
-                    
-                    third_level_folders = second_level_data.get("third_level_folders", {})
-                    print(f"[AttributeUi] 第3階層フォルダ一覧: {list(third_level_folders.keys())}")
-                    
-                    if third_level in third_level_folders:
-                        print(f"[AttributeUi] 第3階層フォルダ '{third_level}' 見つかりました")
-                        third_level_data = third_level_folders[third_level]
-                        print(f"[AttributeUi] 第3階層データ: {third_level_data}")
-                        
-                        models = third_level_data.get("models", {})
-                        print(f"[AttributeUi] モデル一覧: {list(models.keys())}")
-                        
-                        if model_name in models:
-                            print(f"[AttributeUi] モデル '{model_name}' 見つかりました")
-                            model_info = models[model_name]
-                            print(f"[AttributeUi] モデル情報: {model_info}")
-                            
-                            attributes = model_info.get("attributes", None)
-                            print(f"[AttributeUi] 保存済み属性: {attributes}")
-                            
-                            if attributes is None or len(attributes) == 0:
-                                print(f"[AttributeUi] 配置モデル属性が見つからないため、デフォルト属性を使用")
-                                attributes = self._get_default_model_attributes(model_info)
-                                print(f"[AttributeUi] デフォルト属性生成: {attributes}")
-                            
-                            print(f"[AttributeUi] 最終的な配置モデル属性: {attributes}")
-                            return attributes
-                        else:
-                            print(f"[AttributeUi] エラー: モデル '{model_name}' が見つかりません")
-                    else:
-                        print(f"[AttributeUi] エラー: 第3階層フォルダ '{third_level}' が見つかりません")
-                else:
-                    print(f"[AttributeUi] エラー: 第2階層フォルダ '{second_level}' が見つかりません")
-            else:
-                print(f"[AttributeUi] エラー: 第1階層フォルダ '{first_level}' が見つかりません")
-                
-        except Exception as e:
-            print(f"[AttributeUi] 配置モデル属性取得エラー: {e}")
-            import traceback
-            traceback.print_exc()
-        
-        print(f"[AttributeUi] 配置モデル属性データが見つかりませんでした")
-        # ★ 修正: 見つからない場合でもデフォルト属性を返す
-        print(f"[AttributeUi] デフォルト属性を生成します")
-        default_attributes = self._get_default_model_attributes({
-            "original_name": model_name,
-            "file_path": "unknown",
-            "geometry_type": "model",
-            "placed_date": "unknown"
-        })
-        print(f"[AttributeUi] 生成したデフォルト属性: {default_attributes}")
-        return default_attributes
+        print(f"[AttributeUi] 最終的な配置モデル属性: {attributes}")
+        return attributes
 
     def _get_default_model_attributes(self, model_info: dict):
         """配置モデルのデフォルト属性"""
@@ -494,7 +430,7 @@ class AttributeUi(QWidget):
         file_path = model_info.get("file_path", "unknown")
         placed_date = model_info.get("placed_date", "unknown")
         
-        return {
+        attributes = {
             "要素番号": "Mg0101",
             "構造形式": "鋼橋鈑桁",
             "損傷種類": "腐食",
@@ -506,6 +442,10 @@ class AttributeUi(QWidget):
             "ジオメトリタイプ": geometry_type,
             "配置日時": placed_date,
         }
+        # フィット評価済みなら結果も表示
+        if model_info.get("fit_metrics"):
+            attributes.update(format_fit_metrics(model_info["fit_metrics"]))
+        return attributes
 
     def _get_default_first_level_attributes(self):
         """第1階層フォルダのデフォルト属性"""
@@ -672,66 +612,82 @@ class AttributeUi(QWidget):
 
     def _update_folder_attributes(self, attributes):
         """フォルダの属性データを更新"""
-        if not self.main_viewer:
+        if not self.main_viewer or not self.current_node_path:
             return
         
-        project_attributes = self.main_viewer.project_attributes
-        folders = project_attributes.get("folders", {})
-        
-        if self.current_folder_level == 1:
-            # 第1階層フォルダの属性を更新
-            if self.current_folder_name not in folders:
-                folders[self.current_folder_name] = {}
-            
-            folders[self.current_folder_name]["attributes"] = attributes
-            
-        elif self.current_folder_level == 2:
-            # 第2階層フォルダの属性を更新
-            if self.current_parent_name and self.current_parent_name in folders:
-                second_level_folders = folders[self.current_parent_name].get("second_level_folders", {})
-                if self.current_folder_name in second_level_folders:
-                    second_level_folders[self.current_folder_name]["attributes"] = attributes
-                    
-        elif self.current_folder_level == 3:
-            # 第3階層フォルダの属性を更新
-            if self.current_parent_name and " > " in self.current_parent_name:
-                first_level_parent, second_level_parent = self.current_parent_name.split(" > ")
-                
-                if first_level_parent in folders:
-                    second_level_folders = folders[first_level_parent].get("second_level_folders", {})
-                    if second_level_parent in second_level_folders:
-                        third_level_folders = second_level_folders[second_level_parent].get("third_level_folders", {})
-                        if self.current_folder_name in third_level_folders:
-                            third_level_folders[self.current_folder_name]["attributes"] = attributes
+        project_model = self.main_viewer.project_model
+        if project_model.contains(self.current_node_path):
+            project_model.set_attributes(self.current_node_path, attributes)
     
     def _update_placed_model_attributes(self, attributes):
         """配置モデルの属性データを更新"""
-        if not self.main_viewer or not hasattr(self, 'current_model_hierarchy'):
+        if not self.main_viewer or not self.current_node_path:
             return
         
-        project_attributes = self.main_viewer.project_attributes
-        folders = project_attributes.get("folders", {})
-        
-        hierarchy = self.current_model_hierarchy
-        first_level = hierarchy["first_level"]
-        second_level = hierarchy["second_level"]
-        third_level = hierarchy["third_level"]
-        model_name = self.current_model_name
-        
+        project_model = self.main_viewer.project_model
+        if project_model.contains(self.current_node_path):
+            project_model.set_attributes(self.current_node_path, attributes)
+            print(f"[AttributeUi] 配置モデル '{self.current_model_name}' の属性を更新しました")
+        else:
+            print(f"[AttributeUi] 配置モデル属性更新エラー: '{' > '.join(self.current_node_path)}' が見つかりません")
+    
+    def bulk_edit_placed_models(self, paths: list):
+        """
+        複数の配置モデルの属性をまとめて編集する。
+        入力した属性をすべてのモデルに反映してから、プロジェクト属性の保存を1回だけ行う。
+        """
+        if not self.main_viewer or not paths:
+            return
+        project_model = self.main_viewer.project_model
+        paths = [tuple(path) for path in paths if project_model.contains(path)]
+        if not paths:
+            return
+
+        # 対象モデルの属性名（現在の値が未設定のモデルは既定の属性）を候補として並べる
+        attribute_names = {}
+        for path in paths:
+            for name in self._current_model_attributes(path):
+                attribute_names.setdefault(name, None)
+        dialog = BulkAttributeDialog(list(attribute_names), len(paths), self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        changes = dialog.changes()
+        if not changes:
+            return
+
         try:
-            # 階層構造をたどって配置モデルの属性を更新
-            if first_level in folders:
-                second_level_folders = folders[first_level].get("second_level_folders", {})
-                if second_level in second_level_folders:
-                    third_level_folders = second_level_folders[second_level].get("third_level_folders", {})
-                    if third_level in third_level_folders:
-                        models = third_level_folders[third_level].get("models", {})
-                        if model_name in models:
-                            models[model_name]["attributes"] = attributes
-                            print(f"[AttributeUi] 配置モデル '{model_name}' の属性を更新しました")
+            updated = self.apply_bulk_attributes(paths, changes)
         except Exception as e:
-            print(f"[AttributeUi] 配置モデル属性更新エラー: {e}")
-    
+            QMessageBox.critical(self, "エラー", f"属性の一括編集に失敗しました：\n{e}")
+            return
+        QMessageBox.information(self, "一括編集", f"{updated} 件の配置モデルの属性を更新しました。\n" +
+                                "\n".join(f"{name}: {value}" for name, value in changes.items()))
+
+    def apply_bulk_attributes(self, paths: list, changes: dict) -> int:
+        """paths の配置モデルの属性に changes を反映し、保存を1回だけ予約する（更新した件数を返す）"""
+        project_model = self.main_viewer.project_model
+        updated = 0
+        for path in paths:
+            if not project_model.contains(path):
+                continue
+            attributes = dict(self._current_model_attributes(path))
+            attributes.update(changes)
+            project_model.set_attributes(path, attributes)
+            updated += 1
+        print(f"[AttributeUi] {updated} 件の配置モデルの属性を一括更新しました: {changes}")
+
+        self.main_viewer._save_project_attributes()
+        # 表示中のモデルが対象なら表示し直す
+        if self.current_model_name and self.current_node_path in set(map(tuple, paths)):
+            self.attribute_tree.clear()
+            self._populate_tree(self._get_placed_model_attributes(self.current_node_path), "model")
+        return updated
+
+    def _current_model_attributes(self, path: tuple) -> dict:
+        """保存済みの属性（未設定なら既定の属性）。ログを出さないので一括処理で使う"""
+        model_info = self.main_viewer.project_model.get(path) or {}
+        return model_info.get("attributes") or self._get_default_model_attributes(model_info)
+
     def _update_image_display(self, item):
         """アイテムの画像表示を更新"""
         image_path = item.text(1)
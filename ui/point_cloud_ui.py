@@ -1,15 +1,18 @@
 # ui/point_cloud_ui.py
 
 import numpy as np
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QDialog, QMessageBox
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QDialog, QMessageBox, QSlider
 from PyQt5.QtGui import QPixmap, QCursor
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from pyvistaqt import QtInteractor
 import pyvista as pv
 import vtk
 from vtkmodules.vtkInteractionStyle import vtkInteractorStyleTrackballCamera
 
 from di.container import generate_parametric_model_usecase
+from di.container import load_texture_usecase
+from utils.octree import select_visible_nodes
+from utils.spatial_index import get_spatial_index
 from geometry_manager.geometries_manager import GeometryManager
 
 class PointCloudInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
@@ -40,18 +43,57 @@ class PointCloudUi(QWidget):
         self.geometry_manager.updated.connect(self._refresh_entire_scene)
         # 追加: 選択状態変更の監視
         self.geometry_manager.selection_changed.connect(self._update_selection_display)
+        # テクスチャのバックグラウンドデコード完了の監視
+        self.geometry_manager.texture_loaded.connect(self._on_texture_loaded)
+        # 偏差などの点ごとの値の変更の監視（該当する点群だけ表示し直す）
+        self.geometry_manager.scalars_changed.connect(self._on_scalars_changed)
+        # 断面の抽出結果の変更の監視
+        self.geometry_manager.sections_changed.connect(self._on_sections_changed)
 
         self.generate_parametric_model_usecase = generate_parametric_model_usecase(self.geometry_manager)
+        self.load_texture_usecase = load_texture_usecase(self.geometry_manager)
 
         # === 中身（メインビュー） ===
         self.plotter = QtInteractor(self)
         # 追加: バウンディングボックス表示用の変数
         self.current_bbox_actor = None
 
+        # 点群ごとのアクター（偏差表示の切り替えで該当する点群だけ差し替える）
+        self.point_cloud_actors = {}
+
+        # タイル点群（オクツリー）表示用: カメラ操作が落ち着いたら表示ノードを選び直す
+        self.octree_actors = {}
+        self.octree_update_timer = QTimer(self)
+        self.octree_update_timer.setSingleShot(True)
+        self.octree_update_timer.setInterval(150)
+        self.octree_update_timer.timeout.connect(self._update_octree_views)
+        self.plotter.iren.add_observer("EndInteractionEvent", lambda obj, event: self.octree_update_timer.start())
+
+        # 右クリックで表示中のアイテムの点・三角形を選ぶ（空間インデックスで探す）。結果は (アイテム, 番号, 座標)
+        # 直近2回分の座標は断面抽出の軸指定に使う
+        self.picked = None
+        self.picked_positions = []
+        self.plotter.iren.add_observer("RightButtonPressEvent", self._on_right_button_pressed)
+
+        # 断面表示: 3Dビューでは断面の点を強調し、右下に2Dの断面図を重ねる。スライダーで断面を切り替える
+        self.section_item_name = None
+        self.section_actor = None
+        self.section_chart = None
+        self.section_slider = QSlider(Qt.Horizontal)
+        self.section_slider.valueChanged.connect(self._show_section)
+        self.section_label = QLabel()
+        self.section_bar = QWidget()
+        section_layout = QHBoxLayout(self.section_bar)
+        section_layout.setContentsMargins(4, 0, 4, 0)
+        section_layout.addWidget(self.section_label)
+        section_layout.addWidget(self.section_slider)
+        self.section_bar.hide()
+
         # === レイアウト構築 ===
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)  # 余白なしで最大限使う
         layout.addWidget(self.plotter)
+        layout.addWidget(self.section_bar)
         self.setLayout(layout)
     
     def _update_selection_display(self):
@@ -87,31 +129,18 @@ class PointCloudUi(QWidget):
     def _create_bounding_box(self, geometry_item):
         """ジオメトリアイテムからバウンディングボックスメッシュを作成"""
         try:
-            if geometry_item.geometry_type == "pointcloud":
-                # 点群の場合
-                points = np.asarray(geometry_item.data.points)
-                if len(points) == 0:
+            if geometry_item.geometry_type in ("pointcloud", "model", "textured_model"):
+                # 点群・3Dモデルの場合は空間インデックスにキャッシュした範囲を使う
+                bounds = get_spatial_index(geometry_item).bounds()
+                if bounds is None:
                     return None
+                min_coords, max_coords = bounds
                 
-                # バウンディングボックスの最小・最大座標を計算
-                min_coords = np.min(points, axis=0)
-                max_coords = np.max(points, axis=0)
-                
-            elif geometry_item.geometry_type == "model":
-                # 3Dモデルの場合
-                vertices = np.asarray(geometry_item.data.vertices)
-                if len(vertices) == 0:
-                    return None
-                
-                min_coords = np.min(vertices, axis=0)
-                max_coords = np.max(vertices, axis=0)
-                
-            elif geometry_item.geometry_type == 'textured_model':
-                # テクスチャ付きモデルの場合
-                mesh = geometry_item.data['mesh']
-                bounds = mesh.bounds
-                min_coords = np.array([bounds[0], bounds[2], bounds[4]])
-                max_coords = np.array([bounds[1], bounds[3], bounds[5]])
+            elif geometry_item.geometry_type == "octree":
+                # タイル点群の場合はメタデータの範囲を使う
+                bounds = geometry_item.data['metadata']['tight_bounds']
+                min_coords = np.array(bounds[:3])
+                max_coords = np.array(bounds[3:])
                 
             else:
                 return None
@@ -126,39 +155,251 @@ class PointCloudUi(QWidget):
             print(f"バウンディングボックス作成中にエラー: {e}")
             return None
 
+    def pick(self, display_x: int, display_y: int, tolerance: float = 0.05):
+        """
+        画面上の位置から視線方向の半直線を作り、表示中のアイテムの空間インデックスで最初に当たる位置を探す。
+        戻り値は (アイテム, 点または三角形の番号, ワールド座標)。何もなければ None。
+        """
+        renderer = self.plotter.renderer
+        ends = []
+        for depth in (0.0, 1.0):
+            renderer.SetDisplayPoint(display_x, display_y, depth)
+            renderer.DisplayToWorld()
+            world = renderer.GetWorldPoint()
+            ends.append(np.array(world[:3]) / world[3])
+        origin, direction = ends[0], ends[1] - ends[0]
+
+        best = None
+        for geometry in self.geometry_manager.get_visible_items():
+            index = get_spatial_index(geometry)
+            if index is None:
+                continue
+            hit = index.ray(origin, direction, tolerance)
+            if hit is not None and (best is None or hit[1] < best[2]):
+                best = (geometry, hit[0], hit[1])
+        if best is None:
+            return None
+        geometry, element, distance = best
+        return geometry, element, origin + distance * direction / np.linalg.norm(direction)
+
+    def _on_right_button_pressed(self, obj, event):
+        x, y = obj.GetEventPosition()
+        self.picked = self.pick(x, y)
+        if self.picked is None:
+            print("[Pick] 近くに点・面がありませんでした")
+            self.plotter.remove_actor("picked_point")
+            return
+        geometry, element, position = self.picked
+        self.picked_positions = (self.picked_positions + [np.asarray(position, dtype=np.float64)])[-2:]
+        print(f"[Pick] {geometry.name} #{element}: ({position[0]:.3f}, {position[1]:.3f}, {position[2]:.3f})")
+        self.plotter.add_mesh(pv.PolyData(position[None]), color="red", point_size=12,
+                              render_points_as_spheres=True, name="picked_point", pickable=False)
+
+    def _update_octree_views(self):
+        """表示中のタイル点群について、視錐台と必要な詳細度に応じてノードを選び直す"""
+        changed = False
+        for geometry in self.geometry_manager.get_visible_items():
+            if geometry.geometry_type == "octree":
+                changed = self._update_octree_item(geometry) or changed
+        if changed:
+            self.plotter.render()
+
+    def _update_octree_item(self, geometry, force: bool = False) -> bool:
+        """タイル点群のノードを読み込んで表示（他のアクターは作り直さない）"""
+        data = geometry.data
+        metadata = data['metadata']
+
+        if data['visible_nodes'] is None:
+            # 初回はルートノードだけを表示してカメラを合わせ、その後に詳細を読み込む
+            names = ["r"]
+            self.octree_update_timer.start()
+        else:
+            renderer = self.plotter.renderer
+            camera = renderer.GetActiveCamera()
+            planes = [0.0] * 24
+            camera.GetFrustumPlanes(renderer.GetTiledAspectRatio(), planes)
+            names = select_visible_nodes(
+                metadata,
+                planes[:16],  # 左右上下の4面のみ（前後のクリップ面は表示中の点から決まるため使わない）
+                camera.GetPosition(),
+                camera.GetViewAngle(),
+                renderer.GetSize()[1],
+                data['point_budget']
+            )
+
+        if not force and names == data['visible_nodes']:
+            return False
+
+        points, rgb = data['cache'].get(names)
+        cloud = pv.PolyData(points)
+        old_actor = self.octree_actors.pop(geometry.name, None)
+        if old_actor is not None:
+            self.plotter.remove_actor(old_actor, render=False)
+
+        if metadata.get('has_colors'):
+            cloud['colors'] = rgb
+            actor = self.plotter.add_points(cloud, scalars='colors', rgb=True, point_size=3,
+                                            reset_camera=data['visible_nodes'] is None)
+        else:
+            actor = self.plotter.add_points(cloud, color='white', point_size=3,
+                                            reset_camera=data['visible_nodes'] is None)
+        self.octree_actors[geometry.name] = actor
+        data['visible_nodes'] = names
+        print(f"[Octree] {geometry.name}: {len(names)} ノード, {len(points)} 点を表示 "
+              f"(キャッシュ {data['cache'].size_bytes / 1e6:.0f} MB)")
+        return True
+
+    def _on_texture_loaded(self, name: str):
+        """テクスチャのデコード完了時、表示中のモデルであればシーンを再構築"""
+        if any(item.name == name for item in self.geometry_manager.get_visible_items()):
+            self._refresh_entire_scene()
+
+    def _on_scalars_changed(self, name: str):
+        """点ごとの値が変わった点群のアクターだけを差し替える"""
+        for geometry in self.geometry_manager.get_visible_items():
+            if geometry.name == name and geometry.geometry_type == "pointcloud":
+                self._add_point_cloud_actor(geometry)
+                self.plotter.render()
+                return
+
+    def _on_sections_changed(self, name: str):
+        """断面が抽出（または解除）された点群の断面表示を切り替える"""
+        item = next((item for item in self.geometry_manager.items if item.name == name), None)
+        sections = None if item is None else item.cache.get("sections")
+        if sections is None or not sections["sections"]:
+            if self.section_item_name == name:
+                self.section_item_name = None
+                self._remove_section_display()
+                self.section_bar.hide()
+                self.plotter.render()
+            return
+
+        self.section_item_name = name
+        self.section_slider.blockSignals(True)
+        self.section_slider.setRange(0, len(sections["sections"]) - 1)
+        self.section_slider.setValue(0)
+        self.section_slider.blockSignals(False)
+        self.section_bar.show()
+        self._show_section(0)
+
+    def _remove_section_display(self):
+        if self.section_actor is not None:
+            self.plotter.remove_actor(self.section_actor, render=False)
+            self.section_actor = None
+        if self.section_chart is not None:
+            self.plotter.remove_chart(self.section_chart)
+            self.section_chart = None
+
+    def _show_section(self, index: int):
+        """index 番目の断面を表示（断面の点の強調と2Dの断面図）"""
+        self._remove_section_display()
+        item = next((item for item in self.geometry_manager.get_visible_items()
+                     if item.name == self.section_item_name), None)
+        sections = None if item is None else item.cache.get("sections")
+        if sections is None or index >= len(sections["sections"]):
+            self.plotter.render()
+            return
+        section = sections["sections"][index]
+        indices, profile = section["indices"], section["profile"]
+        self.section_label.setText(f"断面 {index + 1}/{len(sections['sections'])}  "
+                                   f"{section['station']:.2f} m ({len(indices)} 点)")
+
+        if len(indices):
+            points = np.asarray(item.data.points)[indices]
+            self.section_actor = self.plotter.add_points(pv.PolyData(points), color='yellow', point_size=7,
+                                                         reset_camera=False)
+
+        chart = pv.Chart2D(size=(0.4, 0.4), loc=(0.58, 0.02), x_label="横断方向 [m]", y_label="高さ [m]")
+        chart.title = f"{item.name} {section['station']:.2f} m"
+        if len(profile):
+            chart.scatter(profile[:, 0], profile[:, 1], color='black', size=3)
+            # 縦横の縮尺をそろえる
+            (u_min, v_min), (u_max, v_max) = profile.min(axis=0), profile.max(axis=0)
+            half = max(u_max - u_min, v_max - v_min) / 2 * 1.05 or 1.0
+            u_center, v_center = (u_min + u_max) / 2, (v_min + v_max) / 2
+            chart.x_range = [u_center - half, u_center + half]
+            chart.y_range = [v_center - half, v_center + half]
+        self.plotter.add_chart(chart)
+        self.section_chart = chart
+        self.plotter.render()
+
+    def _add_point_cloud_actor(self, geometry):
+        """点群を表示（偏差・変化量が計算済みならカラーマップで表示）。同じ点群の既存のアクターは置き換える"""
+        old_actor = self.point_cloud_actors.pop(geometry.name, None)
+        if old_actor is not None:
+            self.plotter.remove_actor(old_actor, render=False)
+        for label in ("偏差 [m]", "変化量 [m]"):
+            bar_title = f"{label} {geometry.name}"
+            if bar_title in self.plotter.scalar_bars.keys():
+                self.plotter.remove_scalar_bar(bar_title, render=False)
+
+        points = np.asarray(geometry.data.points)
+        cloud = pv.PolyData(points)
+        # 偏差（モデルとの差）を優先し、なければ変化量（前回の点検との差）を表示する
+        scalars = None
+        for key, label in (("deviation", "偏差 [m]"), ("change", "変化量 [m]")):
+            if geometry.cache.get(key) is not None:
+                scalars = (geometry.cache[key], f"{label} {geometry.name}")
+                break
+        if scalars is not None:
+            result, bar_title = scalars
+            cloud['scalars'] = result['values']
+            actor = self.plotter.add_points(cloud, scalars='scalars', cmap='coolwarm', clim=result['clim'],
+                                            nan_color='gray', point_size=5, reset_camera=False,
+                                            scalar_bar_args={'title': bar_title})
+        elif geometry.data.has_colors():
+            cloud['colors'] = np.asarray(geometry.data.colors)
+            actor = self.plotter.add_points(cloud, scalars='colors', rgb=True, point_size=5)
+        else:
+            actor = self.plotter.add_points(cloud, color='white', point_size=5)
+        self.point_cloud_actors[geometry.name] = actor
+
+    def _mesh_to_polydata(self, model):
+        """Open3DのメッシュをPyVistaのPolyDataに変換（UVがあればテクスチャ座標も設定）"""
+        vertices = np.asarray(model.vertices)
+        triangles = np.asarray(model.triangles)
+        if len(vertices) == 0 or len(triangles) == 0:
+            return None
+
+        # PyVista用の三角形配列は各セルの先頭に「3」が必要
+        faces = np.hstack([
+            np.full((triangles.shape[0], 1), 3),  # 3頂点を示す
+            triangles
+        ]).flatten()
+
+        mesh = pv.PolyData(vertices, faces)
+
+        # OBJパーサは (v, vt) ごとに頂点を分割しているため、頂点ごとにUVが一意に決まる
+        if model.has_triangle_uvs():
+            uvs = np.zeros((len(vertices), 2))
+            uvs[triangles.ravel()] = np.asarray(model.triangle_uvs)
+            mesh.active_texture_coordinates = uvs
+
+        return mesh
+
     def _refresh_entire_scene(self):
         self.plotter.clear()
         # 追加: クリア時にバウンディングボックスも初期化
         self.current_bbox_actor = None
+        self.octree_actors = {}
+        self.point_cloud_actors = {}
+        self.section_actor = None
+        if self.section_chart is not None:
+            self.plotter.remove_chart(self.section_chart)
+            self.section_chart = None
         
         self.plotter.enable_lightkit()
         for geometry in self.geometry_manager.get_visible_items():
             if geometry.geometry_type == "pointcloud":
-                points = np.asarray(geometry.data.points)
-                colors = np.asarray(geometry.data.colors) if geometry.data.has_colors() else None
-                cloud = pv.PolyData(points)
-
-                if colors is not None:
-                    cloud['colors'] = colors
-                    self.plotter.add_points(cloud, scalars='colors', rgb=True, point_size=5)
-                else:
-                    self.plotter.add_points(cloud, color='white', point_size=5)
+                self._add_point_cloud_actor(geometry)
+            elif geometry.geometry_type == "octree":
+                self._update_octree_item(geometry, force=True)
             elif geometry.geometry_type == "model":
-                vertices = np.asarray(geometry.data.vertices)
-                triangles = np.asarray(geometry.data.triangles)
-
-                if len(vertices) == 0 or len(triangles) == 0:
+                mesh = self._mesh_to_polydata(geometry.data)
+                if mesh is None:
                     print(f"[WARNING] モデルに頂点または三角形が含まれていません: {geometry}")
                     continue
 
-                # PyVista用の三角形配列は各セルの先頭に「3」が必要
-                faces = np.hstack([
-                    np.full((triangles.shape[0], 1), 3),  # 3頂点を示す
-                    triangles
-                ]).flatten()
-
-                mesh = pv.PolyData(vertices, faces)
-
                 # 色がある場合
                 if geometry.data.has_vertex_colors():
                     colors = np.asarray(geometry.data.vertex_colors)
@@ -186,11 +427,23 @@ class PointCloudUi(QWidget):
                         specular_power=20
                     )
             elif geometry.geometry_type == 'textured_model':
-                mesh = geometry.data['mesh']
+                mesh = self._mesh_to_polydata(geometry.data['mesh'])
+                if mesh is None:
+                    print(f"[WARNING] モデルに頂点または三角形が含まれていません: {geometry}")
+                    continue
                 texture = geometry.data['texture']
                 
+                # テクスチャ未デコードの場合はバックグラウンドでデコードし、それまではテクスチャなしで表示
+                if texture is None:
+                    self.load_texture_usecase.exec(geometry)
+                    self.plotter.add_mesh(
+                        mesh,
+                        color='lightgray',
+                        smooth_shading=True,
+                    )
+                
                 # テクスチャが辞書形式（複数テクスチャ）の場合
-                if isinstance(texture, dict):
+                elif isinstance(texture, dict):
                     # プライマリテクスチャを取得（primaryがなければ最初のテクスチャを使用）
                     primary_texture = texture.get('primary', list(texture.values())[0])
                     self.plotter.add_mesh(
@@ -213,6 +466,10 @@ class PointCloudUi(QWidget):
                         smooth_shading=True,
                     )
 
+        # 断面を表示中なら描き直す
+        if self.section_item_name is not None:
+            self._show_section(self.section_slider.value())
+
         # 追加: シーン再構築後に選択表示を更新
         self._update_selection_display()
         self.plotter.render()
\ No newline at end of file
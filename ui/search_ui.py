@@ -0,0 +1,166 @@
+# ui/search_ui.py
+
+import os
+
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox,
+                             QCheckBox, QTreeWidget, QTreeWidgetItem, QFileDialog, QMessageBox, QProgressDialog,
+                             QApplication)
+from PyQt5.QtCore import Qt
+
+# 検索条件の属性名の初期候補（索引を読んだ後は索引にある属性名を使う）
+DEFAULT_ATTRIBUTE_NAMES = ["損傷種類", "判定区分", "構造形式", "要素番号", "構造種別", "橋梁名"]
+CONDITION_ROWS = 3
+
+class SearchUi(QWidget):
+    """
+    複数のプロジェクトをまとめたフォルダの検索用索引を作り、プロジェクトを開かずに部材を横断検索するパネル。
+    結果をダブルクリックするとそのプロジェクトを開く。
+    """
+
+    def __init__(self, main_viewer):
+        super().__init__()
+        self.main_viewer = main_viewer
+
+        # 索引を作るフォルダ
+        self.root_edit = QLineEdit()
+        self.root_edit.setPlaceholderText("プロジェクトをまとめたフォルダ")
+        browse_button = QPushButton("参照")
+        browse_button.clicked.connect(self._on_click_browse)
+        self.build_button = QPushButton("索引を更新")
+        self.build_button.clicked.connect(self._on_click_build)
+        root_layout = QHBoxLayout()
+        root_layout.addWidget(self.root_edit)
+        root_layout.addWidget(browse_button)
+        root_layout.addWidget(self.build_button)
+
+        # 検索条件（属性名 = 値 をすべて満たすもの）
+        self.condition_rows = []
+        condition_layout = QVBoxLayout()
+        for i in range(CONDITION_ROWS):
+            name_combo = QComboBox()
+            name_combo.setEditable(True)
+            name_combo.addItems(DEFAULT_ATTRIBUTE_NAMES)
+            name_combo.setCurrentIndex(i if i < 2 else -1)
+            value_edit = QLineEdit()
+            value_edit.setPlaceholderText("値")
+            value_edit.returnPressed.connect(self._on_click_search)
+            row = QHBoxLayout()
+            row.addWidget(name_combo, 1)
+            row.addWidget(value_edit, 1)
+            condition_layout.addLayout(row)
+            self.condition_rows.append((name_combo, value_edit))
+
+        self.rating_check = QCheckBox("判定区分は指定した区分以上")
+        self.rating_check.setChecked(True)
+        self.keyword_edit = QLineEdit()
+        self.keyword_edit.setPlaceholderText("名前・値に含む語（任意）")
+        self.keyword_edit.returnPressed.connect(self._on_click_search)
+        search_button = QPushButton("検索")
+        search_button.clicked.connect(self._on_click_search)
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(self.keyword_edit)
+        search_layout.addWidget(search_button)
+
+        self.result_label = QLabel("検索結果：")
+        self.result_tree = QTreeWidget()
+        self.result_tree.setHeaderLabels(["プロジェクト", "階層", "属性"])
+        self.result_tree.setRootIsDecorated(False)
+        self.result_tree.setAlternatingRowColors(True)
+        self.result_tree.itemDoubleClicked.connect(self._on_result_double_clicked)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(root_layout)
+        layout.addLayout(condition_layout)
+        layout.addWidget(self.rating_check)
+        layout.addLayout(search_layout)
+        layout.addWidget(self.result_label)
+        layout.addWidget(self.result_tree)
+
+    def _root(self) -> str:
+        root = self.root_edit.text().strip()
+        if not root or not os.path.isdir(root):
+            QMessageBox.warning(self, "警告", "プロジェクトをまとめたフォルダを指定してください")
+            return None
+        return root
+
+    def _on_click_browse(self):
+        root = QFileDialog.getExistingDirectory(self, "プロジェクトをまとめたフォルダを選択", self.root_edit.text())
+        if root:
+            self.root_edit.setText(root)
+            self._refresh_attribute_names(root)
+
+    def _on_click_build(self):
+        root = self._root()
+        if not root:
+            return
+        progress = QProgressDialog("プロジェクトを読み込んでいます...", "中止", 0, 0, self)
+        progress.setWindowTitle("索引の更新")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.show()
+
+        def on_progress(done, total):
+            progress.setMaximum(total)
+            progress.setValue(done)
+            QApplication.processEvents()
+            return not progress.wasCanceled()
+
+        try:
+            result = self.main_viewer.build_search_index_usecase.exec(root, progress_callback=on_progress)
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"索引の更新に失敗しました：\n{e}")
+            return
+        finally:
+            progress.close()
+
+        self._refresh_attribute_names(root)
+        message = (f"{result['projects']} プロジェクト（更新 {result['updated']}, 削除 {result['removed']}）")
+        if result["failures"]:
+            message += "\n\n次のプロジェクトを読み込めませんでした：\n" + "\n".join(
+                f"{path}: {error}" for path, error in result["failures"][:20])
+        QMessageBox.information(self, "索引の更新", message)
+
+    def _refresh_attribute_names(self, root: str):
+        try:
+            names = self.main_viewer.search_projects_usecase.attribute_names(root)
+        except Exception as e:
+            print(f"[SearchUi] 属性名の取得エラー: {e}")
+            return
+        if not names:
+            return
+        for name_combo, _ in self.condition_rows:
+            current = name_combo.currentText()
+            name_combo.clear()
+            name_combo.addItems(names)
+            name_combo.setEditText(current)
+
+    def _on_click_search(self):
+        root = self._root()
+        if not root:
+            return
+        conditions = [(name_combo.currentText().strip(), value_edit.text().strip())
+                      for name_combo, value_edit in self.condition_rows
+                      if name_combo.currentText().strip() and value_edit.text().strip()]
+        keyword = self.keyword_edit.text().strip() or None
+        if not conditions and not keyword:
+            QMessageBox.warning(self, "警告", "検索条件を入力してください")
+            return
+        try:
+            results = self.main_viewer.search_projects_usecase.exec(root, conditions, keyword,
+                                                                    rating_at_least=self.rating_check.isChecked())
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"検索に失敗しました：\n{e}")
+            return
+
+        self.result_tree.clear()
+        for result in results:
+            attributes = ", ".join(f"{name}: {value}" for name, value in result["attributes"].items())
+            item = QTreeWidgetItem([result["project_name"], " > ".join(result["path"]), attributes])
+            item.setData(0, Qt.UserRole, result)
+            self.result_tree.addTopLevelItem(item)
+        self.result_label.setText(f"検索結果： {len(results)} 件")
+
+    def _on_result_double_clicked(self, item, column):
+        result = item.data(0, Qt.UserRole)
+        if result:
+            self.main_viewer._load_project(result["project_path"])
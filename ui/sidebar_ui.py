@@ -2,7 +2,8 @@
 
 from PyQt5.QtCore import Qt, QDateTime
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QListWidget, QLabel, 
-                             QListWidgetItem, QInputDialog, QMessageBox, QMenu, QTreeWidget, QTreeWidgetItem)
+                             QListWidgetItem, QInputDialog, QMessageBox, QMenu, QTreeWidget, QTreeWidgetItem,
+                             QAbstractItemView)
 
 from geometry_manager.geometries_manager import GeometryManager
 
@@ -21,6 +22,8 @@ class SideBarUi(QWidget):
         self.tree_widget = QTreeWidget()
         self.tree_widget.setHeaderHidden(True)  # ヘッダーを非表示
         self.tree_widget.setExpandsOnDoubleClick(True)  # ダブルクリックで展開
+        # Ctrl / Shift で複数選択（属性の一括編集用）
+        self.tree_widget.setSelectionMode(QAbstractItemView.ExtendedSelection)
         
         # 右クリックメニューを有効にする
         self.tree_widget.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -34,6 +37,7 @@ class SideBarUi(QWidget):
 
         self.tree_widget.itemChanged.connect(self._on_item_check_changed)
         self.tree_widget.itemClicked.connect(self._on_item_clicked)
+        self.tree_widget.itemSelectionChanged.connect(self._sync_selection)
 
     def enable_project_mode(self):
         """プロジェクトモードを有効にする"""
@@ -96,6 +100,14 @@ class SideBarUi(QWidget):
                 # 通常のアイテムまたはデータが選択されている場合
                 print("通常のアイテムが選択されています")  # デバッグ用
         
+        # 選択中の配置モデル（フォルダを選択している場合はその配下のすべての配置モデル）の属性を一括編集
+        bulk_targets = self._selected_model_paths(clicked_item)
+        if bulk_targets:
+            bulk_edit_action = menu.addAction(f"属性を一括編集（{len(bulk_targets)} 件）")
+            bulk_edit_action.triggered.connect(
+                lambda: self.main_viewer.attribute_ui.bulk_edit_placed_models(bulk_targets)
+            )
+        
         # 常に第1階層作成オプションを表示
         add_first_level_action = menu.addAction("第1階層作成")
         add_first_level_action.triggered.connect(self._on_add_first_level_clicked)
@@ -104,6 +116,23 @@ class SideBarUi(QWidget):
         # メニューを表示
         menu.exec_(self.tree_widget.mapToGlobal(position))
     
+    def _selected_model_paths(self, clicked_item=None) -> list:
+        """選択中のアイテムに含まれる配置モデルのパス（重複なし・選択順）"""
+        if not self.main_viewer:
+            return []
+        items = self.tree_widget.selectedItems()
+        if clicked_item is not None and clicked_item not in items:
+            items = [clicked_item]
+        project_model = self.main_viewer.project_model
+        paths = {}
+        for item in items:
+            item_data = item.data(0, Qt.UserRole) or {}
+            if item_data.get("type") not in ("folder", "placed_model") or not item_data.get("path"):
+                continue
+            for path, _ in project_model.iter_models(item_data["path"]):
+                paths.setdefault(path, None)
+        return list(paths)
+
     def _on_add_model_to_third_level_clicked(self, first_level_parent: str, second_level_parent: str, third_level_folder: str):
         """第3階層フォルダにモデル配置メニューがクリックされた時の処理"""
         print(f"モデル配置が選択されました。第1階層: {first_level_parent}, 第2階層: {second_level_parent}, 第3階層: {third_level_folder}")  # デバッグ用
@@ -113,7 +142,8 @@ class SideBarUi(QWidget):
             return
         
         # 現在読み込まれているモデルの一覧を取得
-        available_models = [item for item in self.manager.items if item.geometry_type in ["model", "textured_model"]]
+        # 部材セグメンテーションで作った点群も配置できる
+        available_models = [item for item in self.manager.items if item.geometry_type in ["model", "textured_model", "pointcloud"]]
         
         if not available_models:
             QMessageBox.information(self, "情報", "配置可能なモデルがありません。\nまずモデルを読み込んでください。")
@@ -150,24 +180,10 @@ class SideBarUi(QWidget):
         if not self.main_viewer:
             return
         
-        project_attributes = self.main_viewer.project_attributes
-        folders = project_attributes.get("folders", {})
-        
-        # 階層構造の存在確認
-        if first_level_parent not in folders:
-            raise Exception(f"第1階層フォルダ '{first_level_parent}' が見つかりません")
-        
-        second_level_folders = folders[first_level_parent].get("second_level_folders", {})
-        if second_level_parent not in second_level_folders:
-            raise Exception(f"第2階層フォルダ '{second_level_parent}' が見つかりません")
-        
-        third_level_folders = second_level_folders[second_level_parent].get("third_level_folders", {})
-        if third_level_folder not in third_level_folders:
-            raise Exception(f"第3階層フォルダ '{third_level_folder}' が見つかりません")
-        
-        # 配置モデル情報を追加
-        if "models" not in third_level_folders[third_level_folder]:
-            third_level_folders[third_level_folder]["models"] = {}
+        project_model = self.main_viewer.project_model
+        folder_path = (first_level_parent, second_level_parent, third_level_folder)
+        if not project_model.contains(folder_path):
+            raise Exception(f"第3階層フォルダ '{' > '.join(folder_path)}' が見つかりません")
         
         # モデルの基本情報を取得
         model_item = next((item for item in self.manager.items if item.name == model_name), None)
@@ -178,7 +194,7 @@ class SideBarUi(QWidget):
         model_path = getattr(model_item, 'file_path', None) or "unknown_path"
         
         # 配置モデル情報を保存
-        third_level_folders[third_level_folder]["models"][model_name] = {
+        project_model.add(folder_path + (model_name,), {
             "type": "placed_model",
             "original_name": model_name,
             "geometry_type": model_item.geometry_type,
@@ -186,7 +202,7 @@ class SideBarUi(QWidget):
             "placed_date": QDateTime.currentDateTime().toString("yyyy-MM-dd hh:mm:ss"),
             "visible": True,  # ★ 追加: 初期状態では表示
             "attributes": {}  # モデル固有の属性情報
-        }
+        })
         
         # ★ 修正: 元のモデルを非表示にする（第3階層に移動したため）
         self.manager.set_visibility(model_name, False)
@@ -310,53 +326,25 @@ class SideBarUi(QWidget):
         """第3階層フォルダ名の重複をチェック"""
         if not self.main_viewer:
             return False
-        
-        project_attributes = self.main_viewer.project_attributes
-        folders = project_attributes.get("folders", {})
-        
-        # 第1階層フォルダが存在するかチェック
-        if first_level_parent not in folders:
-            return False
-        
-        # 第2階層フォルダが存在するかチェック
-        second_level_folders = folders[first_level_parent].get("second_level_folders", {})
-        if second_level_parent not in second_level_folders:
-            return False
-        
-        # 第2階層フォルダ内の第3階層フォルダをチェック
-        third_level_folders = second_level_folders[second_level_parent].get("third_level_folders", {})
-        return folder_name in third_level_folders
+        return self.main_viewer.project_model.contains((first_level_parent, second_level_parent, folder_name))
 
     def _add_third_level_folder_to_project(self, first_level_parent: str, second_level_parent: str, folder_name: str):
         """プロジェクト属性に第3階層フォルダを追加"""
         if not self.main_viewer:
             return
         
-        # プロジェクト属性にfoldersキーがない場合は作成
-        if "folders" not in self.main_viewer.project_attributes:
-            self.main_viewer.project_attributes["folders"] = {}
-        
-        # 第1階層フォルダが存在しない場合はエラー
-        if first_level_parent not in self.main_viewer.project_attributes["folders"]:
-            raise Exception(f"第1階層フォルダ '{first_level_parent}' が見つかりません")
-        
-        # 第2階層フォルダが存在しない場合はエラー
-        second_level_folders = self.main_viewer.project_attributes["folders"][first_level_parent].get("second_level_folders", {})
-        if second_level_parent not in second_level_folders:
+        project_model = self.main_viewer.project_model
+        if not project_model.contains((first_level_parent, second_level_parent)):
             raise Exception(f"第2階層フォルダ '{second_level_parent}' が見つかりません")
         
-        # 第2階層フォルダに第3階層フォルダ用のキーがない場合は作成
-        if "third_level_folders" not in second_level_folders[second_level_parent]:
-            second_level_folders[second_level_parent]["third_level_folders"] = {}
-        
         # 新しい第3階層フォルダを追加
-        second_level_folders[second_level_parent]["third_level_folders"][folder_name] = {
+        project_model.add((first_level_parent, second_level_parent, folder_name), {
             "type": "third_level",
             "first_level_parent": first_level_parent,
             "second_level_parent": second_level_parent,
             "created_date": QDateTime.currentDateTime().toString("yyyy-MM-dd hh:mm:ss"),
             "objects": {}  # このフォルダに属するオブジェクト
-        }
+        })
         
         # プロジェクト属性を保存
         self.main_viewer._save_project_attributes()
@@ -365,42 +353,24 @@ class SideBarUi(QWidget):
         """第2階層フォルダ名の重複をチェック"""
         if not self.main_viewer:
             return False
-        
-        project_attributes = self.main_viewer.project_attributes
-        folders = project_attributes.get("folders", {})
-        
-        # 親フォルダが存在するかチェック
-        if parent_folder_name not in folders:
-            return False
-        
-        # 親フォルダ内の第2階層フォルダをチェック
-        second_level_folders = folders[parent_folder_name].get("second_level_folders", {})
-        return folder_name in second_level_folders
+        return self.main_viewer.project_model.contains((parent_folder_name, folder_name))
 
     def _add_second_level_folder_to_project(self, parent_folder_name: str, folder_name: str):
         """プロジェクト属性に第2階層フォルダを追加"""
         if not self.main_viewer:
             return
         
-        # プロジェクト属性にfoldersキーがない場合は作成
-        if "folders" not in self.main_viewer.project_attributes:
-            self.main_viewer.project_attributes["folders"] = {}
-        
-        # 親フォルダが存在しない場合はエラー
-        if parent_folder_name not in self.main_viewer.project_attributes["folders"]:
+        project_model = self.main_viewer.project_model
+        if not project_model.contains((parent_folder_name,)):
             raise Exception(f"親フォルダ '{parent_folder_name}' が見つかりません")
         
-        # 親フォルダに第2階層フォルダ用のキーがない場合は作成
-        if "second_level_folders" not in self.main_viewer.project_attributes["folders"][parent_folder_name]:
-            self.main_viewer.project_attributes["folders"][parent_folder_name]["second_level_folders"] = {}
-        
         # 新しい第2階層フォルダを追加
-        self.main_viewer.project_attributes["folders"][parent_folder_name]["second_level_folders"][folder_name] = {
+        project_model.add((parent_folder_name, folder_name), {
             "type": "second_level",
             "parent": parent_folder_name,
             "created_date": QDateTime.currentDateTime().toString("yyyy-MM-dd hh:mm:ss"),
             "objects": {}  # このフォルダに属するオブジェクト
-        }
+        })
         
         # プロジェクト属性を保存
         self.main_viewer._save_project_attributes()
@@ -409,26 +379,19 @@ class SideBarUi(QWidget):
         """フォルダ名の重複をチェック"""
         if not self.main_viewer:
             return False
-        
-        project_attributes = self.main_viewer.project_attributes
-        folders = project_attributes.get("folders", {})
-        return folder_name in folders
+        return self.main_viewer.project_model.contains((folder_name,))
 
     def _add_folder_to_project(self, folder_name: str):
         """プロジェクト属性にフォルダを追加"""
         if not self.main_viewer:
             return
         
-        # プロジェクト属性にfoldersキーがない場合は作成
-        if "folders" not in self.main_viewer.project_attributes:
-            self.main_viewer.project_attributes["folders"] = {}
-        
         # 新しいフォルダを追加
-        self.main_viewer.project_attributes["folders"][folder_name] = {
+        self.main_viewer.project_model.add((folder_name,), {
             "type": "first_level",
             "created_date": QDateTime.currentDateTime().toString("yyyy-MM-dd hh:mm:ss"),
             "objects": {}  # このフォルダに属するオブジェクト
-        }
+        })
         
         # プロジェクト属性を保存
         self.main_viewer._save_project_attributes()
@@ -470,96 +433,80 @@ class SideBarUi(QWidget):
             print("main_viewerが設定されていません")
             return
         
-        project_attributes = self.main_viewer.project_attributes
-        print(f"プロジェクト属性: {project_attributes}")  # デバッグ用
-        
-        folders = project_attributes.get("folders", {})
-        print(f"フォルダ数: {len(folders)}")  # デバッグ用
+        project_model = self.main_viewer.project_model
         
         # 第1階層フォルダを表示
-        for folder_name, folder_data in folders.items():
-            print(f"フォルダ処理中: {folder_name}, データ: {folder_data}")  # デバッグ用
+        for first_node in project_model.children():
+            if first_node.data.get("type") != "first_level":
+                continue
+            folder_name = first_node.name
             
-            if folder_data.get("type") == "first_level":
-                print(f"第1階層フォルダを追加: {folder_name}")  # デバッグ用
-                
-                # 第1階層アイテムを作成
-                first_level_item = QTreeWidgetItem([f"📁 {folder_name}"])
-                first_level_item.setCheckState(0, Qt.Checked)
-                first_level_item.setData(0, Qt.UserRole, {"type": "folder", "name": folder_name, "level": 1})
-                self.tree_widget.addTopLevelItem(first_level_item)
+            # 第1階層アイテムを作成
+            first_level_item = QTreeWidgetItem([f"📁 {folder_name}"])
+            first_level_item.setCheckState(0, Qt.Checked)
+            first_level_item.setData(0, Qt.UserRole, {"type": "folder", "name": folder_name, "level": 1,
+                                                      "path": list(first_node.path)})
+            self.tree_widget.addTopLevelItem(first_level_item)
+            
+            # 第2階層フォルダを追加
+            for second_node in project_model.children(first_node.path):
+                second_folder_name = second_node.name
                 
-                # 第2階層フォルダを追加
-                second_level_folders = folder_data.get("second_level_folders", {})
-                print(f"第2階層フォルダ数: {len(second_level_folders)}")  # デバッグ用
+                # 第2階層アイテムを作成
+                second_level_item = QTreeWidgetItem([f"📂 {second_folder_name}"])
+                second_level_item.setCheckState(0, Qt.Checked)
+                second_level_item.setData(0, Qt.UserRole, {
+                    "type": "folder", 
+                    "name": second_folder_name, 
+                    "level": 2,
+                    "parent": folder_name,
+                    "path": list(second_node.path)
+                })
+                first_level_item.addChild(second_level_item)
                 
-                for second_folder_name, second_folder_data in second_level_folders.items():
-                    print(f"第2階層フォルダを追加: {second_folder_name}")  # デバッグ用
+                # 第3階層フォルダを追加
+                for third_node in project_model.children(second_node.path):
+                    third_folder_name = third_node.name
                     
-                    # 第2階層アイテムを作成
-                    second_level_item = QTreeWidgetItem([f"📂 {second_folder_name}"])
-                    second_level_item.setCheckState(0, Qt.Checked)
-                    second_level_item.setData(0, Qt.UserRole, {
+                    # 第3階層アイテムを作成
+                    third_level_item = QTreeWidgetItem([f"📂 {third_folder_name}"])
+                    third_level_item.setCheckState(0, Qt.Checked)
+                    third_level_item.setData(0, Qt.UserRole, {
                         "type": "folder", 
-                        "name": second_folder_name, 
-                        "level": 2,
-                        "parent": folder_name
+                        "name": third_folder_name, 
+                        "level": 3,
+                        "first_level_parent": folder_name,
+                        "second_level_parent": second_folder_name,
+                        "path": list(third_node.path)
                     })
-                    first_level_item.addChild(second_level_item)
-                    
-                    # 第3階層フォルダを追加
-                    third_level_folders = second_folder_data.get("third_level_folders", {})
-                    print(f"第3階層フォルダ数: {len(third_level_folders)}")  # デバッグ用
+                    second_level_item.addChild(third_level_item)
                     
-                    for third_folder_name, third_folder_data in third_level_folders.items():
-                        print(f"第3階層フォルダを追加: {third_folder_name}")  # デバッグ用
+                    # 第3階層フォルダ内の配置モデルを表示（チェックボックス付き）
+                    for model_node in project_model.children(third_node.path):
+                        model_name = model_node.name
+                        model_data = model_node.data
                         
-                        # 第3階層アイテムを作成
-                        third_level_item = QTreeWidgetItem([f"📂 {third_folder_name}"])
-                        third_level_item.setCheckState(0, Qt.Checked)
-                        third_level_item.setData(0, Qt.UserRole, {
-                            "type": "folder", 
-                            "name": third_folder_name, 
-                            "level": 3,
+                        model_item = QTreeWidgetItem([f"📄 {model_name}"])
+                        # モデルの表示状態をチェックボックスに反映
+                        is_visible = model_data.get("visible", True)
+                        model_item.setCheckState(0, Qt.Checked if is_visible else Qt.Unchecked)
+                        model_item.setData(0, Qt.UserRole, {
+                            "type": "placed_model",
+                            "name": model_name,
+                            "original_name": model_data.get("original_name", model_name),
                             "first_level_parent": folder_name,
-                            "second_level_parent": second_folder_name
+                            "second_level_parent": second_folder_name,
+                            "third_level_parent": third_folder_name,
+                            "path": list(model_node.path)
                         })
-                        second_level_item.addChild(third_level_item)
-                        
-                        # 第3階層フォルダ内の配置モデルを表示（チェックボックス付き）
-                        models = third_folder_data.get("models", {})
-                        for model_name, model_data in models.items():
-                            print(f"配置モデルを追加: {model_name}")  # デバッグ用
-                            
-                            model_item = QTreeWidgetItem([f"📄 {model_name}"])
-                            # モデルの表示状態をチェックボックスに反映
-                            is_visible = model_data.get("visible", True)
-                            model_item.setCheckState(0, Qt.Checked if is_visible else Qt.Unchecked)
-                            model_item.setData(0, Qt.UserRole, {
-                                "type": "placed_model",
-                                "name": model_name,
-                                "original_name": model_data.get("original_name", model_name),
-                                "first_level_parent": folder_name,
-                                "second_level_parent": second_folder_name,
-                                "third_level_parent": third_folder_name
-                            })
-                            third_level_item.addChild(model_item)
-                
-                # ★ 削除: デフォルト展開は _restore_expand_states で処理
-                # first_level_item.setExpanded(True)
+                        third_level_item.addChild(model_item)
         
         # 通常のデータアイテムも表示
         data_items_count = len(self.manager.items)
         print(f"データアイテム数: {data_items_count}")  # デバッグ用
         
         # 配置済みモデルの名前を収集
-        placed_model_names = set()
-        for folder_data in folders.values():
-            if folder_data.get("type") == "first_level":
-                for second_folder_data in folder_data.get("second_level_folders", {}).values():
-                    for third_folder_data in second_folder_data.get("third_level_folders", {}).values():
-                        for model_name in third_folder_data.get("models", {}).keys():
-                            placed_model_names.add(model_name)
+        placed_model_names = {path[-1] for path, _ in project_model.iter_models()}
         
         for item in self.manager.items:
             # 配置済みモデルは通常リストに表示しない
@@ -640,15 +587,15 @@ class SideBarUi(QWidget):
                     
                     print(f"[SideBar] フォルダ選択: {folder_name}, レベル: {level}, 親: {parent}")  # デバッグ用
                     
-                    # 修正: フォルダ選択時は全オブジェクトの選択を解除
-                    self._clear_all_selections()
+                    # 修正: フォルダ選択時は（他に選択中のデータがなければ）オブジェクトの選択を解除
+                    self._sync_selection()
                     
                     if level == 1:
                         print(f"[SideBar] 📁 第1階層フォルダ選択: {folder_name}")
                         # attribute_uiに第1階層フォルダの属性情報を表示
                         if hasattr(self.main_viewer, 'attribute_ui'):
                             print(f"[SideBar] attribute_uiに属性表示を要求")
-                            self.main_viewer.attribute_ui.show_folder_attributes(folder_name, level)
+                            self.main_viewer.attribute_ui.show_folder_attributes(folder_name, level, path=item_data.get("path"))
                         else:
                             print(f"[SideBar] エラー: attribute_uiが見つかりません")
                     elif level == 2:
@@ -656,7 +603,7 @@ class SideBarUi(QWidget):
                         # attribute_uiに第2階層フォルダの属性情報を表示
                         if hasattr(self.main_viewer, 'attribute_ui'):
                             print(f"[SideBar] attribute_uiに第2階層属性表示を要求")
-                            self.main_viewer.attribute_ui.show_folder_attributes(folder_name, level, parent)
+                            self.main_viewer.attribute_ui.show_folder_attributes(folder_name, level, parent, item_data.get("path"))
                         else:
                             print(f"[SideBar] エラー: attribute_uiが見つかりません")
                     elif level == 3:
@@ -674,7 +621,7 @@ class SideBarUi(QWidget):
                 elif item_type == "data":
                     name = item_data["name"]
                     print(f"[SideBar] 🎯 データ選択: {name}")
-                    self.manager.select(name)
+                    self._sync_selection()
                     # データ選択時は属性表示をクリア
                     if hasattr(self.main_viewer, 'attribute_ui'):
                         self.main_viewer.attribute_ui.hide_attributes()
@@ -686,7 +633,7 @@ class SideBarUi(QWidget):
                     print(f"[SideBar] 🎯 配置モデル選択: {model_name} (元: {original_name})")
                     
                     # 修正: 元のモデル名で選択（バウンディングボックス表示のため）
-                    self.manager.select(original_name)
+                    self._sync_selection()
                     
                     # ★ 修正: 配置モデルの属性表示機能を呼び出し
                     if hasattr(self.main_viewer, 'attribute_ui'):
@@ -705,7 +652,26 @@ class SideBarUi(QWidget):
             # 通常モードの場合（従来通り）
             name = tree_item.text(0)
             print(f"[SideBar] 🎯 通常モード選択: {name}")
-            self.manager.select(name)
+            self._sync_selection()
+
+    def _selected_geometry_names(self) -> list:
+        """ツリーで選択中の行に対応するアイテム名（配置モデルは元のモデル名、フォルダは含めない）"""
+        project_mode = bool(self.main_viewer and self.main_viewer.current_project_name and self.is_project_mode)
+        names = []
+        for tree_item in self.tree_widget.selectedItems():
+            if not project_mode:
+                names.append(tree_item.text(0))
+                continue
+            item_data = tree_item.data(0, Qt.UserRole) or {}
+            if item_data.get("type") == "data":
+                names.append(item_data["name"])
+            elif item_data.get("type") == "placed_model":
+                names.append(item_data.get("original_name", item_data["name"]))
+        return names
+
+    def _sync_selection(self):
+        """ツリーの選択（Ctrl / Shift の複数選択を含む）をそのまま GeometryManager の選択にする"""
+        self.manager.select_many(self._selected_geometry_names())
 
     def _clear_all_selections(self):
         """すべてのオブジェクトの選択を解除"""
@@ -723,21 +689,12 @@ class SideBarUi(QWidget):
             return
         
         try:
-            project_attributes = self.main_viewer.project_attributes
-            folders = project_attributes.get("folders", {})
-            
-            # 階層構造をたどって配置モデルの属性を更新
-            if first_level_parent in folders:
-                second_level_folders = folders[first_level_parent].get("second_level_folders", {})
-                if second_level_parent in second_level_folders:
-                    third_level_folders = second_level_folders[second_level_parent].get("third_level_folders", {})
-                    if third_level_parent in third_level_folders:
-                        models = third_level_folders[third_level_parent].get("models", {})
-                        if model_name in models:
-                            models[model_name]["visible"] = visible
-                            # プロジェクト属性を保存
-                            self.main_viewer._save_project_attributes()
-                            print(f"配置モデル {model_name} の表示状態を更新: {visible}")
+            project_model = self.main_viewer.project_model
+            path = (first_level_parent, second_level_parent, third_level_parent, model_name)
+            if project_model.contains(path):
+                # 表示状態の切り替えは頻繁なので、変更だけをジャーナルに追記する
+                self.main_viewer._record_project_change(project_model.key_path(path, "visible"), visible)
+                print(f"配置モデル {model_name} の表示状態を更新: {visible}")
         except Exception as e:
             print(f"配置モデルの表示状態更新エラー: {e}")
         
@@ -0,0 +1,59 @@
+# usecase/analysis/compute_deviation_usecase.py
+
+import time
+
+import numpy as np
+
+from utils.deviation import signed_distances, symmetric_clim
+from utils.fit_metrics import get_raycasting_scene
+from geometry_manager.geometries_manager import GeometryManager, GeometryItem
+
+class ComputeDeviationUsecase():
+    """
+    点群の各点について、配置モデルからの符号付き距離（偏差）を求めて点群アイテムにキャッシュする。
+    結果は item.cache["deviation"] に {"values", "clim", "models", "key"} として保持し、
+    geometry_manager.scalars_changed で表示の更新を通知する。
+    """
+
+    def __init__(self, geometry_manager: GeometryManager):
+        self.geometry_manager = geometry_manager
+
+    def exec(self, cloud_item: GeometryItem, model_items: list = None, clim: list = None,
+             chunk_size: int = 1_000_000) -> np.ndarray:
+        if cloud_item.geometry_type != "pointcloud":
+            raise ValueError(f"偏差は点群に対してのみ計算できます: {cloud_item.name}")
+        if model_items is None:
+            model_items = [item for item in self.geometry_manager.get_visible_items()
+                           if item.geometry_type in ("model", "textured_model")]
+        if not model_items:
+            raise ValueError("偏差の基準となるモデルが表示されていません")
+
+        # 同じモデル（同じデータ・変形なし）に対する結果が残っていれば使い回す
+        key = tuple((item.name, id(item.data), item.version) for item in model_items)
+        cached = cloud_item.cache.get("deviation")
+        if cached is not None and cached["key"] == key:
+            if clim is not None:
+                cached["clim"] = list(clim)
+                self.geometry_manager.scalars_changed.emit(cloud_item.name)
+            return cached["values"]
+
+        t = time.perf_counter()
+        points = np.asarray(cloud_item.data.points)
+        scenes = [get_raycasting_scene(item) for item in model_items]
+        values = signed_distances(scenes, points, chunk_size)
+        cloud_item.cache["deviation"] = {
+            "values": values,
+            "clim": list(clim) if clim is not None else symmetric_clim(values),
+            "models": [item.name for item in model_items],
+            "key": key,
+        }
+        print(f"[Deviation] {cloud_item.name}: {len(points)} 点, モデル {len(model_items)} 個, "
+              f"{time.perf_counter() - t:.2f}s")
+
+        self.geometry_manager.scalars_changed.emit(cloud_item.name)
+        return values
+
+    def clear(self, cloud_item: GeometryItem):
+        """偏差表示をやめて元の色に戻す"""
+        if cloud_item.cache.pop("deviation", None) is not None:
+            self.geometry_manager.scalars_changed.emit(cloud_item.name)
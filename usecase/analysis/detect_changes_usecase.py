@@ -0,0 +1,125 @@
+# usecase/analysis/detect_changes_usecase.py
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from utils.batch_fitting import share_points
+from utils.change_detection import detect_chunk, init_change_worker, sort_by_tile, summarize_by_member
+from utils.deviation import symmetric_clim
+from utils.fit_metrics import get_raycasting_scene
+from utils.gicp import run_multiscale_gicp
+from utils.registration_target import get_registration_target
+from geometry_manager.geometries_manager import GeometryManager, GeometryItem
+
+class DetectChangesUsecase():
+    """
+    定期点検の2時期の点群（基準・比較）を位置合わせし、比較点群の点ごとの変化量を求める。
+    点群は水平タイルに分けてプロセスプールで並列に処理し、各タスクは1タイルと周囲の点だけを扱うのでメモリ使用量はタイルの大きさで決まる。
+    結果は比較点群の item.cache["change"] に {"values", "clim", "method", "reference", "summary"} として保持し、
+    geometry_manager.scalars_changed で表示の更新を通知する。
+    """
+
+    def __init__(self, geometry_manager: GeometryManager):
+        self.geometry_manager = geometry_manager
+
+    def exec(self, reference_item: GeometryItem, compared_item: GeometryItem, method: str = "m3c2",
+             register: bool = True, registration_voxel: float = 0.05, registration_threshold: float = 0.05,
+             max_distance: float = 0.5, cylinder_radius: float = 0.1, normal_radius: float = 0.2,
+             neighbors: int = 30, tile_size: float = 10.0, batch_size: int = 200_000,
+             change_threshold: float = 0.01, member_margin: float = 0.5, model_items: list = None,
+             max_workers: int = None, progress_callback=None) -> np.ndarray:
+        """
+        method は "c2c"（最近傍距離）か "m3c2"（基準点群の法線方向の符号付き距離）。
+        register=True なら比較点群を基準点群にGICPで位置合わせしてから比較する（比較点群を変換する）。
+        model_items（省略時は表示中のモデル）ごとに、表面から member_margin 以内の点の変化量を集計する。
+        progress_callback(完了タイル数, 総タイル数) が False を返した場合は中止して None を返す。
+        """
+        for item in (reference_item, compared_item):
+            if item.geometry_type != "pointcloud":
+                raise ValueError(f"変化検出は点群に対してのみ行えます: {item.name}")
+        if method not in ("c2c", "m3c2"):
+            raise ValueError(f"未対応の変化検出の方法です: {method}")
+        t = time.perf_counter()
+
+        if register:
+            source = compared_item.data.voxel_down_sample(registration_voxel)
+            target = get_registration_target(reference_item, self.geometry_manager.registration_cache_dir)
+            T = run_multiscale_gicp(source, target, threshold=registration_threshold)
+            if not np.allclose(T, np.eye(4)):
+                self.geometry_manager.transform(compared_item.name, T)
+            print(f"[Change] {compared_item.name} → {reference_item.name} 位置合わせ {time.perf_counter() - t:.1f}s")
+
+        # 1タスクで周囲8タイルまで見るので、タイルは探索距離より大きくする
+        tile_size = max(tile_size, max_distance, cylinder_radius)
+        reference = np.asarray(reference_item.data.points)
+        compared = np.asarray(compared_item.data.points)
+        if len(reference) == 0 or len(compared) == 0:
+            raise ValueError("点のない点群は比較できません")
+        reference_order, reference_tiles = sort_by_tile(reference, tile_size)
+        compared_order, compared_tiles = sort_by_tile(compared, tile_size)
+        reference_shm = share_points(reference[reference_order])
+        compared_shm = share_points(compared[compared_order])
+
+        sorted_values = np.full(len(compared), np.nan, dtype=np.float32)
+        try:
+            # GUI（Qt）のスレッドを引き継がないよう spawn で起動する
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers or min(len(compared_tiles), os.cpu_count() or 1) or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_change_worker,
+                initargs=((reference_shm.name, reference.shape, reference_tiles),
+                          (compared_shm.name, compared.shape, compared_tiles), tile_size))
+            futures = [executor.submit(detect_chunk, key, start, end, method, max_distance, cylinder_radius,
+                                       normal_radius, neighbors, batch_size)
+                       for key, (start, end) in compared_tiles.items()]
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    start, values = future.result()
+                    sorted_values[start:start + len(values)] = values
+
+                    if progress_callback and progress_callback(done, len(futures)) is False:
+                        for pending in futures:
+                            pending.cancel()
+                        return None
+            finally:
+                executor.shutdown(wait=True)
+        finally:
+            for shm in (reference_shm, compared_shm):
+                shm.close()
+                shm.unlink()
+
+        values = np.empty_like(sorted_values)
+        values[compared_order] = sorted_values
+
+        if model_items is None:
+            model_items = [item for item in self.geometry_manager.get_visible_items()
+                           if item.geometry_type in ("model", "textured_model")]
+        summary = {}
+        if model_items:
+            scenes = [get_raycasting_scene(item) for item in model_items]
+            summary = summarize_by_member(compared, values, scenes, [item.name for item in model_items],
+                                          member_margin, change_threshold)
+
+        finite = values[np.isfinite(values)]
+        compared_item.cache["change"] = {
+            "values": values,
+            "clim": [0.0, (float(np.percentile(finite, 99)) if len(finite) else 0.0) or 1.0] if method == "c2c"
+                    else symmetric_clim(values),
+            "method": method,
+            "reference": reference_item.name,
+            "summary": summary,
+        }
+        print(f"[Change] {reference_item.name} → {compared_item.name} ({method}): {len(compared)} 点, "
+              f"{len(compared_tiles)} タイル, 対応なし {len(values) - len(finite)} 点, {time.perf_counter() - t:.1f}s")
+
+        self.geometry_manager.scalars_changed.emit(compared_item.name)
+        return values
+
+    def clear(self, cloud_item: GeometryItem):
+        """変化量の表示をやめて元の色に戻す"""
+        if cloud_item.cache.pop("change", None) is not None:
+            self.geometry_manager.scalars_changed.emit(cloud_item.name)
@@ -0,0 +1,53 @@
+# usecase/analysis/extract_sections_usecase.py
+
+import time
+
+import numpy as np
+
+from utils.parameter_estimation import member_frame
+from utils.sections import get_section_index
+from geometry_manager.geometries_manager import GeometryManager, GeometryItem
+
+class ExtractSectionsUsecase():
+    """
+    点群から軸に垂直な断面を切り出す。結果は item.cache["sections"] に
+    {"origin", "axis", "thickness", "sections": [{"station", "indices", "profile"}]} として保持し、
+    geometry_manager.sections_changed で表示の更新を通知する。
+    """
+
+    def __init__(self, geometry_manager: GeometryManager):
+        self.geometry_manager = geometry_manager
+
+    def exec(self, cloud_item: GeometryItem, interval: float = 1.0, thickness: float = 0.05,
+             origin=None, axis=None, stations=None) -> list:
+        """
+        origin / axis を省略すると、点群の水平面内の主方向（橋軸方向）を軸にする。
+        stations を省略すると、点群の範囲を interval 間隔で切る。
+        """
+        if cloud_item.geometry_type != "pointcloud":
+            raise ValueError(f"断面は点群に対してのみ抽出できます: {cloud_item.name}")
+        t = time.perf_counter()
+        if origin is None or axis is None:
+            frame_origin, R = member_frame(np.asarray(cloud_item.data.points))
+            origin = frame_origin if origin is None else origin
+            axis = R[0] if axis is None else axis
+
+        index = get_section_index(cloud_item, origin, axis)
+        if stations is None:
+            start, end = index.range
+            stations = np.arange(start + interval / 2, end, interval)
+        sections = index.sections(stations, thickness)
+
+        cloud_item.cache["sections"] = {
+            "origin": np.asarray(origin, dtype=np.float64),
+            "axis": index.axis,
+            "thickness": thickness,
+            "sections": sections,
+        }
+        print(f"[Sections] {cloud_item.name}: {len(sections)} 断面, {time.perf_counter() - t:.3f}s")
+        self.geometry_manager.sections_changed.emit(cloud_item.name)
+        return sections
+
+    def clear(self, cloud_item: GeometryItem):
+        if cloud_item.cache.pop("sections", None) is not None:
+            self.geometry_manager.sections_changed.emit(cloud_item.name)
@@ -0,0 +1,102 @@
+# usecase/analysis/segment_point_cloud_usecase.py
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from geometry_manager.geometries_manager import GeometryManager, GeometryItem
+from domain.repository.point_cloud_repository import IPointCloudRepository
+from utils.segmentation import group_by_tile, merge_across_tiles, segment_tile, voxelize
+
+class SegmentPointCloudUsecase():
+    """
+    橋梁の点群を部材候補（平面・円柱・その他の塊）に分け、それぞれを点群アイテムとして追加する。
+    ボクセル重心を水平タイルに分けてプロセスプールで並列に処理し、タイル境界で分断されたものは後でつなぐ。
+    """
+
+    def __init__(self, geometry_manager: GeometryManager, point_cloud_repository: IPointCloudRepository):
+        self.geometry_manager = geometry_manager
+        self.point_cloud_repository = point_cloud_repository
+
+    def exec(self, cloud_item: GeometryItem, voxel_size: float = 0.05, tile_size: float = 20.0,
+             min_points: int = 50, max_planes: int = 10, max_workers: int = None,
+             out_dir: str = None, progress_callback=None) -> list:
+        """
+        min_points はセグメントとみなす最小のボクセル数。out_dir を指定すると各セグメントをPLYで保存する。
+        progress_callback(完了タイル数, 総タイル数) が False を返した場合は残りを中止する。
+        戻り値は追加した GeometryItem のリスト。
+        """
+        t = time.perf_counter()
+        points = np.asarray(cloud_item.data.points)
+        if len(points) == 0:
+            return []
+        distance_threshold = voxel_size
+        eps = 2.0 * voxel_size
+
+        voxel_keys, centroids, inverse = voxelize(points, voxel_size)
+        tiles = [idx for idx in group_by_tile(centroids, tile_size) if len(idx) >= min_points]
+        voxel_tiles = np.full(len(centroids), -1, dtype=np.int64)
+        for tile_id, idx in enumerate(tiles):
+            voxel_tiles[idx] = tile_id
+
+        # タイルごとのセグメンテーション（結果はボクセルごとのセグメント番号）
+        voxel_labels = np.full(len(centroids), -1, dtype=np.int64)
+        segments = []
+        segment_centroids = []
+        executor = ProcessPoolExecutor(max_workers=max_workers or min(len(tiles), os.cpu_count() or 1) or 1,
+                                       mp_context=multiprocessing.get_context("spawn"))
+        futures = {executor.submit(segment_tile, centroids[idx], distance_threshold, eps, min_points, max_planes): tile_id
+                   for tile_id, idx in enumerate(tiles)}
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                tile_voxels = tiles[futures[future]]
+                for local_idx, kind, model in future.result():
+                    voxel_labels[tile_voxels[local_idx]] = len(segments)
+                    segments.append({"kind": kind, "model": model})
+                    segment_centroids.append(centroids[tile_voxels[local_idx]].mean(axis=0))
+
+                if progress_callback and progress_callback(done, len(tiles)) is False:
+                    for pending in futures:
+                        pending.cancel()
+                    return []
+        finally:
+            executor.shutdown(wait=True)
+
+        if not segments:
+            print(f"[Segment] {cloud_item.name}: 部材候補が見つかりませんでした")
+            return []
+        voxel_labels = merge_across_tiles(voxel_keys, voxel_labels, voxel_tiles, segments,
+                                          segment_centroids, distance_threshold)
+
+        # 元の点をボクセルのラベルでまとめて、セグメントごとの点群アイテムにする
+        point_labels = voxel_labels[inverse]
+        order = np.argsort(point_labels, kind="stable")
+        order = order[point_labels[order] >= 0]
+        labels, starts = np.unique(point_labels[order], return_index=True)
+        ends = np.r_[starts[1:], len(order)]
+
+        stem = os.path.splitext(cloud_item.name)[0]
+        existing = {item.name for item in self.geometry_manager.items}
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        items = []
+        for number, (label, start, end) in enumerate(zip(labels, starts, ends), start=1):
+            name = f"{stem}_{segments[label]['kind']}_{number:03d}"
+            while name in existing:
+                name += "_"
+            existing.add(name)
+            pcd = cloud_item.data.select_by_index(np.sort(order[start:end]).tolist())
+            file_path = None
+            if out_dir:
+                file_path = os.path.join(out_dir, f"{name}.ply")
+                self.point_cloud_repository.save(file_path, pcd)
+            items.append(GeometryItem(name, pcd, "pointcloud", file_path))
+
+        self.geometry_manager.add_items(items)
+        kinds = {kind: sum(segments[label]["kind"] == kind for label in labels) for kind in ("plane", "cylinder", "cluster")}
+        print(f"[Segment] {cloud_item.name}: {len(points)} 点 → {len(items)} セグメント {kinds}, "
+              f"{len(tiles)} タイル, {time.perf_counter() - t:.1f}s")
+        return items
@@ -0,0 +1,108 @@
+# usecase/io/build_octree_usecase.py
+
+import os
+import time
+
+import numpy as np
+
+from geometry_manager.geometries_manager import GeometryManager
+from domain.repository.point_cloud_repository import IPointCloudRepository
+from domain.repository.octree_repository import IOctreeRepository
+from utils.octree import build_subtree, build_upper_levels, cube_bounds, grid_cells, plan_chunks, to_records
+
+class BuildOctreeUsecase():
+    """
+    PLY/LASの点群をディスク上のオクツリー（ノードごとに1ファイル）に変換する。
+    入力は3回ストリーミングで読む（範囲 → 計数グリッド → チャンクへの振り分け）ため、
+    メモリに載るのは1チャンク（max_chunk_points 点）分だけ。
+    """
+
+    def __init__(self, geometry_manager: GeometryManager, point_cloud_repository: IPointCloudRepository,
+                 octree_repository: IOctreeRepository):
+        self.geometry_manager = geometry_manager
+        self.point_cloud_repository = point_cloud_repository
+        self.octree_repository = octree_repository
+
+    def exec(self, source_path: str, out_dir: str, progress_callback=None,
+             capacity: int = 100_000, max_chunk_points: int = 5_000_000,
+             grid_resolution: int = 128, max_depth: int = 20, chunk_size: int = 2_000_000):
+        def report(message):
+            print(f"[Octree] {message}")
+            if progress_callback:
+                progress_callback(message)
+
+        t = time.perf_counter()
+        os.makedirs(out_dir, exist_ok=True)
+
+        # 1. 範囲
+        report("範囲を計算中...")
+        mins = np.full(3, np.inf)
+        maxs = np.full(3, -np.inf)
+        point_count = 0
+        has_colors = False
+        for xyz, colors in self.point_cloud_repository.iter_chunks(source_path, chunk_size):
+            if len(xyz) == 0:
+                continue
+            mins = np.minimum(mins, xyz.min(axis=0))
+            maxs = np.maximum(maxs, xyz.max(axis=0))
+            point_count += len(xyz)
+            has_colors = has_colors or colors is not None
+        if point_count == 0:
+            raise ValueError(f"点が含まれていません: {source_path}")
+        offset, size = cube_bounds(mins, maxs)
+
+        # 2. 計数グリッド
+        report("点の分布を集計中...")
+        counts = np.zeros(grid_resolution ** 3, dtype=np.int64)
+        for xyz, _ in self.point_cloud_repository.iter_chunks(source_path, chunk_size):
+            counts += np.bincount(grid_cells(xyz, offset, size, grid_resolution), minlength=len(counts))
+        chunks, cell_to_chunk = plan_chunks(counts, grid_resolution, max_chunk_points)
+
+        # 3. チャンクへの振り分け
+        report(f"{len(chunks)} チャンクへ振り分け中...")
+        self.octree_repository.remove_chunks(out_dir)
+        for xyz, colors in self.point_cloud_repository.iter_chunks(source_path, chunk_size):
+            chunk_ids = cell_to_chunk[grid_cells(xyz, offset, size, grid_resolution)]
+            order = np.argsort(chunk_ids, kind="stable")
+            records = to_records(xyz[order], colors[order] if colors is not None else None, offset)
+            chunk_ids = chunk_ids[order]
+            starts = np.flatnonzero(np.r_[True, chunk_ids[1:] != chunk_ids[:-1]])
+            ends = np.r_[starts[1:], len(chunk_ids)]
+            for start, end in zip(starts, ends):
+                self.octree_repository.append_chunk(out_dir, int(chunk_ids[start]), records[start:end])
+
+        # 4. チャンクごとにサブツリーを構築
+        spacing = size / 256.0
+        save_node = lambda name, records: self.octree_repository.save_node(out_dir, name, records)
+        load_node = lambda name: self.octree_repository.load_node(out_dir, name)
+        nodes = {}
+        chunk_names = []
+        for chunk_id, (level, ijk, _) in enumerate(chunks):
+            report(f"チャンク {chunk_id + 1}/{len(chunks)} を構築中...")
+            records = self.octree_repository.load_chunk(out_dir, chunk_id)
+            subtree = build_subtree(records, level, ijk, offset, size, capacity, spacing, max_depth, save_node)
+            nodes.update(subtree)
+            chunk_names.append(next(iter(subtree)))
+
+        # 5. チャンクより上の階層
+        report("上位階層を構築中...")
+        build_upper_levels(nodes, chunk_names, offset, size, capacity, spacing, load_node, save_node)
+        self.octree_repository.remove_chunks(out_dir)
+
+        metadata = {
+            "version": 1,
+            "source": os.path.abspath(source_path),
+            "offset": offset.tolist(),
+            "size": size,
+            "tight_bounds": [*mins.tolist(), *maxs.tolist()],
+            "point_count": point_count,
+            "capacity": capacity,
+            "spacing": spacing,
+            "has_colors": has_colors,
+            "nodes": nodes,
+        }
+        self.octree_repository.save_metadata(out_dir, metadata)
+        report(f"{point_count} 点, {len(nodes)} ノードを {time.perf_counter() - t:.1f} 秒で作成しました")
+
+        return out_dir
+
@@ -1,11 +1,49 @@
 # usecase/io/load_model_usecase.py
 
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-from geometry_manager.geometries_manager import GeometryManager
+import open3d as o3d
+
+from geometry_manager.geometries_manager import GeometryManager, GeometryItem
 from domain.repository.model_repository import IModelRepository
 
+# MTLのテクスチャ指定（map_Kd など）のオプションと、取りうる値の個数（最小, 最大）
+MTL_MAP_OPTIONS = {
+    "-blendu": (1, 1), "-blendv": (1, 1), "-bm": (1, 1), "-boost": (1, 1), "-cc": (1, 1),
+    "-clamp": (1, 1), "-imfchan": (1, 1), "-texres": (1, 1), "-type": (1, 1),
+    "-mm": (2, 2), "-o": (1, 3), "-s": (1, 3), "-t": (1, 3),
+}
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def strip_mtl_map_options(statement: str) -> str:
+    """テクスチャ指定の引数から先頭のオプション（例：-s 1 1 1）を除き、残りをファイル名として返す（空白を含むパスもそのまま）"""
+    rest = statement.strip()
+    while rest.startswith("-"):
+        parts = rest.split(None, 1)
+        option_range = MTL_MAP_OPTIONS.get(parts[0])
+        if option_range is None or len(parts) == 1:
+            break
+        rest = parts[1]
+        min_count, max_count = option_range
+        for i in range(max_count):
+            parts = rest.split(None, 1)
+            # 省略可能な2つ目以降の値は数値のときだけ取る
+            if len(parts) < 2 or (i >= min_count and not _is_number(parts[0])):
+                break
+            rest = parts[1]
+    return rest.strip()
+
+
 class LoadModelUsecase():
     def __init__(self, geometry_manager: GeometryManager, model_repository: IModelRepository):
         self.geometry_manager = geometry_manager
@@ -13,134 +51,134 @@ class LoadModelUsecase():
 
     def exec(self, file_path: str):
         print(file_path)
+        name, data, geometry_type = self._read_model(file_path)
+        self.geometry_manager.add(name, data, geometry_type, file_path)
+
+    def exec_batch(self, entries, max_workers: int = None, progress_callback=None):
+        """
+        (名前, ファイルパス, 表示状態) のリストをワーカープールで並列に読み込み、
+        GeometryManagerへまとめて追加する（updatedの発火は1回だけ）。
+        progress_callback(完了数, 総数) が False を返した場合は残りを中止する。
+        戻り値は読み込みに失敗した (名前, ファイルパス, エラー) のリスト。
+        """
+        items = {}
+        failures = []
+        total = len(entries)
+        if total == 0:
+            return failures
+
+        executor = ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 1))
+        futures = {executor.submit(self._read_model, file_path): (index, name, file_path, visible)
+                   for index, (name, file_path, visible) in enumerate(entries)}
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                index, name, file_path, visible = futures[future]
+                try:
+                    _, data, geometry_type = future.result()
+                    item = GeometryItem(name, data, geometry_type, file_path)
+                    item.visible = visible
+                    items[index] = item
+                except Exception as e:
+                    failures.append((name, file_path, e))
+                    print(f"Failed to load model {name}: {e}")
+
+                if progress_callback and progress_callback(done, total) is False:
+                    for pending in futures:
+                        pending.cancel()
+                    break
+        finally:
+            executor.shutdown(wait=True)
+
+        # 入力順で追加し、シーンの再構築は最後の1回だけにする
+        self.geometry_manager.add_items([items[i] for i in sorted(items)])
+        return failures
+
+    def _read_model(self, file_path: str):
+        """モデルファイルを読み込み、(名前, データ, ジオメトリタイプ) を返す（GeometryManagerには追加しない）"""
         # ファイル拡張子を取得
         file_extension = Path(file_path).suffix.lower()
         
         if file_extension == '.obj':
-            self._load_obj_model(file_path)
-        else:
-            # 従来の処理
-            pcd = self.model_repository.load(file_path)
-            name = os.path.basename(file_path)
-            self.geometry_manager.add(name, pcd, "model", file_path)
+            return self._read_obj_model(file_path)
+        # 従来の処理
+        pcd = self.model_repository.load(file_path)
+        name = os.path.basename(file_path)
+        if not pcd.has_triangles() and pcd.has_vertices():
+            # 三角形のないPLY（配置された点群セグメントなど）は点群として扱う
+            cloud = o3d.geometry.PointCloud(pcd.vertices)
+            if pcd.has_vertex_colors():
+                cloud.colors = pcd.vertex_colors
+            return name, cloud, "pointcloud"
+        return name, pcd, "model"
     
-    def _load_obj_model(self, obj_file_path: str):
-        """OBJファイルとその関連テクスチャファイルを読み込む"""
+    def _read_obj_model(self, obj_file_path: str):
+        """OBJファイルを読み込み、MTLが参照するテクスチャのパスだけを記録する（デコードは初回表示時）"""
         obj_path = Path(obj_file_path)
-        obj_dir = obj_path.parent
         obj_name = obj_path.stem
         
-        # 関連ファイルを検索
-        related_files = self._find_related_files(obj_dir, obj_name)
+        # 関連ファイルを検索（MTLに記載されたものだけ）
+        related_files = self._find_related_files(obj_path)
         
         # OBJファイルを読み込み（メッシュデータを取得）
         mesh = self.model_repository.load_obj(obj_file_path)
         
-        # テクスチャファイルがある場合
-        if related_files['textures'] or related_files['mtl']:
-            # テクスチャを読み込み・適用
-            texture = self._load_texture(related_files)
+        if related_files['textures']:
+            # テクスチャ付きモデルとして追加（textureは表示時にバックグラウンドでデコードされる）
+            textured_data = {
+                'mesh': mesh,
+                'texture': None,
+                'texture_files': related_files['textures']
+            }
             
-            if texture is not None:
-                # テクスチャ付きモデルとして追加
-                textured_data = {
-                    'mesh': mesh,
-                    'texture': texture
-                }
-                self.geometry_manager.add(obj_name, textured_data, "textured_model", obj_file_path)
-                
-                # ログ出力
-                if isinstance(texture, dict):
-                    print(f"Loaded textured OBJ model with {len(texture)} textures: {obj_name}")
-                    for tex_name in texture.keys():
-                        print(f"  - {tex_name}")
-                else:
-                    print(f"Loaded textured OBJ model: {obj_name}")
-                
-                if related_files['mtl']:
-                    print(f"  - Material file: {os.path.basename(related_files['mtl'])}")
-            else:
-                # テクスチャの読み込みに失敗した場合は通常のモデルとして追加
-                self.geometry_manager.add(obj_name, mesh, "model", obj_file_path)
-                print(f"Loaded OBJ model (texture failed): {obj_name}")
-        else:
-            # テクスチャファイルがない場合は通常のモデルとして追加
-            self.geometry_manager.add(obj_name, mesh, "model", obj_file_path)
-            print(f"Loaded OBJ model: {obj_name}")
+            print(f"Loaded textured OBJ model with {len(related_files['textures'])} textures (deferred): {obj_name}")
+            for mtl_file in related_files['mtl']:
+                print(f"  - Material file: {os.path.basename(mtl_file)}")
+            for tex_file in related_files['textures']:
+                print(f"  - {os.path.basename(tex_file)}")
+            return obj_name, textured_data, "textured_model"
+
+        # テクスチャファイルがない場合は通常のモデルとして追加
+        print(f"Loaded OBJ model: {obj_name}")
+        return obj_name, mesh, "model"
     
-    def _find_related_files(self, obj_dir: Path, obj_name: str):
-        """OBJファイルに関連するファイルを検索"""
+    def _find_related_files(self, obj_path: Path):
+        """OBJファイルに関連するファイルを検索（mtllib → map_Kd の参照をたどるだけで、フォルダ内の画像は探さない）"""
         related_files = {
-            'mtl': None,
+            'mtl': [],
             'textures': []
         }
         
-        # MTLファイルを検索（同名のファイルを優先）
-        mtl_patterns = [
-            f"{obj_name}.mtl",
-            "*.mtl"
-        ]
-        
-        for pattern in mtl_patterns:
-            mtl_files = list(obj_dir.glob(pattern))
-            if mtl_files:
-                related_files['mtl'] = str(mtl_files[0])
-                break
+        # OBJ内の mtllib 指定を優先し、なければ同名のMTLファイルを使う
+        mtl_names = self._read_mtllib_names(obj_path)
+        if not mtl_names:
+            mtl_names = [f"{obj_path.stem}.mtl"]
         
-        # テクスチャファイルを検索
-        texture_extensions = ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tga', '*.tiff']
-        for ext in texture_extensions:
-            texture_files = list(obj_dir.glob(ext))
-            related_files['textures'].extend([str(f) for f in texture_files])
+        for mtl_name in mtl_names:
+            mtl_path = obj_path.parent / mtl_name
+            if mtl_path.exists():
+                related_files['mtl'].append(str(mtl_path))
+                for texture_path in self._parse_mtl_for_texture(str(mtl_path)) or []:
+                    if texture_path not in related_files['textures']:
+                        related_files['textures'].append(texture_path)
         
         return related_files
     
-    def _load_texture(self, related_files: dict):
-        """テクスチャファイルを読み込む（複数対応）"""
+    def _read_mtllib_names(self, obj_path: Path):
+        """OBJのヘッダ部（最初のジオメトリ行まで）から mtllib のファイル名を取得"""
+        mtl_names = []
         try:
-            texture_files = []
-            
-            # MTLファイルがある場合は、それを解析してテクスチャファイルを特定
-            if related_files['mtl']:
-                mtl_textures = self._parse_mtl_for_texture(related_files['mtl'])
-                if mtl_textures:
-                    texture_files.extend(mtl_textures)
-            
-            # MTLファイルで見つからなかった場合、またはMTLファイルがない場合は
-            # ディレクトリ内の全テクスチャファイルを追加
-            if not texture_files and related_files['textures']:
-                texture_files = related_files['textures']
-            
-            if not texture_files:
-                return None
-            
-            # 複数のテクスチャがある場合
-            if len(texture_files) > 1:
-                print(f"Found {len(texture_files)} texture files:")
-                for i, tex_file in enumerate(texture_files):
-                    print(f"  [{i}] {os.path.basename(tex_file)}")
-                
-                # 複数テクスチャの場合は辞書形式で返す
-                textures = {}
-                for i, tex_file in enumerate(texture_files):
-                    try:
-                        texture_name = f"texture_{i}" if i > 0 else "primary"
-                        textures[texture_name] = self.model_repository.load_texture(tex_file)
-                        print(f"  Loaded: {texture_name} from {os.path.basename(tex_file)}")
-                    except Exception as e:
-                        print(f"  Failed to load {os.path.basename(tex_file)}: {e}")
-                
-                return textures if textures else None
-            else:
-                # 単一テクスチャの場合
-                return self.model_repository.load_texture(texture_files[0])
-            
+            with open(obj_path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    if line.startswith(('v ', 'vt', 'vn', 'f ')):
+                        break
+                    if line.startswith('mtllib '):
+                        mtl_names.append(line.split(' ', 1)[1].strip())
         except Exception as e:
-            print(f"Warning: Failed to load texture: {e}")
-            return None
+            print(f"Warning: Failed to read mtllib from {obj_path}: {e}")
+        return mtl_names
     
     def _parse_mtl_for_texture(self, mtl_file_path: str):
-        """MTLファイルを解析してテクスチャファイルのパスリストを取得"""
+        """MTLファイルを解析して表示に使う拡散反射テクスチャ（map_Kd）のパスリストを取得"""
         try:
             mtl_dir = Path(mtl_file_path).parent
             texture_files = []
@@ -148,20 +186,15 @@ class LoadModelUsecase():
             with open(mtl_file_path, 'r') as f:
                 for line in f:
                     line = line.strip()
-                    # 各種テクスチャマップを探す
-                    texture_keywords = ['map_Kd', 'map_Ka', 'map_Ks', 'map_Bump', 'map_d', 'bump']
-                    
-                    for keyword in texture_keywords:
-                        if line.startswith(f'{keyword} '):
-                            texture_filename = line.split(' ', 1)[1].strip()
-                            # ファイル名から余分な引数を除去（例：-s 1 1 1）
-                            texture_filename = texture_filename.split()[0]
-                            texture_path = mtl_dir / texture_filename
-                            if texture_path.exists() and str(texture_path) not in texture_files:
-                                texture_files.append(str(texture_path))
-                                print(f"Found texture in MTL: {keyword} -> {texture_filename}")
+                    # map_Ka / map_Bump などは描画に使わないのでデコード対象にしない
+                    if line.startswith('map_Kd '):
+                        texture_filename = strip_mtl_map_options(line.split(' ', 1)[1])
+                        texture_path = mtl_dir / texture_filename
+                        if texture_path.exists() and str(texture_path) not in texture_files:
+                            texture_files.append(str(texture_path))
+                            print(f"Found texture in MTL: map_Kd -> {texture_filename}")
             
             return texture_files if texture_files else None
         except Exception as e:
             print(f"Warning: Failed to parse MTL file {mtl_file_path}: {e}")
-            return None
\ No newline at end of file
+            return None
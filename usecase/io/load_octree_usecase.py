@@ -0,0 +1,31 @@
+# usecase/io/load_octree_usecase.py
+
+import os
+
+from geometry_manager.geometries_manager import GeometryManager
+from domain.repository.octree_repository import IOctreeRepository
+from utils.octree import OctreeNodeCache
+
+class LoadOctreeUsecase():
+    """作成済みのオクツリーを開き、表示用のアイテムとして追加する（点は表示時にノード単位で読み込む）"""
+
+    def __init__(self, geometry_manager: GeometryManager, octree_repository: IOctreeRepository):
+        self.geometry_manager = geometry_manager
+        self.octree_repository = octree_repository
+
+    def exec(self, octree_dir: str, max_bytes: int = 1 << 30, point_budget: int = 3_000_000):
+        metadata = self.octree_repository.load_metadata(octree_dir)
+        cache = OctreeNodeCache(
+            lambda name: self.octree_repository.load_node(octree_dir, name),
+            metadata["offset"],
+            max_bytes
+        )
+        octree_data = {
+            'directory': octree_dir,
+            'metadata': metadata,
+            'cache': cache,
+            'point_budget': point_budget,
+            'visible_nodes': None,
+        }
+        name = os.path.basename(os.path.normpath(octree_dir))
+        self.geometry_manager.add(name, octree_data, "octree", octree_dir)
@@ -1,17 +1,96 @@
 # usecase/io/load_point_cloude_usecase.py
 
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
 
 from geometry_manager.geometries_manager import GeometryManager
 from domain.repository.point_cloud_repository import IPointCloudRepository
+from utils.preprocessing import run_stage, run_streaming_stages, split_streaming_stages, validate_pipeline
+
+class LoadPointCloudUsecase(QObject):
+    """
+    点群を読み込んで GeometryManager に追加する。
+    exec は呼び出し元のスレッドで最後まで処理する（コマンドライン用）。
+    start は読み込み・前処理をワーカースレッドで行い、経過を progress、完了を finished（各段の結果のリスト）、
+    失敗を failed で通知する（GUI用。呼び出し元のスレッドを待たせない）。
+    """
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    # ワーカースレッドからの完了通知（受け側は呼び出し元のスレッドで動く）
+    _done = pyqtSignal(str, str, object, object)
+    _error = pyqtSignal(str)
 
-class LoadPointCloudUsecase():
     def __init__(self, geometry_manager: GeometryManager, point_cloud_repository: IPointCloudRepository):
+        super().__init__()
         self.geometry_manager = geometry_manager
         self.point_cloud_repository = point_cloud_repository
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._done.connect(self._on_done)
+        self._error.connect(self.failed)
+
+    def exec(self, file_path: str, pipeline: list = None, progress_callback=None) -> list:
+        """
+        点群を読み込んで追加する。pipeline（utils.preprocessing の前処理リスト）があれば前処理を行い、
+        各段の終了時に progress_callback(メッセージ) で経過を通知する。
+        戻り値は各段の (種類, 処理前の点数, 処理後の点数, 秒) のリスト。
+        """
+        if pipeline:
+            validate_pipeline(pipeline)
+        pcd, stages = self._load(file_path, pipeline, progress_callback or (lambda message: None))
+        self.geometry_manager.add(os.path.basename(file_path), pcd, "pointcloud", file_path)
+        return stages
+
+    def start(self, file_path: str, pipeline: list = None):
+        """exec と同じ処理をワーカースレッドで始める（GeometryManager への追加は完了通知を受けたスレッドで行う）"""
+        if pipeline:
+            validate_pipeline(pipeline)
+        future = self.executor.submit(self._load, file_path, pipeline, self.progress.emit)
+
+        def on_done(future):
+            error = future.exception()
+            if error is not None:
+                self._error.emit(str(error))
+                return
+            pcd, stages = future.result()
+            self._done.emit(file_path, os.path.basename(file_path), pcd, stages)
+
+        future.add_done_callback(on_done)
 
-    def exec(self, file_path: str):
-        pcd =  self.point_cloud_repository.load(file_path)
-        name = os.path.basename(file_path)
+    def _on_done(self, file_path: str, name: str, pcd, stages: list):
         self.geometry_manager.add(name, pcd, "pointcloud", file_path)
-        
\ No newline at end of file
+        self.finished.emit(stages)
+
+    def _load(self, file_path: str, pipeline: list, notify):
+        if not pipeline:
+            return self.point_cloud_repository.load(file_path), []
+        return self._preprocess(file_path, pipeline, notify)
+
+    def _preprocess(self, file_path: str, pipeline: list, notify):
+        stages = []
+
+        def report(kind, count_in, count_out, seconds):
+            stages.append((kind, count_in, count_out, seconds))
+            reduction = (1 - count_out / count_in) * 100 if count_in else 0.0
+            message = f"{kind}: {count_in} → {count_out} 点 (-{reduction:.1f}%), {seconds:.2f}s"
+            print(f"[Preprocess] {message}")
+            notify(message)
+
+        streaming, rest = split_streaming_stages(pipeline)
+        if streaming:
+            # 読み込みながらチャンク単位で処理（点群全体をメモリに展開しない）
+            pcd = run_streaming_stages(self.point_cloud_repository.iter_chunks(file_path), streaming, report)
+        else:
+            t = time.perf_counter()
+            pcd = self.point_cloud_repository.load(file_path)
+            report("load", len(pcd.points), len(pcd.points), time.perf_counter() - t)
+
+        for stage in rest:
+            t = time.perf_counter()
+            count_in = len(pcd.points)
+            pcd = run_stage(pcd, stage)
+            report(stage["type"], count_in, len(pcd.points), time.perf_counter() - t)
+        return pcd, stages
@@ -0,0 +1,65 @@
+# usecase/io/load_texture_usecase.py
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from geometry_manager.geometries_manager import GeometryManager, GeometryItem
+from domain.repository.model_repository import IModelRepository
+
+class LoadTextureUsecase():
+    """テクスチャ付きモデルのテクスチャを、初回表示時にバックグラウンドでデコードする"""
+
+    def __init__(self, geometry_manager: GeometryManager, model_repository: IModelRepository, max_workers: int = None):
+        self.geometry_manager = geometry_manager
+        self.model_repository = model_repository
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1))
+        self._pending = {}
+
+    def exec(self, item: GeometryItem):
+        """未デコードのテクスチャがあればデコードを予約する（予約済み・デコード済みなら何もしない）"""
+        if item.geometry_type != 'textured_model':
+            return None
+        data = item.data
+        if data.get('texture') is not None or not data.get('texture_files'):
+            return None
+        if id(data) in self._pending:
+            return self._pending[id(data)]
+
+        future = self.executor.submit(self._decode, data['texture_files'])
+        self._pending[id(data)] = future
+        future.add_done_callback(lambda f: self._on_decoded(item, data, f))
+        return future
+
+    def _decode(self, texture_files):
+        """テクスチャファイルを読み込む（ワーカースレッドで実行）"""
+        textures = {}
+        for i, tex_file in enumerate(texture_files):
+            texture_name = f"texture_{i}" if i > 0 else "primary"
+            try:
+                textures[texture_name] = self.model_repository.load_texture(tex_file)
+                print(f"  Loaded: {texture_name} from {os.path.basename(tex_file)}")
+            except Exception as e:
+                print(f"  Failed to load {os.path.basename(tex_file)}: {e}")
+
+        if not textures:
+            return None
+        # 単一テクスチャの場合は従来通りテクスチャそのものを返す
+        if len(textures) == 1:
+            return textures['primary'] if 'primary' in textures else next(iter(textures.values()))
+        return textures
+
+    def _on_decoded(self, item: GeometryItem, data: dict, future):
+        self._pending.pop(id(data), None)
+        try:
+            texture = future.result()
+        except Exception as e:
+            print(f"Warning: Failed to load texture: {e}")
+            texture = None
+
+        if texture is None:
+            # 再要求でデコードを繰り返さないよう、参照を外しておく
+            data['texture_files'] = []
+            return
+        data['texture'] = texture
+        # ワーカースレッドから発火するが、受信側（GUIスレッドのQObject）ではキュー経由で処理される
+        self.geometry_manager.texture_loaded.emit(item.name)
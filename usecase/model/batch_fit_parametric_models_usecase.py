@@ -0,0 +1,79 @@
+# usecase/model/batch_fit_parametric_models_usecase.py
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from utils.batch_fitting import fit_member, init_worker, share_points
+from geometry_manager.geometries_manager import GeometryManager
+from domain.repository.model_repository import IModelRepository
+
+class BatchFitParametricModelsUsecase():
+    """
+    複数の部材（シード位置, プリミティブ種類, パラメータ）をプロセスプールで並列にフィッティングする。
+    対象点群の座標は共有メモリで1回だけ渡し、各ワーカーは初期化時に点群とKD木を作って全タスクで使い回す。
+    """
+
+    def __init__(self, geometry_manager: GeometryManager, model_repository: IModelRepository):
+        self.geometry_manager = geometry_manager
+        self.model_repository = model_repository
+
+    def exec(self, geometry, members, max_workers: int = None, progress_callback=None,
+             roi_margin: float = 0.5, multiscale: bool = True) -> list:
+        """
+        members は (シード位置, 種類, パラメータ) のリスト。
+        progress_callback(完了数, 総数) が False を返した場合は残りを中止する。
+        戻り値は入力順の結果のリストで、各要素は
+        {"seed_point", "kind", "params", "transform", "fitness", "rmse", "metrics", "model", "error"}。
+        """
+        t = time.perf_counter()
+        total = len(members)
+        results = [{"seed_point": seed_point, "kind": kind, "params": list(params),
+                    "transform": None, "fitness": None, "rmse": None, "metrics": None, "model": None, "error": None}
+                   for seed_point, kind, params in members]
+        if total == 0:
+            return results
+
+        points = np.asarray(geometry.data.points)
+        shm = share_points(points)
+        try:
+            # GUI（Qt）のスレッドを引き継がないよう spawn で起動する
+            executor = ProcessPoolExecutor(max_workers=max_workers or min(total, os.cpu_count() or 1),
+                                           mp_context=multiprocessing.get_context("spawn"),
+                                           initializer=init_worker, initargs=(shm.name, points.shape))
+            futures = {executor.submit(fit_member, index, np.asarray(seed_point, dtype=np.float64),
+                                       kind, tuple(float(p) for p in params), roi_margin, multiscale): index
+                       for index, (seed_point, kind, params) in enumerate(members)}
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    index = futures[future]
+                    try:
+                        results[index].update(future.result())
+                    except Exception as e:
+                        results[index]["error"] = e
+                        print(f"Failed to fit member {index} ({results[index]['kind']}): {e}")
+
+                    if progress_callback and progress_callback(done, total) is False:
+                        for pending in futures:
+                            pending.cancel()
+                        break
+            finally:
+                executor.shutdown(wait=True)
+        finally:
+            shm.close()
+            shm.unlink()
+
+        # 変換行列からメッシュを作る（プリミティブはキャッシュされているので生成は軽い）
+        for result in results:
+            if result["transform"] is None:
+                continue
+            model = self.model_repository.generate_parametric_model(result["kind"], result["params"])
+            model.transform(result["transform"])
+            result["model"] = model
+
+        fitted = sum(result["model"] is not None for result in results)
+        print(f"[BatchFit] {fitted}/{total} 部材を {time.perf_counter() - t:.1f} 秒でフィッティングしました")
+        return results
@@ -0,0 +1,22 @@
+# usecase/model/evaluate_fit_usecase.py
+
+import time
+
+from utils.fit_metrics import compute_fit_metrics, get_raycasting_scene
+from utils.registration_target import get_registration_target
+from geometry_manager.geometries_manager import GeometryManager, GeometryItem
+
+class EvaluateFitUsecase():
+    """モデルと点群の一致度（RMSE・インライア率・ハウスドルフ距離・被覆率）を求める"""
+
+    def __init__(self, geometry_manager: GeometryManager):
+        self.geometry_manager = geometry_manager
+
+    def exec(self, model_item: GeometryItem, cloud_item: GeometryItem, threshold: float = 0.05) -> dict:
+        t = time.perf_counter()
+        mesh = model_item.data["mesh"] if isinstance(model_item.data, dict) else model_item.data
+        target = get_registration_target(cloud_item, self.geometry_manager.registration_cache_dir)
+        metrics = compute_fit_metrics(mesh, target, threshold, scene=get_raycasting_scene(model_item))
+        model_item.cache["fit_metrics"] = metrics
+        print(f"[FitMetrics] {model_item.name}: {metrics} ({time.perf_counter() - t:.2f}s)")
+        return metrics
@@ -3,8 +3,9 @@
 import numpy as np
 import open3d as o3d
 
-from utils.align_by_obb import align_by_obb
-from utils.gicp import run_gicp
+from utils.parameter_estimation import estimate_parameters
+from utils.parametric_fitting import fit_parametric_model
+from utils.registration_target import get_registration_target
 from geometry_manager.geometries_manager import GeometryManager
 from domain.repository.model_repository import IModelRepository
 
@@ -13,16 +14,57 @@ class GenerateParametricModelUsecase():
         self.geometry_manager = geometry_manager
         self.model_repository = model_repository
     
-    def exec(self, geometry, dist_list) -> o3d.geometry.TriangleMesh:
+    def exec(self, geometry, dist_list, kind: str = None, multiscale: bool = True,
+             seed_point=None, roi: o3d.geometry.OrientedBoundingBox = None,
+             roi_margin: float = 0.5) -> o3d.geometry.TriangleMesh:
+        """
+        パラメトリックモデルを生成し、点群に位置合わせして返す。
+        seed_point（クリックした点）か roi（初期OBB）を渡すと、その周辺だけを切り出してから
+        OBB合わせとGICPを行う（roi_margin は切り出し範囲の拡大率）。
+        dist_list が None の場合は切り出した点群からパラメータを推定する（kind 省略時はT型橋脚）。
+        """
+        return self.fit(geometry, dist_list, kind, multiscale, seed_point, roi, roi_margin)["model"]
+
+    def fit(self, geometry, dist_list, kind: str = None, multiscale: bool = True,
+            seed_point=None, roi: o3d.geometry.OrientedBoundingBox = None, roi_margin: float = 0.5) -> dict:
+        """
+        exec と同じ処理で、{"model", "params", "transform", "fitness", "rmse", "metrics"} を返す。
+        metrics は点→メッシュ距離による一致度（utils.fit_metrics.compute_fit_metrics）。
+        """
+        if dist_list is None:
+            kind = kind or "tpillar"
+            dist_list = self.estimate_parameters(geometry, kind, seed_point, roi)
+        model = self.generate_model(dist_list, kind)
+
+        # 対象点群の法線・共分散はアイテムにキャッシュし、2回目以降のフィッティングで使い回す
+        target = get_registration_target(geometry, self.geometry_manager.registration_cache_dir)
+        result = fit_parametric_model(model, target, seed_point, roi, roi_margin, multiscale)
+        print(f"[Fit] fitness={result['fitness']:.3f}, rmse={result['rmse']:.4f}, metrics={result['metrics']}")
+
+        result.update({"model": model, "params": list(dist_list)})
+        return result
+
+    def generate_model(self, dist_list, kind: str = None) -> o3d.geometry.TriangleMesh:
+        """位置合わせ前のパラメトリックモデルを生成する"""
+        if kind is not None:
+            return self.model_repository.generate_parametric_model(kind, dist_list)
         if len(dist_list) == 6:
-            model = self.model_repository.Tpillar_generate_parametric_model(dist_list)
+            return self.model_repository.Tpillar_generate_parametric_model(dist_list)
+        raise ValueError(f"プリミティブの種類を指定してください（パラメータ数: {len(dist_list)}）")
 
-        model = align_by_obb(geometry.data, model)
-        
-        # メッシュを点群化してGICPで微調整
-        model_pcd = model.sample_points_uniformly(10000)
-        T = run_gicp(model_pcd, geometry.data)
-        model.transform(T)
+    def estimate_parameters(self, geometry, kind: str, seed_point=None,
+                            roi: o3d.geometry.OrientedBoundingBox = None, roi_radius: float = 3.0) -> list:
+        """
+        seed_point から roi_radius 以内（roi を渡した場合はその箱の内側）の点からパラメータを推定する。
+        """
+        if seed_point is None and roi is None:
+            raise ValueError("パラメータの推定にはクリックした点か範囲（OBB）が必要です")
+        target = get_registration_target(geometry, self.geometry_manager.registration_cache_dir)
+        if roi is not None:
+            cropped = target.crop(roi.center, np.linalg.norm(roi.extent) / 2, roi)
+        else:
+            cropped = target.crop(seed_point, roi_radius)
 
-        return model
-    
+        params, cost, _ = estimate_parameters(np.asarray(cropped.pcd.points), kind)
+        print(f"[Estimate] {kind}: {', '.join(f'{p:.3f}' for p in params)} (rms={np.sqrt(cost):.4f})")
+        return params
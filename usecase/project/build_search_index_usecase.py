@@ -0,0 +1,80 @@
+# usecase/project/build_search_index_usecase.py
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from domain.repository.search_index_repository import ISearchIndexRepository
+from utils.project_index import extract_project, find_projects, project_stamp
+
+class BuildSearchIndexUsecase():
+    """
+    root 以下のプロジェクトを探し、前回から変わったプロジェクトだけを並列に読み込んで検索用索引を更新する。
+    読み込み（JSON の解析）はプロセスプールで行い、索引への書き込みは batch_size プロジェクトごとにまとめる。
+    """
+
+    def __init__(self, search_index_repository: ISearchIndexRepository):
+        self.search_index_repository = search_index_repository
+
+    def exec(self, root: str, max_workers: int = None, batch_size: int = 50, inline_limit: int = 8,
+             progress_callback=None) -> dict:
+        """
+        戻り値は {"projects", "updated", "removed", "failures": [(パス, エラー), ...]}。
+        変わったプロジェクトが inline_limit 件以下ならプロセスを起動せずにこのスレッドで読む。
+        progress_callback(完了数, 総数) が False を返した場合は、それまでに読んだ分だけを書き込んで中止する。
+        """
+        t = time.perf_counter()
+        root = os.path.normpath(os.path.abspath(root))
+        projects = find_projects(root)
+        stamps = self.search_index_repository.stamps(root)
+        found = set(projects)
+        removed = [path for path in stamps if path not in found]
+        changed = [path for path in projects if stamps.get(path) != project_stamp(path)]
+
+        results, failures = [], []
+        updated = 0
+
+        def collect(done: int, result) -> bool:
+            nonlocal results, updated
+            if result is not None:
+                results.append(result)
+            if len(results) >= batch_size:
+                self.search_index_repository.update(root, results, [])
+                updated += len(results)
+                results = []
+            return not (progress_callback and progress_callback(done, len(changed)) is False)
+
+        if len(changed) <= inline_limit:
+            for done, path in enumerate(changed, start=1):
+                try:
+                    result = extract_project(path)
+                except Exception as e:
+                    failures.append((path, e))
+                    result = None
+                if not collect(done, result):
+                    break
+        else:
+            # GUI（Qt）のスレッドを引き継がないよう spawn で起動する
+            executor = ProcessPoolExecutor(max_workers=max_workers or min(len(changed), os.cpu_count() or 1),
+                                           mp_context=multiprocessing.get_context("spawn"))
+            futures = {executor.submit(extract_project, path): path for path in changed}
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        failures.append((futures[future], e))
+                        result = None
+                    if not collect(done, result):
+                        for pending in futures:
+                            pending.cancel()
+                        break
+            finally:
+                executor.shutdown(wait=True)
+
+        self.search_index_repository.update(root, results, removed)
+        updated += len(results)
+        print(f"[SearchIndex] {root}: {len(projects)} プロジェクト, 更新 {updated}, 削除 {len(removed)}, "
+              f"失敗 {len(failures)}, {time.perf_counter() - t:.1f}s")
+        return {"projects": len(projects), "updated": updated, "removed": len(removed), "failures": failures}
@@ -0,0 +1,117 @@
+# usecase/project/generate_report_usecase.py
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from domain.repository.model_repository import IModelRepository
+from geometry_manager.geometries_manager import GeometryManager
+from geometry_manager.project_model import ProjectModel
+from repository.project_repository import resolve_project_file
+from utils.report import REPORT_WRITERS, SnapshotRenderer, is_image_attribute, make_thumbnail, report_columns
+
+REPORT_CACHE_DIR = ".report_cache"
+
+class GenerateReportUsecase():
+    """
+    プロジェクトの階層をたどって、橋梁（第1階層フォルダ）ごとの点検調書を CSV / HTML / PDF で書き出す。
+    部材は1件ずつ書き出すので、部材数によらずメモリに溜めない。
+    部材のスナップショットはオフスクリーンで描画してプロジェクトの .report_cache にキャッシュし（形状とカメラが同じなら再利用）、
+    損傷写真は縮小画像を作って埋め込む（縮小はスナップショットの描画と並行してスレッドで行う）。
+    """
+
+    def __init__(self, geometry_manager: GeometryManager, model_repository: IModelRepository):
+        self.geometry_manager = geometry_manager
+        self.model_repository = model_repository
+
+    def exec(self, project_path: str, attributes: dict, output_path: str, snapshots: bool = True,
+             thumbnail_size: int = 320, snapshot_size: tuple = (480, 360), max_workers: int = None,
+             progress_callback=None) -> list:
+        """
+        出力形式は output_path の拡張子で決める。第1階層フォルダが複数ある場合は「ファイル名_橋梁名.拡張子」に分けて書く。
+        progress_callback(完了数, 総数) が False を返した場合は、それまでの部材で閉じて中止する。
+        戻り値は書き出したファイルのリスト。
+        """
+        base, ext = os.path.splitext(output_path)
+        writer_class = REPORT_WRITERS.get(ext.lower())
+        if writer_class is None:
+            raise ValueError(f"未対応の出力形式です: {ext}（{', '.join(REPORT_WRITERS)}）")
+        t = time.perf_counter()
+        project_model = ProjectModel(attributes)
+        bridges = project_model.children()
+        total = sum(1 for _ in project_model.iter_models())
+        cache_dir = os.path.join(project_path, REPORT_CACHE_DIR)
+        renderer = SnapshotRenderer(os.path.join(cache_dir, "snapshots"), snapshot_size) if snapshots else None
+        loaded = {item.name: item for item in self.geometry_manager.items}
+
+        written = []
+        done = 0
+        executor = ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 1))
+        try:
+            for bridge in bridges:
+                members = [(path, model_data, model_data.get("attributes") or {})
+                           for path, model_data in project_model.iter_models(bridge.path)]
+                # 写真の縮小を先にまとめて投入し、描画・書き出しと並行させる
+                thumbnails = {}
+                for _, _, values in members:
+                    for name, value in values.items():
+                        image_path = resolve_project_file(project_path, value) if is_image_attribute(name, value) else None
+                        if image_path and image_path not in thumbnails:
+                            thumbnails[image_path] = executor.submit(make_thumbnail, image_path,
+                                                                     os.path.join(cache_dir, "thumbnails"), thumbnail_size)
+
+                path = output_path if len(bridges) == 1 else f"{base}_{bridge.name}{ext}"
+                bridge_attributes = bridge.data.get("attributes") or {}
+                writer = writer_class(path, report_columns(members), bridge_attributes.get("橋梁名", bridge.name),
+                                      bridge_attributes)
+                written.append(path)
+                try:
+                    for member_path, model_data, values in members:
+                        snapshot = self._snapshot(renderer, project_path, model_data, loaded) if renderer else None
+                        member_thumbnails = {}
+                        for name, value in values.items():
+                            image_path = resolve_project_file(project_path, value) if is_image_attribute(name, value) else None
+                            if image_path:
+                                member_thumbnails[name] = self._result(thumbnails[image_path], image_path)
+                        writer.write_member(member_path, values, snapshot, member_thumbnails)
+
+                        done += 1
+                        if progress_callback and progress_callback(done, total) is False:
+                            return written
+                finally:
+                    writer.close()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            if renderer:
+                renderer.close()
+                print(f"[Report] スナップショット: 描画 {renderer.rendered}, キャッシュ {renderer.cached}")
+            print(f"[Report] {done}/{total} 部材を {time.perf_counter() - t:.1f}s で書き出しました: {written}")
+        return written
+
+    def _result(self, future, image_path: str):
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"[Report] 縮小画像を作れませんでした: {image_path}: {e}")
+            return None
+
+    def _snapshot(self, renderer: SnapshotRenderer, project_path: str, model_data: dict, loaded: dict):
+        """読み込み済みならそのメッシュ、なければファイルから読んで描画する（失敗したら None）"""
+        item = loaded.get(model_data.get("original_name"))
+        try:
+            if item is not None:
+                mesh = item.data["mesh"] if isinstance(item.data, dict) else item.data
+            else:
+                file_path = resolve_project_file(project_path, model_data.get("file_path"))
+                if file_path is None:
+                    return None
+                if file_path.lower().endswith(".obj"):
+                    mesh = self.model_repository.load_obj(file_path)
+                else:
+                    mesh = self.model_repository.load(file_path)
+            if not mesh.has_triangles():
+                return None
+            return renderer.render(mesh)
+        except Exception as e:
+            print(f"[Report] スナップショットを描画できませんでした: {model_data.get('original_name')}: {e}")
+            return None
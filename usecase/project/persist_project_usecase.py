@@ -0,0 +1,168 @@
+# usecase/project/persist_project_usecase.py
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from domain.repository.project_repository import IProjectRepository
+from repository.project_repository import apply_change
+
+class PersistProjectUsecase(QObject):
+    """
+    プロジェクト属性の保存をまとめて行う。
+    mark_dirty は保存を予約するだけで、一定時間変更が続かなかったときに1回だけ全体を保存する。
+    record は小さな変更をジャーナルに追記し、全体の保存（ジャーナルの圧縮）は compact_interval ごとにまとめて行う。
+    属性の文字列化だけを呼び出し元（GUI）のスレッドで行い、ファイルへの書き込みは1本のワーカースレッドで順番に行う。
+    """
+    save_failed = pyqtSignal(str)
+
+    def __init__(self, project_repository: IProjectRepository, database_repository: IProjectRepository = None,
+                 save_delay_ms: int = 500, compact_interval_ms: int = 30000, compact_records: int = 500):
+        """
+        project_repository は従来の JSON での保存、database_repository は任意のデータベース（SQLite）での保存。
+        データベースのあるプロジェクトはデータベースで、それ以外は JSON で読み書きする。
+        """
+        super().__init__()
+        self.json_repository = project_repository
+        self.database_repository = database_repository
+        self.project_repository = project_repository
+        self.compact_records = compact_records
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.project_path = None
+        self.attributes = None
+        self._dirty = False
+        self._journal_count = 0
+
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(save_delay_ms)
+        self.save_timer.timeout.connect(self._save_now)
+        self.compact_timer = QTimer(self)
+        self.compact_timer.setSingleShot(True)
+        self.compact_timer.setInterval(compact_interval_ms)
+        self.compact_timer.timeout.connect(self._save_now)
+
+    def exists(self, project_path: str) -> bool:
+        return any(repository is not None and repository.exists(project_path)
+                   for repository in (self.database_repository, self.json_repository))
+
+    def uses_database(self) -> bool:
+        return self.database_repository is not None and self.project_repository is self.database_repository
+
+    def open(self, project_path: str) -> dict:
+        """保存先を切り替えて、属性を読み込む（ジャーナルの変更も反映する）"""
+        self.flush()
+        if self.database_repository is not None and self.database_repository.exists(project_path):
+            self.project_repository = self.database_repository
+        else:
+            self.project_repository = self.json_repository
+        self.attributes = self.project_repository.load(project_path)
+        self.project_path = project_path
+        return self.attributes
+
+    def create(self, project_path: str, attributes: dict):
+        """新しいプロジェクトとしてすぐに保存する"""
+        self.flush()
+        self.project_repository = self.json_repository
+        self.project_path = project_path
+        self.mark_dirty(attributes)
+        self.flush()
+
+    def use_database(self, attributes: dict):
+        """開いているプロジェクトの属性をデータベースに取り込み、以降はデータベースに保存する（JSON はそのまま残す）"""
+        if self.database_repository is None or not self.project_path:
+            return
+        self.flush()
+        self.project_repository = self.database_repository
+        self.mark_dirty(attributes)
+        self.flush()
+
+    def export_json(self, attributes: dict, file_path: str):
+        """属性を従来の JSON 形式（インデント付き）でファイルに書き出す"""
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(attributes, f, ensure_ascii=False, indent=2)
+
+    def query(self, attributes: dict, name: str, values: list) -> list:
+        """
+        属性 name の値が values のいずれかであるフォルダ・配置モデルを (階層のパス, 値) のリストで返す。
+        データベースで管理している場合は索引で検索し、それ以外は属性をたどって探す。
+        """
+        if self.uses_database():
+            self.flush()
+            return self.database_repository.query_attributes(self.project_path, name, values)
+        values = set(values)
+        result = []
+
+        def visit(path: list, node: dict, child_keys: list):
+            value = (node.get("attributes") or {}).get(name)
+            if path and value in values:
+                result.append((path, value))
+            if child_keys:
+                for child_name, child in node.get(child_keys[0], {}).items():
+                    visit(path + [child_name], child, child_keys[1:])
+
+        visit([], attributes, ["folders", "second_level_folders", "third_level_folders", "models"])
+        return sorted(result, key=lambda entry: entry[0])
+
+    def close(self):
+        self.flush()
+        self.project_path = None
+        self.attributes = None
+
+    def mark_dirty(self, attributes: dict):
+        """属性全体の保存を予約する（続けて呼ばれた場合は最後の呼び出しから save_delay_ms 後に1回だけ保存）"""
+        if not self.project_path:
+            return
+        self.attributes = attributes
+        self._dirty = True
+        self.save_timer.start()
+
+    def record(self, attributes: dict, path: list, value=None, delete: bool = False):
+        """属性の1か所を変更し、変更だけをジャーナルに追記する"""
+        change = {"path": list(path), "value": value}
+        if delete:
+            change = {"path": list(path), "delete": True}
+        apply_change(attributes, change)
+        if not self.project_path:
+            return
+        self.attributes = attributes
+        self._submit(self.project_repository.append_journal, self.project_path, [change])
+        self._journal_count += 1
+        if self._journal_count >= self.compact_records:
+            self.mark_dirty(attributes)
+        elif not self.compact_timer.isActive():
+            self.compact_timer.start()
+
+    def flush(self):
+        """予約中の保存をすぐに行い、書き込みが終わるまで待つ"""
+        if self._dirty or self._journal_count:
+            self._save_now()
+        self.executor.submit(lambda: None).result()
+
+    def _save_now(self):
+        self.save_timer.stop()
+        self.compact_timer.stop()
+        if not self.project_path or self.attributes is None:
+            return
+        snapshot = self.project_repository.snapshot(self.attributes)
+        self._dirty = False
+        self._journal_count = 0
+        self._submit(self._save, self.project_path, snapshot)
+
+    def _save(self, project_path: str, snapshot):
+        t = time.perf_counter()
+        self.project_repository.save(project_path, snapshot)
+        print(f"[Project] 属性を保存しました ({time.perf_counter() - t:.3f}s)")
+
+    def _submit(self, func, *args):
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, future):
+        # ワーカースレッドから呼ばれるので、画面への通知はシグナル経由で行う
+        error = future.exception()
+        if error is not None:
+            print(f"[Project] 保存に失敗しました: {error}")
+            self.save_failed.emit(str(error))
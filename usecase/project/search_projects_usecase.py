@@ -0,0 +1,36 @@
+# usecase/project/search_projects_usecase.py
+
+import time
+
+from domain.repository.search_index_repository import ISearchIndexRepository
+from utils.ratings import ratings_at_least
+
+RATING_ATTRIBUTE = "判定区分"
+
+class SearchProjectsUsecase():
+    """検索用索引から、複数のプロジェクトにまたがってフォルダ・配置モデルを探す（プロジェクトは開かない）"""
+
+    def __init__(self, search_index_repository: ISearchIndexRepository):
+        self.search_index_repository = search_index_repository
+
+    def exec(self, root: str, conditions: list, keyword: str = None, rating_at_least: bool = True,
+             limit: int = 1000) -> list:
+        """
+        conditions は [(属性名, 値), ...]（すべてを満たすものを探す）。
+        rating_at_least=True なら判定区分の条件は「その区分以上」として扱う（C なら C, C1, C2, E, ...）。
+        戻り値は SearchIndexRepository.search と同じ。
+        """
+        t = time.perf_counter()
+        expanded = []
+        for name, value in conditions:
+            if name == RATING_ATTRIBUTE and rating_at_least:
+                expanded.append((name, ratings_at_least(value)))
+            else:
+                expanded.append((name, [value]))
+        results = self.search_index_repository.search(root, expanded, keyword, limit)
+        print(f"[SearchIndex] 検索 {conditions} {keyword or ''}: {len(results)} 件, "
+              f"{(time.perf_counter() - t) * 1000:.0f} ms")
+        return results
+
+    def attribute_names(self, root: str) -> list:
+        return self.search_index_repository.attribute_names(root)
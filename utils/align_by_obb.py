@@ -1,12 +1,12 @@
 import open3d as o3d
 import numpy as np
 
-def align_by_obb(
+def obb_alignment_transform(
     pcd: o3d.geometry.PointCloud,
     model: o3d.geometry.TriangleMesh
-) -> o3d.geometry.TriangleMesh:
+) -> np.ndarray:
     """
-    点群とモデルのOriented Bounding Box (OBB) を使って、モデルを点群に大まかに位置合わせ。
+    点群とモデルのOBBから、モデルを点群に大まかに合わせる変換行列（4x4）を求める（モデルは変更しない）。
     """
     # 点群とモデルのOBBを取得
     pcd_obb: o3d.geometry.OrientedBoundingBox = pcd.get_oriented_bounding_box()
@@ -20,9 +20,18 @@ def align_by_obb(
         print("⚠️ 鏡映検出：Z軸反転で修正")
         R[:, 2] *= -1  # Z軸を反転
 
-    # 回転と並進の適用
-    model.rotate(R, center=model_obb.center)
-    translation: np.ndarray = pcd_obb.center - model.get_oriented_bounding_box().center
-    model.translate(translation)
+    # モデルのOBB中心まわりに回転し、OBB中心どうしを重ねる
+    T = np.eye(4)
+    T[:3, :3] = R
+    T[:3, 3] = pcd_obb.center - R @ model_obb.center
+    return T
 
-    return model
\ No newline at end of file
+def align_by_obb(
+    pcd: o3d.geometry.PointCloud,
+    model: o3d.geometry.TriangleMesh
+) -> o3d.geometry.TriangleMesh:
+    """
+    点群とモデルのOriented Bounding Box (OBB) を使って、モデルを点群に大まかに位置合わせ。
+    """
+    model.transform(obb_alignment_transform(pcd, model))
+    return model
@@ -0,0 +1,38 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import open3d as o3d
+
+from utils.parametric_fitting import fit_parametric_model
+from utils.parametric_primitives import generate_primitive
+from utils.registration_target import RegistrationTarget
+
+# ワーカープロセスごとに1つだけ持つ対象点群（共有メモリから初期化時に作る）
+_worker_target = None
+
+def share_points(points: np.ndarray) -> shared_memory.SharedMemory:
+    """点群の座標を共有メモリへコピーする（呼び出し側で close / unlink する）"""
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(points.nbytes, 1))
+    np.ndarray(points.shape, dtype=np.float64, buffer=shm.buf)[:] = points
+    return shm
+
+def init_worker(shm_name: str, shape: tuple):
+    """プールの初期化関数。共有メモリの座標から対象点群を作り、以降のタスクで使い回す"""
+    global _worker_target
+    shm = shared_memory.SharedMemory(name=shm_name)
+    points = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(points))
+    # バッファを参照する配列を先に手放してから閉じる
+    del points
+    shm.close()
+    _worker_target = RegistrationTarget(pcd)
+
+def fit_member(index: int, seed_point, kind: str, params, roi_margin: float, multiscale: bool) -> dict:
+    """1部材分のフィッティング（ワーカープロセス内で実行）"""
+    vertices, triangles = generate_primitive(kind, params)
+    model = o3d.geometry.TriangleMesh(o3d.utility.Vector3dVector(vertices), o3d.utility.Vector3iVector(triangles))
+    result = fit_parametric_model(model, _worker_target, seed_point=seed_point,
+                                  roi_margin=roi_margin, multiscale=multiscale)
+    result["index"] = index
+    return result
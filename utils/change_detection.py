@@ -0,0 +1,188 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import open3d as o3d
+
+# ワーカープロセスごとに持つ2時期の点群（タイル順に並べた座標の共有メモリ）とタイルの範囲
+_worker_state = None
+
+def sort_by_tile(points: np.ndarray, tile_size: float):
+    """点を水平タイルの順に並べ、(並べ替えの順序, {タイル番号 (tx, ty): (開始, 終了)}) を返す"""
+    keys = np.floor(points[:, :2] / tile_size).astype(np.int64)
+    unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    order = np.argsort(inverse, kind="stable")
+    ends = np.cumsum(np.bincount(inverse, minlength=len(unique_keys)))
+    starts = ends - np.bincount(inverse, minlength=len(unique_keys))
+    tiles = {(int(tx), int(ty)): (int(s), int(e)) for (tx, ty), s, e in zip(unique_keys, starts, ends)}
+    return order, tiles
+
+def init_change_worker(reference: tuple, compared: tuple, tile_size: float):
+    """
+    プールの初期化関数。reference / compared は (共有メモリ名, 形状, タイルの範囲)。
+    共有メモリはプロセスの終了まで開いたままにして、タスクごとに必要なタイルだけを参照する。
+    """
+    global _worker_state
+    state = {"tile_size": tile_size}
+    for label, (shm_name, shape, tiles) in (("reference", reference), ("compared", compared)):
+        shm = shared_memory.SharedMemory(name=shm_name)
+        state[label] = (shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf), tiles)
+    _worker_state = state
+
+def _gather(label: str, key: tuple, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """タイル key と周囲8タイルの点のうち、範囲 [lo, hi] に入るものを集める"""
+    _, points, tiles = _worker_state[label]
+    parts = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            span = tiles.get((key[0] + dx, key[1] + dy))
+            if span is not None:
+                parts.append(points[span[0]:span[1]])
+    if not parts:
+        return np.empty((0, 3))
+    gathered = np.concatenate(parts)
+    return gathered[np.all((gathered[:, :2] >= lo) & (gathered[:, :2] <= hi), axis=1)]
+
+def _nns(dataset: np.ndarray) -> o3d.core.nns.NearestNeighborSearch:
+    """dataset の k 近傍探索の索引（タスクごとに1回だけ作り、バッチ間で使い回す）"""
+    nns = o3d.core.nns.NearestNeighborSearch(o3d.core.Tensor(dataset))
+    nns.knn_index()
+    return nns
+
+def _knn(nns: o3d.core.nns.NearestNeighborSearch, query: np.ndarray, k: int):
+    """索引 nns に対する query の k 近傍（番号 (n,k), 二乗距離 (n,k)）"""
+    indices, distances = nns.knn_search(o3d.core.Tensor(query), k)
+    return indices.numpy().astype(np.int64), distances.numpy()
+
+def _oriented_normals(points: np.ndarray, nns: o3d.core.nns.NearestNeighborSearch, targets: np.ndarray,
+                      radius: float, center: np.ndarray, max_nn: int = 30) -> np.ndarray:
+    """
+    points のうち targets 番の点だけ、radius 以内（最大 max_nn 点）の近傍の共分散から法線を求め、
+    上向き（+z）にそろえる。鉛直に近い面は center から外向きにする
+    （時期間で向きがそろえば良いので、面ごとの厳密な外向きは求めない）。
+    """
+    indices, distances = _knn(nns, points[targets], min(max_nn, len(points)))
+    valid = (distances <= radius ** 2)[:, :, None]
+    neighbors = points[indices]
+    counts = valid.sum(axis=1)
+    means = np.where(valid, neighbors, 0.0).sum(axis=1) / counts
+    offsets = np.where(valid, neighbors - means[:, None, :], 0.0)
+    _, vectors = np.linalg.eigh(np.einsum("nki,nkj->nij", offsets, offsets))
+    normals = vectors[:, :, 0]
+    outward = points[targets] - center
+    outward[:, 2] = 0.0
+    reference = np.where(np.abs(normals[:, 2:3]) >= 0.3, np.array([0.0, 0.0, 1.0]), outward)
+    flip = np.einsum("ij,ij->i", normals, reference) < 0
+    normals[flip] *= -1
+    return normals
+
+def _cylinder_mean(offsets: np.ndarray, normals: np.ndarray, valid: np.ndarray,
+                   radius: float, max_distance: float) -> np.ndarray:
+    """近傍点へのオフセット (n,k,3) のうち、法線方向の円柱に入るものの法線方向成分の平均"""
+    along = np.einsum("nkj,nj->nk", offsets, normals)
+    radial_sq = np.einsum("nkj,nkj->nk", offsets, offsets) - along ** 2
+    inside = valid & (radial_sq <= radius ** 2) & (np.abs(along) <= max_distance)
+    counts = inside.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, np.where(inside, along, 0.0).sum(axis=1) / counts, np.nan)
+
+def detect_chunk(key: tuple, start: int, end: int, method: str, max_distance: float,
+                 cylinder_radius: float, normal_radius: float, neighbors: int, batch_size: int):
+    """
+    比較点群のタイル1つ分（タイル順の start:end）の変化量を求める（ワーカープロセス内で実行）。
+    c2c: 最も近い基準点までの距離（符号なし）
+    m3c2: 基準点群の法線方向の円柱内で、基準点群・比較点群それぞれの平均位置の差（符号付き）
+    max_distance より遠くに対応がない点は NaN。
+    """
+    _, compared, _ = _worker_state["compared"]
+    tile_size = _worker_state["tile_size"]
+    query = compared[start:end]
+    lo = np.array(key, dtype=np.float64) * tile_size - max_distance
+    hi = lo + tile_size + 2 * max_distance
+    reference = _gather("reference", key, lo, hi)
+    result = np.full(len(query), np.nan, dtype=np.float32)
+    if len(reference) == 0:
+        return start, result
+
+    reference_nns = _nns(reference)
+    if method == "c2c":
+        for s in range(0, len(query), batch_size):
+            _, distances = _knn(reference_nns, query[s:s + batch_size], 1)
+            distances = np.sqrt(distances[:, 0])
+            result[s:s + batch_size] = np.where(distances <= max_distance, distances, np.nan)
+        return start, result
+
+    # 法線は比較点の最寄りになった基準点の分だけ、必要になったときに求める
+    normals = np.zeros((len(reference), 3))
+    has_normal = np.zeros(len(reference), dtype=bool)
+    center = reference.mean(axis=0)
+    neighborhood = _gather("compared", key, lo, hi)
+    neighborhood_nns = _nns(neighborhood)
+    k_ref = min(neighbors, len(reference))
+    k_cmp = min(neighbors, len(neighborhood))
+    for s in range(0, len(query), batch_size):
+        batch = query[s:s + batch_size]
+        indices, distances = _knn(reference_nns, batch, k_ref)
+        targets = np.unique(indices[:, 0])
+        targets = targets[~has_normal[targets]]
+        if len(targets):
+            normals[targets] = _oriented_normals(reference, reference_nns, targets, normal_radius, center)
+            has_normal[targets] = True
+        normal = normals[indices[:, 0]]
+        valid = np.isfinite(distances)
+        # 基準面の平均位置から見た比較点の位置
+        from_reference = _cylinder_mean(batch[:, None, :] - reference[indices], normal, valid,
+                                        cylinder_radius, max_distance)
+        # 比較点の周囲の比較点群の平均位置へのずれ（点ごとのばらつきをならす）
+        indices, distances = _knn(neighborhood_nns, batch, k_cmp)
+        to_compared = _cylinder_mean(neighborhood[indices] - batch[:, None, :], normal, np.isfinite(distances),
+                                     cylinder_radius, max_distance)
+        result[s:s + batch_size] = from_reference + np.nan_to_num(to_compared)
+    return start, result
+
+def summarize_by_member(points: np.ndarray, values: np.ndarray, scenes: list, names: list,
+                        margin: float = 0.5, threshold: float = 0.01, chunk_size: int = 1_000_000) -> dict:
+    """
+    各点を表面から margin 以内で最も近い配置モデルに割り当て、モデルごとに変化量を集計する。
+    戻り値は {モデル名: {"point_count", "mean", "rms", "max_abs", "changed_ratio"}}（changed_ratio は |変化量| > threshold の割合）。
+    """
+    labels = np.full(len(points), -1, dtype=np.int64)
+    for start in range(0, len(points), chunk_size):
+        query = points[start:start + chunk_size]
+        distances = np.stack([scene.distance(query) for scene in scenes])
+        nearest = distances.argmin(axis=0)
+        near = distances[nearest, np.arange(len(nearest))] <= margin
+        labels[start:start + chunk_size] = np.where(near, nearest, -1)
+
+    valid = (labels >= 0) & np.isfinite(values)
+    labels, values = labels[valid], values[valid].astype(np.float64)
+    counts = np.bincount(labels, minlength=len(names))
+    sums = np.bincount(labels, weights=values, minlength=len(names))
+    sq_sums = np.bincount(labels, weights=values ** 2, minlength=len(names))
+    changed = np.bincount(labels, weights=(np.abs(values) > threshold).astype(np.float64), minlength=len(names))
+    max_abs = np.zeros(len(names))
+    np.maximum.at(max_abs, labels, np.abs(values))
+
+    summary = {}
+    for i, name in enumerate(names):
+        n = int(counts[i])
+        summary[name] = {
+            "point_count": n,
+            "mean": float(sums[i] / n) if n else None,
+            "rms": float(np.sqrt(sq_sums[i] / n)) if n else None,
+            "max_abs": float(max_abs[i]) if n else None,
+            "changed_ratio": float(changed[i] / n) if n else 0.0,
+        }
+    return summary
+
+def format_change_summary(summary: dict) -> dict:
+    """部材ごとの集計を表示用の文字列にする"""
+    formatted = {}
+    for name, stats in summary.items():
+        if not stats["point_count"]:
+            formatted[name] = "点なし"
+            continue
+        formatted[name] = (f"平均 {stats['mean'] * 1000:.1f} mm, RMS {stats['rms'] * 1000:.1f} mm, "
+                           f"最大 {stats['max_abs'] * 1000:.1f} mm, 変化点 {stats['changed_ratio'] * 100:.1f}% "
+                           f"({stats['point_count']} 点)")
+    return formatted
@@ -0,0 +1,24 @@
+import numpy as np
+
+def signed_distances(scenes: list, points: np.ndarray, chunk_size: int = 1_000_000) -> np.ndarray:
+    """
+    点ごとに、最も近いモデル表面までの符号付き距離（モデルの外側が正、内側が負）を求める。
+    scenes は MeshScene（三角形のBVH）のリスト。閉じていないモデルは面の法線側を正とする。
+    chunk_size 点ずつ問い合わせ、各問い合わせはOpen3D内部で全コアを使って並列に処理される。
+    """
+    result = np.full(len(points), np.inf, dtype=np.float32)
+    for start in range(0, len(points), chunk_size):
+        query = points[start:start + chunk_size]
+        best = result[start:start + chunk_size]
+        for scene in scenes:
+            distances = scene.signed_distance(query)
+            closer = np.abs(distances) < np.abs(best)
+            best[closer] = distances[closer]
+    return result
+
+def symmetric_clim(values: np.ndarray, percentile: float = 99.0) -> list:
+    """外れ値に引きずられないよう、絶対値のパーセンタイルで正負対称の表示範囲を決める"""
+    finite = np.abs(values[np.isfinite(values)])
+    limit = float(np.percentile(finite, percentile)) if len(finite) else 1.0
+    limit = limit if limit > 0 else 1.0
+    return [-limit, limit]
@@ -0,0 +1,73 @@
+import numpy as np
+import open3d as o3d
+
+from utils.registration_target import RegistrationTarget
+from utils.spatial_index import MeshScene, get_spatial_index
+
+def build_raycasting_scene(mesh: o3d.geometry.TriangleMesh) -> MeshScene:
+    """メッシュの距離問い合わせ用のシーン（内部でBVHを構築する）"""
+    return MeshScene(mesh)
+
+def get_raycasting_scene(item) -> MeshScene:
+    """モデルの GeometryItem の空間インデックスが持つシーンを返す"""
+    return get_spatial_index(item).scene
+
+def compute_fit_metrics(mesh: o3d.geometry.TriangleMesh, target, threshold: float = 0.05,
+                        margin: float = None, coverage_samples: int = 20000, chunk_size: int = 1_000_000,
+                        scene: MeshScene = None) -> dict:
+    """
+    モデルと周辺の点群（モデルの範囲 + margin）の一致度を求める。
+    rmse: threshold 以内の点の点→メッシュ距離の二乗平均平方根
+    inlier_ratio: 周辺の点のうち threshold 以内の割合
+    hausdorff: 周辺の点とモデル表面の双方向の最大距離
+    coverage: モデル表面のサンプルのうち threshold 以内に点がある割合
+    点→メッシュ距離は chunk_size 点ずつ計算するので、メモリ使用量は点数によらない。
+    """
+    if not isinstance(target, RegistrationTarget):
+        target = RegistrationTarget(target)
+    margin = 2.0 * threshold if margin is None else margin
+    lo = mesh.get_min_bound() - margin
+    hi = mesh.get_max_bound() + margin
+
+    points = np.asarray(target.pcd.points)[target.index.box(lo, hi)]
+
+    metrics = {"point_count": int(len(points)), "threshold": threshold,
+               "rmse": None, "inlier_ratio": 0.0, "hausdorff": None, "coverage": 0.0}
+    if len(points) == 0:
+        return metrics
+
+    scene = scene or build_raycasting_scene(mesh)
+    inlier_count = 0
+    inlier_sq_sum = 0.0
+    max_distance = 0.0
+    for start in range(0, len(points), chunk_size):
+        distances = scene.distance(points[start:start + chunk_size])
+        inliers = distances <= threshold
+        inlier_count += int(inliers.sum())
+        inlier_sq_sum += float(np.sum(distances[inliers].astype(np.float64) ** 2))
+        max_distance = max(max_distance, float(distances.max()))
+
+    # モデル表面→点群: 点のない面があれば被覆率が下がる
+    samples = mesh.sample_points_uniformly(coverage_samples)
+    surface_distances = np.asarray(samples.compute_point_cloud_distance(
+        o3d.geometry.PointCloud(o3d.utility.Vector3dVector(points))))
+
+    metrics.update({
+        "rmse": float(np.sqrt(inlier_sq_sum / inlier_count)) if inlier_count else None,
+        "inlier_ratio": inlier_count / len(points),
+        "hausdorff": max(max_distance, float(surface_distances.max())),
+        "coverage": float(np.mean(surface_distances <= threshold)),
+    })
+    return metrics
+
+def format_fit_metrics(metrics: dict) -> dict:
+    """属性表示用に整形する"""
+    def length(value):
+        return "―" if value is None else f"{value:.4f} m"
+
+    return {
+        "フィットRMSE": length(metrics.get("rmse")),
+        "インライア率": f"{metrics.get('inlier_ratio', 0.0) * 100:.1f} %",
+        "ハウスドルフ距離": length(metrics.get("hausdorff")),
+        "表面被覆率": f"{metrics.get('coverage', 0.0) * 100:.1f} %",
+    }
@@ -1,18 +1,35 @@
+import time
+
 import open3d as o3d
 import numpy as np
 
+from utils.registration_target import RegistrationTarget
+
+def _prepare_target(target, voxel_size: float = None, radius: float = None) -> o3d.geometry.PointCloud:
+    """target が RegistrationTarget なら計算済みの点群を、そうでなければコピーに法線を推定して返す"""
+    if isinstance(target, RegistrationTarget):
+        return target.level(voxel_size, radius)
+    cloud = o3d.geometry.PointCloud(target) if voxel_size is None else target.voxel_down_sample(voxel_size)
+    if radius is None:
+        cloud.estimate_normals()
+    else:
+        cloud.estimate_normals(o3d.geometry.KDTreeSearchParamHybrid(radius=radius, max_nn=30))
+    return cloud
+
 def run_gicp(
     source: o3d.geometry.PointCloud,
-    target: o3d.geometry.PointCloud,
+    target,
     threshold: float = 0.05,
     max_iter: int = 200
 ) -> np.ndarray:
     """
     Generalized ICP により source → target の最適な剛体変換行列（4x4）を推定。
+    target には点群か RegistrationTarget（法線・共分散を使い回す）を渡す。入力の点群は変更しない。
     """
 
+    source = o3d.geometry.PointCloud(source)
     source.estimate_normals()
-    target.estimate_normals()
+    target = _prepare_target(target)
 
     result = o3d.pipelines.registration.registration_generalized_icp(
         source, target, threshold, np.eye(4),
@@ -21,3 +38,56 @@ def run_gicp(
     )
 
     return result.transformation
+
+def run_multiscale_gicp(
+    source: o3d.geometry.PointCloud,
+    target,
+    voxel_sizes: list = None,
+    max_iters: list = None,
+    threshold: float = 0.05,
+    max_iter: int = 200,
+    init: np.ndarray = None
+) -> np.ndarray:
+    """
+    粗→密の多重解像度 Generalized ICP。
+    source / target をボクセルサイズの大きい順にダウンサンプリングし、各レベルで
+    距離閾値 2.5 × ボクセルサイズ の GICP を行って、得られた変換を次のレベルの初期値にする。
+    最後にフル解像度で threshold / max_iter の GICP を行う。入力の点群は変更しない。
+    target に RegistrationTarget を渡すと、各レベルの法線・共分散は初回だけ計算される。
+    """
+    if voxel_sizes is None:
+        # 既定ではモデル（source）の大きさから3段階を決める
+        extent = np.linalg.norm(source.get_max_bound() - source.get_min_bound())
+        voxel_sizes = [extent / 20, extent / 40, extent / 80]
+    # 最終レベルの閾値より細かいレベルは意味がないので除く
+    voxel_sizes = [v for v in voxel_sizes if 2.5 * v > threshold]
+    if max_iters is None:
+        max_iters = [50, 30, 20][:len(voxel_sizes)] + [20] * max(0, len(voxel_sizes) - 3)
+
+    T = np.eye(4) if init is None else np.asarray(init, dtype=np.float64)
+    estimation = o3d.pipelines.registration.TransformationEstimationForGeneralizedICP()
+
+    levels = [(v, 2.5 * v, n) for v, n in zip(voxel_sizes, max_iters)] + [(None, threshold, max_iter)]
+    for voxel, level_threshold, level_max_iter in levels:
+        t = time.perf_counter()
+        if voxel is None:
+            src = o3d.geometry.PointCloud(source)
+            src.estimate_normals()
+            tgt = _prepare_target(target)
+        else:
+            src = source.voxel_down_sample(voxel)
+            src.estimate_normals(o3d.geometry.KDTreeSearchParamHybrid(radius=2.0 * voxel, max_nn=30))
+            tgt = _prepare_target(target, voxel, 2.0 * voxel)
+        if len(src.points) < 3 or len(tgt.points) < 3:
+            continue
+
+        result = o3d.pipelines.registration.registration_generalized_icp(
+            src, tgt, level_threshold, T, estimation,
+            o3d.pipelines.registration.ICPConvergenceCriteria(max_iteration=level_max_iter)
+        )
+        T = result.transformation
+        label = "full" if voxel is None else f"voxel={voxel:.3f}"
+        print(f"[GICP] {label}: {len(src.points)}→{len(tgt.points)} pts, threshold={level_threshold:.3f}, "
+              f"fitness={result.fitness:.3f}, rmse={result.inlier_rmse:.4f}, {time.perf_counter() - t:.2f}s")
+
+    return T
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+import open3d as o3d
+
+from utils.registration_target import RegistrationTarget
+
+def feature_voxel_size(source: o3d.geometry.PointCloud, divisions: int = 20) -> float:
+    """
+    特徴量用のボクセルサイズ。モデルの大きさ / divisions を2のべき乗に丸め、
+    大きさの近い部材どうしで対象点群の特徴量キャッシュを共有できるようにする。
+    """
+    extent = np.linalg.norm(source.get_max_bound() - source.get_min_bound())
+    return float(2.0 ** np.round(np.log2(max(extent / divisions, 1e-6))))
+
+def run_global_registration(
+    source: o3d.geometry.PointCloud,
+    target: RegistrationTarget,
+    voxel_size: float = None,
+    max_iteration: int = 100000,
+    confidence: float = 0.999
+) -> np.ndarray:
+    """
+    FPFH特徴量のRANSACで source → target の大まかな剛体変換（4x4）を求める。初期姿勢に依存しない。
+    対象点群の特徴量は target にキャッシュされる。対応が取れない場合は None を返す。
+    """
+    t = time.perf_counter()
+    voxel_size = voxel_size or feature_voxel_size(source)
+    target_down, target_fpfh = target.features(voxel_size)
+
+    source_down = source.voxel_down_sample(voxel_size)
+    source_down.estimate_normals(o3d.geometry.KDTreeSearchParamHybrid(radius=2.0 * voxel_size, max_nn=30))
+    source_fpfh = o3d.pipelines.registration.compute_fpfh_feature(
+        source_down, o3d.geometry.KDTreeSearchParamHybrid(radius=5.0 * voxel_size, max_nn=100))
+    if len(source_down.points) < 3 or len(target_down.points) < 3:
+        return None
+
+    distance = 1.5 * voxel_size
+    result = o3d.pipelines.registration.registration_ransac_based_on_feature_matching(
+        source_down, target_down, source_fpfh, target_fpfh, True, distance,
+        o3d.pipelines.registration.TransformationEstimationPointToPoint(False), 3,
+        [o3d.pipelines.registration.CorrespondenceCheckerBasedOnEdgeLength(0.9),
+         o3d.pipelines.registration.CorrespondenceCheckerBasedOnDistance(distance)],
+        o3d.pipelines.registration.RANSACConvergenceCriteria(max_iteration, confidence))
+    print(f"[Global] voxel={voxel_size:.3f}: {len(source_down.points)}→{len(target_down.points)} pts, "
+          f"fitness={result.fitness:.3f}, {time.perf_counter() - t:.2f}s")
+
+    if result.fitness == 0:
+        return None
+    return result.transformation
@@ -0,0 +1,266 @@
+import os
+import time
+
+import numpy as np
+
+_SPACE = 32
+_TAB = 9
+_LF = 10
+_CR = 13
+_SLASH = 47
+_HASH = 35
+
+
+def _is_blank(chars: np.ndarray) -> np.ndarray:
+    return (chars == _SPACE) | (chars == _TAB) | (chars == _LF) | (chars == _CR)
+
+
+def _blank_comments(raw: np.ndarray):
+    """'#' から行末までを空白で潰す（行末のコメントも数値として読まないように）"""
+    positions = np.arange(len(raw))
+    last_hash = np.maximum.accumulate(np.where(raw == _HASH, positions, -1))
+    last_lf = np.maximum.accumulate(np.where(raw == _LF, positions, -1))
+    raw[last_hash > last_lf] = _SPACE
+
+
+def _indents(raw: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """各行の行頭の空白・タブの数（キーワードが字下げされた行のため）"""
+    positions = np.arange(len(raw))
+    # 各位置から見て次の空白・タブ以外の文字の位置（行末の LF で必ず止まる）
+    next_char = np.where((raw == _SPACE) | (raw == _TAB), len(raw), positions)
+    next_char = np.minimum.accumulate(next_char[::-1])[::-1]
+    return next_char[starts] - starts
+
+
+def _extract_lines(raw: np.ndarray, starts: np.ndarray, lengths: np.ndarray, indents: np.ndarray,
+                   mask: np.ndarray, prefix_len: int):
+    """
+    mask で選ばれた行のバイト列だけを連結して取り出し、行頭のキーワード（"v", "vt", "f" など）を空白で潰す。
+    戻り値は (連結バイト列, 連結後の各行の先頭位置)。
+    """
+    selected_lengths = lengths[mask]
+    chunk = raw[np.repeat(mask, lengths)]
+    line_starts = np.zeros(len(selected_lengths), dtype=np.int64)
+    if len(selected_lengths) > 1:
+        np.cumsum(selected_lengths[:-1], out=line_starts[1:])
+    keyword_starts = line_starts + indents[mask]
+    for k in range(prefix_len):
+        chunk[keyword_starts + k] = _SPACE
+    return chunk, line_starts
+
+
+def _parse_floats(chunk: np.ndarray, columns: int, label: str) -> np.ndarray:
+    values = np.fromstring(chunk.tobytes(), dtype=np.float64, sep=" ")
+    if values.size % columns != 0:
+        raise ValueError(f"'{label}' 行の列数が揃っていません（{columns} 列を想定）")
+    return values.reshape(-1, columns)
+
+
+def _first_tokens(raw: np.ndarray, start: int, length: int) -> list:
+    return raw[start:start + length].tobytes().split()
+
+
+def _resolve_indices(idx: np.ndarray, defined_before: np.ndarray) -> np.ndarray:
+    """OBJの1始まり・負数（相対）インデックスを0始まりに変換"""
+    out = idx - 1
+    negative = idx < 0
+    if negative.any():
+        out[negative] = defined_before[negative] + idx[negative]
+    return out
+
+
+def parse_obj(obj_file_path: str) -> dict:
+    """
+    OBJファイルをnumpyでまとめて解析する。
+
+    行頭の文字で全行を一括分類し、v / vt / vn / f 行をそれぞれ連結して
+    np.fromstring で一度に数値化する。多角形は扇形分割で三角形化し、
+    テクスチャ座標がある場合は (v, vt) の組ごとに頂点を分割して
+    1頂点につきUVが1つになるようにする。
+    """
+    timings = {}
+    t = time.perf_counter()
+
+    with open(obj_file_path, "rb") as f:
+        data = f.read()
+    if not data.endswith(b"\n"):
+        data += b"\n"
+    raw = np.frombuffer(data, dtype=np.uint8).copy()
+    _blank_comments(raw)
+    timings["read"] = time.perf_counter() - t
+    t = time.perf_counter()
+
+    # --- 行の一括分類 ---
+    line_ends = np.flatnonzero(raw == _LF)
+    starts = np.empty(len(line_ends), dtype=np.int64)
+    starts[0] = 0
+    starts[1:] = line_ends[:-1] + 1
+    lengths = line_ends - starts + 1
+    indents = _indents(raw, starts)
+
+    c0 = raw[starts + indents]
+    c1 = raw[np.minimum(starts + indents + 1, len(raw) - 1)]
+    is_v_prefix = c0 == ord("v")
+    is_v = is_v_prefix & _is_blank(c1)
+    is_vt = is_v_prefix & (c1 == ord("t"))
+    is_vn = is_v_prefix & (c1 == ord("n"))
+    is_f = (c0 == ord("f")) & _is_blank(c1)
+
+    # usemtl / mtllib は行数が少ないのでPython側で確認する
+    materials = []
+    mtllibs = []
+    is_usemtl = np.zeros(len(starts), dtype=bool)
+    for line_no in np.flatnonzero((c0 == ord("u")) | (c0 == ord("m"))):
+        tokens = _first_tokens(raw, starts[line_no], lengths[line_no])
+        if len(tokens) < 2:
+            continue
+        keyword = tokens[0]
+        if keyword == b"usemtl":
+            is_usemtl[line_no] = True
+            materials.append(tokens[1].decode("utf-8", errors="replace"))
+        elif keyword == b"mtllib":
+            name = raw[starts[line_no]:starts[line_no] + lengths[line_no]].tobytes()
+            mtllibs.append(name.split(None, 1)[1].strip().decode("utf-8", errors="replace"))
+    timings["classify"] = time.perf_counter() - t
+    t = time.perf_counter()
+
+    # --- 頂点・UV・法線 ---
+    if not is_v.any():
+        raise ValueError(f"頂点が含まれていません: {obj_file_path}")
+    first_v = np.flatnonzero(is_v)[0]
+    # x y z [w] または x y z r g b [w]（4列の w は読み捨てる）
+    v_columns = len(_first_tokens(raw, starts[first_v], lengths[first_v])) - 1
+    chunk, _ = _extract_lines(raw, starts, lengths, indents, is_v, 1)
+    v_values = _parse_floats(chunk, v_columns, "v")
+    vertices = v_values[:, :3]
+    colors = v_values[:, 3:6] if v_columns in (6, 7) else None
+
+    uvs = None
+    if is_vt.any():
+        first_vt = np.flatnonzero(is_vt)[0]
+        vt_columns = len(_first_tokens(raw, starts[first_vt], lengths[first_vt])) - 1
+        chunk, _ = _extract_lines(raw, starts, lengths, indents, is_vt, 2)
+        uvs = _parse_floats(chunk, vt_columns, "vt")[:, :2]
+
+    normals = None
+    if is_vn.any():
+        chunk, _ = _extract_lines(raw, starts, lengths, indents, is_vn, 2)
+        normals = _parse_floats(chunk, 3, "vn")
+    timings["vertices"] = time.perf_counter() - t
+    t = time.perf_counter()
+
+    # --- 面 ---
+    if not is_f.any():
+        raise ValueError(f"面が含まれていません: {obj_file_path}")
+    face_lines = np.flatnonzero(is_f)
+    first_token = _first_tokens(raw, starts[face_lines[0]], lengths[face_lines[0]])[1].split(b"/")
+    has_vt = len(first_token) > 1 and first_token[1] != b""
+    has_vn = len(first_token) > 2 and first_token[2] != b""
+    components = 1 + int(has_vt) + int(has_vn)
+
+    chunk, face_starts = _extract_lines(raw, starts, lengths, indents, is_f, 1)
+    blank = _is_blank(chunk)
+    token_start = ~blank
+    token_start[1:] &= blank[:-1]
+    token_pos = np.flatnonzero(token_start)
+    token_face = np.searchsorted(face_starts, token_pos, side="right") - 1
+    corners_per_face = np.bincount(token_face, minlength=len(face_lines))
+
+    chunk[chunk == _SLASH] = _SPACE
+    indices = np.fromstring(chunk.tobytes(), dtype=np.int64, sep=" ")
+    if indices.size != token_pos.size * components:
+        raise ValueError("f 行の書式（v / v/vt / v//vn / v/vt/vn）が混在しています")
+    indices = indices.reshape(-1, components)
+
+    v_idx = _resolve_indices(indices[:, 0], np.cumsum(is_v)[face_lines][token_face])
+    vt_idx = None
+    if has_vt and uvs is not None:
+        vt_idx = _resolve_indices(indices[:, 1], np.cumsum(is_vt)[face_lines][token_face])
+    vn_idx = None
+    if has_vn and normals is not None:
+        vn_idx = _resolve_indices(indices[:, -1], np.cumsum(is_vn)[face_lines][token_face])
+
+    # 扇形分割: 多角形 (c0, c1, ..., cn-1) -> (c0, ci, ci+1)
+    tris_per_face = np.maximum(corners_per_face - 2, 0)
+    face_first = np.zeros(len(face_lines), dtype=np.int64)
+    np.cumsum(corners_per_face[:-1], out=face_first[1:])
+    tri_face = np.repeat(np.arange(len(face_lines)), tris_per_face)
+    tri_offset = np.arange(len(tri_face)) - np.repeat(np.cumsum(tris_per_face) - tris_per_face, tris_per_face) + 1
+    first = face_first[tri_face]
+    corners = np.stack([first, first + tri_offset, first + tri_offset + 1], axis=1)
+    timings["faces"] = time.perf_counter() - t
+    t = time.perf_counter()
+
+    # --- (v, vt) ごとに頂点を分割してUVを頂点に1つだけ持たせる ---
+    if vt_idx is not None:
+        key = v_idx * (len(uvs) + 1) + vt_idx
+        unique_keys, corner_vertex = np.unique(key, return_inverse=True)
+        vertex_source = unique_keys // (len(uvs) + 1)
+        vertex_uvs = uvs[unique_keys % (len(uvs) + 1)]
+    else:
+        vertex_source = None
+        corner_vertex = v_idx
+        vertex_uvs = None
+
+    triangles = corner_vertex.reshape(-1)[corners].astype(np.int32)
+    out_vertices = vertices if vertex_source is None else vertices[vertex_source]
+    out_colors = None
+    if colors is not None:
+        out_colors = colors if vertex_source is None else colors[vertex_source]
+    out_normals = None
+    if vn_idx is not None:
+        out_normals = np.zeros((len(out_vertices), 3))
+        out_normals[corner_vertex] = normals[vn_idx]
+
+    material_ids = None
+    if materials:
+        material_ids = (np.cumsum(is_usemtl)[face_lines] - 1)[tri_face].astype(np.int32)
+    timings["build"] = time.perf_counter() - t
+
+    return {
+        "vertices": out_vertices,
+        "triangles": triangles,
+        "vertex_uvs": vertex_uvs,
+        "vertex_normals": out_normals,
+        "vertex_colors": out_colors,
+        "material_ids": material_ids,
+        "materials": materials,
+        "mtllibs": mtllibs,
+        "timings": timings,
+    }
+
+
+def load_obj_mesh(obj_file_path: str) -> "o3d.geometry.TriangleMesh":
+    """
+    OBJファイルを parse_obj で解析し、STLと同じOpen3Dのメッシュとして返す。
+    UVは triangle_uvs（三角形の頂点ごと）に格納される。
+    """
+    # parse_obj は numpy だけで動くように、Open3D はメッシュを組み立てるときに読み込む
+    import open3d as o3d
+
+    t = time.perf_counter()
+    parsed = parse_obj(obj_file_path)
+
+    t_build = time.perf_counter()
+    mesh = o3d.geometry.TriangleMesh()
+    mesh.vertices = o3d.utility.Vector3dVector(parsed["vertices"])
+    mesh.triangles = o3d.utility.Vector3iVector(parsed["triangles"])
+    if parsed["vertex_uvs"] is not None:
+        triangle_uvs = parsed["vertex_uvs"][parsed["triangles"]].reshape(-1, 2)
+        mesh.triangle_uvs = o3d.utility.Vector2dVector(triangle_uvs)
+    if parsed["vertex_normals"] is not None:
+        mesh.vertex_normals = o3d.utility.Vector3dVector(parsed["vertex_normals"])
+    if parsed["vertex_colors"] is not None:
+        mesh.vertex_colors = o3d.utility.Vector3dVector(parsed["vertex_colors"])
+    if parsed["material_ids"] is not None:
+        mesh.triangle_material_ids = o3d.utility.IntVector(parsed["material_ids"])
+    timings = parsed["timings"]
+    timings["open3d"] = time.perf_counter() - t_build
+
+    total = time.perf_counter() - t
+    detail = ", ".join(f"{k} {v:.2f}s" for k, v in timings.items())
+    print(f"[OBJ] {os.path.basename(obj_file_path)}: "
+          f"{len(parsed['vertices'])} vertices, {len(parsed['triangles'])} triangles "
+          f"in {total:.2f}s ({detail})")
+
+    return mesh
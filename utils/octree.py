@@ -0,0 +1,275 @@
+import heapq
+from collections import OrderedDict
+
+import numpy as np
+
+# ノードファイルの1点分のレコード（座標はoffsetからの相対値）
+NODE_DTYPE = np.dtype([("xyz", "<f4", (3,)), ("rgb", "u1", (3,))])
+
+
+def cube_bounds(mins: np.ndarray, maxs: np.ndarray):
+    """点群の範囲を包む立方体（ルートノード）の原点と一辺の長さを返す"""
+    size = float(np.max(maxs - mins))
+    size = size * 1.0001 if size > 0 else 1.0
+    return np.asarray(mins, dtype=np.float64), size
+
+
+def to_records(xyz: np.ndarray, colors, offset: np.ndarray) -> np.ndarray:
+    records = np.empty(len(xyz), dtype=NODE_DTYPE)
+    records["xyz"] = xyz - offset
+    if colors is not None:
+        records["rgb"] = np.clip(colors * 255.0 + 0.5, 0, 255)
+    else:
+        records["rgb"] = 255
+    return records
+
+
+def node_name(level: int, ijk) -> str:
+    """レベルとセル番号からノード名（"r" + 子番号の列）を作る"""
+    i, j, k = (int(v) for v in ijk)
+    digits = []
+    for bit in range(level - 1, -1, -1):
+        digits.append(str((((i >> bit) & 1) << 2) | (((j >> bit) & 1) << 1) | ((k >> bit) & 1)))
+    return "r" + "".join(digits)
+
+
+def node_bounds(level: int, ijk, offset: np.ndarray, size: float) -> list:
+    node_size = size / (2 ** level)
+    node_min = offset + np.asarray(ijk, dtype=np.float64) * node_size
+    return [*node_min.tolist(), *(node_min + node_size).tolist()]
+
+
+def grid_cells(xyz: np.ndarray, offset: np.ndarray, size: float, resolution: int) -> np.ndarray:
+    """点が属する計数グリッドのセル番号（i * R^2 + j * R + k）"""
+    ijk = np.floor((xyz - offset) * (resolution / size)).astype(np.int64)
+    np.clip(ijk, 0, resolution - 1, out=ijk)
+    return (ijk[:, 0] * resolution + ijk[:, 1]) * resolution + ijk[:, 2]
+
+
+def plan_chunks(counts: np.ndarray, resolution: int, max_chunk_points: int):
+    """
+    計数グリッドの点数から、1チャンクが max_chunk_points 以下になるようにオクツリーを上から分割する。
+    戻り値は (チャンク一覧 [(レベル, ijk, 点数)], セル→チャンク番号の配列)。
+    """
+    grid_level = int(np.log2(resolution))
+    pyramid = {grid_level: counts.reshape(resolution, resolution, resolution)}
+    for level in range(grid_level - 1, -1, -1):
+        n = 2 ** level
+        pyramid[level] = pyramid[level + 1].reshape(n, 2, n, 2, n, 2).sum(axis=(1, 3, 5))
+
+    chunks = []
+    stack = [(0, (0, 0, 0))]
+    while stack:
+        level, ijk = stack.pop()
+        count = int(pyramid[level][ijk])
+        if count == 0:
+            continue
+        if count <= max_chunk_points or level == grid_level:
+            chunks.append((level, ijk, count))
+            continue
+        for child in range(8):
+            child_ijk = (ijk[0] * 2 + (child >> 2 & 1), ijk[1] * 2 + (child >> 1 & 1), ijk[2] * 2 + (child & 1))
+            stack.append((level + 1, child_ijk))
+
+    cell_to_chunk = np.full((resolution,) * 3, -1, dtype=np.int32)
+    for chunk_id, (level, ijk, _) in enumerate(chunks):
+        s = 2 ** (grid_level - level)
+        cell_to_chunk[ijk[0] * s:(ijk[0] + 1) * s,
+                      ijk[1] * s:(ijk[1] + 1) * s,
+                      ijk[2] * s:(ijk[2] + 1) * s] = chunk_id
+    return chunks, cell_to_chunk.reshape(-1)
+
+
+def _voxel_sample(xyz: np.ndarray, node_min: np.ndarray, spacing: float, capacity: int) -> np.ndarray:
+    """ボクセルごとに先頭の1点を選ぶ（呼び出し側で点をシャッフルしておくことでランダム抽出になる）"""
+    vox = np.floor((xyz - node_min) / spacing).astype(np.int64)
+    vox -= vox.min(axis=0)
+    dims = vox.max(axis=0) + 1
+    key = (vox[:, 0] * dims[1] + vox[:, 1]) * dims[2] + vox[:, 2]
+    _, first = np.unique(key, return_index=True)
+    first.sort()
+    return first[:capacity]
+
+
+def build_subtree(records: np.ndarray, level: int, ijk, offset: np.ndarray, size: float,
+                  capacity: int, spacing: float, max_depth: int, save_node, rng=None) -> dict:
+    """
+    1チャンク分の点をメモリ上で上から振り分け、ノードごとに保存する。
+    各ノードはボクセル間引きした最大 capacity 点を持ち、残りを8つの子へ渡す（点はどれか1つのノードにだけ入る）。
+    """
+    rng = rng or np.random.default_rng(0)
+    records = records[rng.permutation(len(records))]
+    rel = records["xyz"].astype(np.float64)
+    nodes = {}
+
+    stack = [(level, tuple(ijk), np.arange(len(records)))]
+    while stack:
+        node_level, node_ijk, idx = stack.pop()
+        name = node_name(node_level, node_ijk)
+        node_size = size / (2 ** node_level)
+        node_min = np.asarray(node_ijk, dtype=np.float64) * node_size
+
+        if len(idx) <= capacity or node_level >= max_depth:
+            accepted = np.arange(len(idx))
+        else:
+            accepted = _voxel_sample(rel[idx], node_min, spacing / (2 ** node_level), capacity)
+
+        save_node(name, records[idx[accepted]])
+        nodes[name] = {
+            "level": node_level,
+            "bounds": node_bounds(node_level, node_ijk, offset, size),
+            "count": int(len(accepted)),
+            "children": [],
+        }
+
+        rest_mask = np.ones(len(idx), dtype=bool)
+        rest_mask[accepted] = False
+        rest = idx[rest_mask]
+        if len(rest) == 0:
+            continue
+
+        center = node_min + node_size / 2
+        bits = (rel[rest] >= center).astype(np.int64)
+        octant = bits[:, 0] << 2 | bits[:, 1] << 1 | bits[:, 2]
+        order = np.argsort(octant, kind="stable")
+        rest, octant = rest[order], octant[order]
+        splits = np.searchsorted(octant, np.arange(1, 8))
+        for child, child_idx in enumerate(np.split(rest, splits)):
+            if len(child_idx) == 0:
+                continue
+            child_ijk = (node_ijk[0] * 2 + (child >> 2 & 1),
+                         node_ijk[1] * 2 + (child >> 1 & 1),
+                         node_ijk[2] * 2 + (child & 1))
+            nodes[name]["children"].append(node_name(node_level + 1, child_ijk))
+            stack.append((node_level + 1, child_ijk, child_idx))
+
+    return nodes
+
+
+def _node_min_from_name(name: str, size: float) -> np.ndarray:
+    """ノード名からオフセット基準の最小座標を求める"""
+    node_min = np.zeros(3)
+    node_size = size
+    for digit in name[1:]:
+        node_size /= 2
+        child = int(digit)
+        node_min += node_size * np.array([child >> 2 & 1, child >> 1 & 1, child & 1])
+    return node_min
+
+
+def build_upper_levels(nodes: dict, chunk_names: list, offset: np.ndarray, size: float,
+                       capacity: int, spacing: float, load_node, save_node, rng=None):
+    """
+    チャンクより上のノードを下から順に作る。子ノードの点をボクセル間引きで親へ引き上げ、
+    引き上げた点は子から取り除く（各点がどれか1つのノードにだけ入る性質を保つ）。
+    """
+    rng = rng or np.random.default_rng(0)
+    upper = {name[:n] for name in chunk_names for n in range(1, len(name))}
+    for name in sorted(upper, key=len, reverse=True):
+        level = len(name) - 1
+        children = [name + str(c) for c in range(8) if name + str(c) in nodes]
+        child_records = [load_node(child) for child in children]
+        merged = np.concatenate(child_records) if child_records else np.empty(0, dtype=NODE_DTYPE)
+        owner = np.repeat(np.arange(len(children)), [len(r) for r in child_records])
+
+        order = rng.permutation(len(merged))
+        node_min = _node_min_from_name(name, size)
+        picked = order[_voxel_sample(merged["xyz"][order].astype(np.float64), node_min,
+                                     spacing / (2 ** level), capacity)] if len(merged) else order
+        taken = np.zeros(len(merged), dtype=bool)
+        taken[picked] = True
+
+        for i, child in enumerate(children):
+            keep = child_records[i][~taken[owner == i]]
+            if len(keep) != len(child_records[i]):
+                save_node(child, keep)
+                nodes[child]["count"] = int(len(keep))
+
+        save_node(name, merged[np.sort(picked)])
+        nodes[name] = {
+            "level": level,
+            "bounds": [*(offset + node_min).tolist(), *(offset + node_min + size / (2 ** level)).tolist()],
+            "count": int(len(picked)),
+            "children": children,
+        }
+
+
+def select_visible_nodes(metadata: dict, planes, camera_position, view_angle: float,
+                         viewport_height: int, point_budget: int, min_pixel_size: float = 150.0) -> list:
+    """
+    視錐台と交差するノードを、画面上で大きく見えるものから優先して点数の上限まで選ぶ。
+    planes は (a, b, c, d) の並び（内側が ax+by+cz+d >= 0）。
+    """
+    nodes = metadata["nodes"]
+    planes = np.asarray(planes, dtype=np.float64).reshape(-1, 4)
+    camera_position = np.asarray(camera_position, dtype=np.float64)
+    scale = viewport_height / (2.0 * np.tan(np.radians(view_angle) / 2.0))
+
+    def in_frustum(bounds):
+        lo, hi = np.asarray(bounds[:3]), np.asarray(bounds[3:])
+        far_corner = np.where(planes[:, :3] >= 0, hi, lo)
+        return bool(np.all(np.einsum("ij,ij->i", planes[:, :3], far_corner) + planes[:, 3] >= 0))
+
+    def projected_size(bounds):
+        lo, hi = np.asarray(bounds[:3]), np.asarray(bounds[3:])
+        radius = np.linalg.norm(hi - lo) / 2.0
+        distance = np.linalg.norm((lo + hi) / 2.0 - camera_position)
+        if distance <= radius:
+            return np.inf
+        return radius / distance * scale
+
+    selected = []
+    total = 0
+    heap = [(-np.inf, "r")] if "r" in nodes else []
+    while heap:
+        priority, name = heapq.heappop(heap)
+        node = nodes[name]
+        if not in_frustum(node["bounds"]):
+            continue
+        if total + node["count"] > point_budget and selected:
+            break
+        selected.append(name)
+        total += node["count"]
+        if -priority < min_pixel_size:
+            continue
+        for child in node["children"]:
+            heapq.heappush(heap, (-projected_size(nodes[child]["bounds"]), child))
+    return selected
+
+
+class OctreeNodeCache:
+    """ノードの点をLRUで保持し、合計サイズが max_bytes を超えたら古いものから捨てる"""
+
+    def __init__(self, load_node, offset, max_bytes: int = 1 << 30):
+        self.load_node = load_node
+        self.offset = np.asarray(offset, dtype=np.float64)
+        self.max_bytes = max_bytes
+        self._nodes = OrderedDict()
+        self._bytes = 0
+
+    def get(self, names: list):
+        """指定ノードの点を結合して (xyz, rgb) で返す。指定ノードは今回の追い出し対象から外す"""
+        records = []
+        for name in names:
+            if name in self._nodes:
+                self._nodes.move_to_end(name)
+            else:
+                self._nodes[name] = self.load_node(name)
+                self._bytes += self._nodes[name].nbytes
+            records.append(self._nodes[name])
+        self._evict(set(names))
+
+        merged = np.concatenate(records) if records else np.empty(0, dtype=NODE_DTYPE)
+        return merged["xyz"].astype(np.float64) + self.offset, merged["rgb"]
+
+    def _evict(self, pinned: set):
+        for name in list(self._nodes):
+            if self._bytes <= self.max_bytes:
+                break
+            if name in pinned:
+                continue
+            self._bytes -= self._nodes.pop(name).nbytes
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
@@ -0,0 +1,142 @@
+import numpy as np
+
+from utils.parametric_primitives import PRIMITIVES, generate_primitive
+
+# ==== 種類ごとの初期値（部材座標系の範囲 ex, ey, ez から）と形状として成り立つ条件 ====
+# 部材座標系: z は鉛直上向き、x は水平面内の主方向（幅・長さ）、y はそれに直交する水平方向（奥行き）
+
+_SEEDS = {
+    "tpillar": lambda ex, ey, ez: [ex, ez, 0.3 * ez, 0.5 * ez, 0.4 * ex, ey],
+    "i_girder": lambda ex, ey, ez: [ex, ez, ey, ey, 0.1 * ez, 0.1 * ez, 0.2 * ey],
+    "box_girder": lambda ex, ey, ez: [ex, ez, ey, 0.1 * ez, 0.1 * ey],
+    "cross_frame": lambda ex, ey, ez: [ex, ez, max(ey, 0.05 * ez)],
+    "bearing": lambda ex, ey, ez: [ex, ey, ez, 0.2 * ez],
+    "slab": lambda ex, ey, ez: [ex, ey, ez],
+}
+
+_VALID = {
+    "tpillar": lambda p1, p2, p3, p4, p5, p6: p5 <= p1 and p3 < p2 and p4 <= p2 - p3,
+    "i_girder": lambda length, height, tw, bw, tt, bt, web: tt + bt < height and web <= min(tw, bw),
+    "box_girder": lambda length, height, width, flange, web: 2 * flange < height and 2 * web < width,
+    "cross_frame": lambda width, height, member: member < min(width, height),
+    "bearing": lambda width, depth, height, plate: 2 * plate < height,
+    "slab": lambda length, width, thickness: True,
+}
+
+
+def member_frame(points: np.ndarray):
+    """点群の部材座標系（原点, 回転行列 R）を返す。ローカル座標は (points - 原点) @ R.T"""
+    origin = points.mean(axis=0)
+    xy = points[:, :2] - origin[:2]
+    _, vectors = np.linalg.eigh(xy.T @ xy)
+    vx, vy = vectors[:, 1]  # 固有値が最大の方向
+    R = np.array([[vx, vy, 0.0], [-vy, vx, 0.0], [0.0, 0.0, 1.0]])
+    return origin, R
+
+
+def point_triangle_distances(points: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """
+    点 (n,3) と三角形の組 (k,m,3,3) の距離を、組ごとに最も近い三角形で求めて (k,n) で返す。
+    (k,m,n,3) の配列は ap だけにして、残りは内積から二乗距離を求める。
+    """
+    a = triangles[:, :, 0]
+    ab = triangles[:, :, 1] - a
+    ac = triangles[:, :, 2] - a
+    normal = np.cross(ab, ac)
+    d00 = np.einsum("kmj,kmj->km", ab, ab)[..., None]
+    d01 = np.einsum("kmj,kmj->km", ab, ac)[..., None]
+    d11 = np.einsum("kmj,kmj->km", ac, ac)[..., None]
+    nn = np.einsum("kmj,kmj->km", normal, normal)[..., None]
+
+    ap = points[None, None, :, :] - a[:, :, None, :]
+    d20 = np.einsum("kmij,kmj->kmi", ap, ab)
+    d21 = np.einsum("kmij,kmj->kmi", ap, ac)
+    dn = np.einsum("kmij,kmj->kmi", ap, normal)
+    app = np.einsum("kmij,kmij->kmi", ap, ap)
+    del ap
+
+    # 平面への射影が三角形の内側なら平面までの距離
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v = (d11 * d20 - d01 * d21) / nn
+        w = (d00 * d21 - d01 * d20) / nn
+        inside = (v >= 0) & (w >= 0) & (v + w <= 1) & (nn > 0)
+        plane_sq = dn ** 2 / nn
+
+    # 外側なら3辺までの距離の最小値（点と線分: |p - s|² - 2t (p - s)·d + t²|d|²）
+    def segment_sq(ps_sq, ps_d, d_sq):
+        t = np.clip(ps_d / np.maximum(d_sq, 1e-300), 0, 1)
+        return ps_sq - 2 * t * ps_d + t ** 2 * d_sq
+
+    edge_sq = np.minimum(segment_sq(app, d20, d00), segment_sq(app, d21, d11))
+    edge_sq = np.minimum(edge_sq, segment_sq(app - 2 * d20 + d00, d21 - d20 - d01 + d00, d11 - 2 * d01 + d00))
+    distance_sq = np.where(inside, plane_sq, edge_sq).min(axis=1)
+    return np.sqrt(np.maximum(distance_sq, 0))
+
+
+def _evaluate(kind: str, candidates: list, local: np.ndarray, center: np.ndarray, extents: np.ndarray,
+              truncation: float,
+              max_elements: int = 4_000_000) -> np.ndarray:
+    """候補パラメータをまとめて評価し、点→メッシュの打ち切り二乗距離の平均（+範囲のはみ出し）を返す（成り立たない形状は inf）"""
+    costs = np.full(len(candidates), np.inf)
+    valid = [i for i, params in enumerate(candidates) if min(params) > 0 and _VALID[kind](*params)]
+    if not valid:
+        return costs
+
+    triangles, overshoot = [], []
+    for i in valid:
+        vertices, faces = generate_primitive(kind, candidates[i])
+        # メッシュの範囲の中心を点群の範囲の中心に置く
+        lo, hi = vertices.min(axis=0), vertices.max(axis=0)
+        triangles.append((vertices + (center - (lo + hi) / 2))[faces])
+        # 点のない所までメッシュが伸びても点→メッシュ距離は増えないので、点群の範囲からのはみ出しを罰する
+        overshoot.append(np.sum(np.maximum(hi - lo - extents, 0) ** 2))
+    triangles = np.stack(triangles)
+    costs[valid] = overshoot
+
+    batch = max(1, max_elements // (triangles.shape[1] * len(local)))
+    for start in range(0, len(valid), batch):
+        distances = point_triangle_distances(local, triangles[start:start + batch])
+        costs[valid[start:start + batch]] += np.mean(np.minimum(distances, truncation) ** 2, axis=1)
+    return costs
+
+
+def estimate_parameters(points: np.ndarray, kind: str, initial=None, max_points: int = 500,
+                        max_iter: int = 100, tol: float = 5e-3, rng=None):
+    """
+    切り出した点群からプリミティブのパラメータを推定する。
+    部材座標系での範囲（OBB）から初期値を作り、各パラメータを ± step ずらした候補と
+    ランダムな候補をまとめて評価するパターン探索で、点→メッシュ距離を最小化する。
+    戻り値は (パラメータのリスト, 残差の二乗平均, 部材座標系の (原点, R))。
+    """
+    if kind not in PRIMITIVES:
+        raise ValueError(f"未対応のプリミティブです: {kind}")
+    rng = rng or np.random.default_rng(0)
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 10:
+        raise ValueError(f"パラメータ推定には点が少なすぎます（{len(points)} 点）")
+    if len(points) > max_points:
+        points = points[rng.choice(len(points), max_points, replace=False)]
+
+    origin, R = member_frame(points)
+    local = (points - origin) @ R.T
+    lo, hi = np.percentile(local, 1, axis=0), np.percentile(local, 99, axis=0)
+    center, extents = (lo + hi) / 2, np.maximum(hi - lo, 1e-6)
+    truncation = 0.1 * float(np.linalg.norm(extents))
+
+    x = np.asarray(initial if initial is not None else _SEEDS[kind](*extents), dtype=np.float64)
+    cost = _evaluate(kind, [x], local, center, extents, truncation)[0]
+    step = 0.25 * x
+    n = len(x)
+    for _ in range(max_iter):
+        if np.all(step < tol * np.maximum(x, 1e-9)):
+            break
+        candidates = [x + sign * step[i] * np.eye(n)[i] for i in range(n) for sign in (1, -1)]
+        candidates += list(x + step * rng.normal(0.0, 0.5, (n, n)))
+        costs = _evaluate(kind, candidates, local, center, extents, truncation)
+        best = int(np.argmin(costs))
+        if costs[best] < cost:
+            x, cost = candidates[best], costs[best]
+        else:
+            step *= 0.5
+
+    return [float(v) for v in x], float(cost), (origin, R)
@@ -0,0 +1,71 @@
+import numpy as np
+import open3d as o3d
+
+from utils.align_by_obb import obb_alignment_transform
+from utils.fit_metrics import compute_fit_metrics
+from utils.gicp import run_gicp, run_multiscale_gicp
+from utils.global_registration import run_global_registration
+from utils.registration_target import RegistrationTarget
+
+def crop_target(target: RegistrationTarget, model: o3d.geometry.TriangleMesh, seed_point=None,
+                roi: o3d.geometry.OrientedBoundingBox = None, roi_margin: float = 0.5,
+                min_points: int = 100) -> RegistrationTarget:
+    """部材周辺の点だけを切り出す。点が少なすぎる場合は点群全体を使う"""
+    scale = 1.0 + roi_margin
+    if roi is not None:
+        bounds = o3d.geometry.OrientedBoundingBox(roi.center, roi.R, np.asarray(roi.extent) * scale)
+        center, radius = bounds.center, np.linalg.norm(bounds.extent) / 2
+    else:
+        # 向きが未確定なので、モデルの対角長を直径とする球で切り出す
+        bounds = None
+        center = seed_point
+        radius = np.linalg.norm(model.get_max_bound() - model.get_min_bound()) / 2 * scale
+
+    cropped = target.crop(center, radius, bounds)
+    n = len(cropped.pcd.points)
+    if n < min_points:
+        print(f"[ROI] 切り出した点が少ないため（{n} 点）点群全体を使います")
+        return target
+    print(f"[ROI] {len(target.pcd.points)} 点 → {n} 点に切り出しました")
+    return cropped
+
+def fit_parametric_model(model: o3d.geometry.TriangleMesh, target: RegistrationTarget, seed_point=None,
+                         roi: o3d.geometry.OrientedBoundingBox = None, roi_margin: float = 0.5,
+                         multiscale: bool = True, threshold: float = 0.05, sample_count: int = 10000,
+                         min_fitness: float = 0.5) -> dict:
+    """
+    OBB合わせ → GICP でモデルを点群に位置合わせする（model はその場で変換される）。
+    GICP後の fitness が min_fitness 未満なら、OBBの向きの誤り（反転など）を疑って
+    FPFH + RANSAC の大域位置合わせから GICP をやり直し、良い方を採用する。
+    戻り値は {"transform": 生成時の座標系からの変換(4x4), "fitness", "rmse", "metrics": compute_fit_metrics の結果}。
+    """
+    if seed_point is not None or roi is not None:
+        target = crop_target(target, model, seed_point, roi, roi_margin)
+
+    T_align = obb_alignment_transform(target.pcd, model)
+    model.transform(T_align)
+
+    # メッシュを点群化してGICPで微調整
+    model_pcd = model.sample_points_uniformly(sample_count)
+    if multiscale:
+        T = run_multiscale_gicp(model_pcd, target, threshold=threshold)
+    else:
+        T = run_gicp(model_pcd, target, threshold=threshold)
+    evaluation = o3d.pipelines.registration.evaluate_registration(model_pcd, target.pcd, threshold, T)
+
+    if evaluation.fitness < min_fitness:
+        T_global = run_global_registration(model_pcd, target)
+        if T_global is not None:
+            T_refined = run_multiscale_gicp(model_pcd, target, threshold=threshold, init=T_global)
+            refined = o3d.pipelines.registration.evaluate_registration(model_pcd, target.pcd, threshold, T_refined)
+            print(f"[Fit] 大域位置合わせ: fitness {evaluation.fitness:.3f} → {refined.fitness:.3f}")
+            if refined.fitness > evaluation.fitness:
+                T, evaluation = T_refined, refined
+    model.transform(T)
+
+    return {
+        "transform": T @ T_align,
+        "fitness": evaluation.fitness,
+        "rmse": evaluation.inlier_rmse,
+        "metrics": compute_fit_metrics(model, target, threshold),
+    }
@@ -0,0 +1,191 @@
+from functools import lru_cache
+
+import numpy as np
+
+# ==== インデックステンプレート（パラメータに依存しない部分は定数として一度だけ作る） ====
+
+# T型橋脚: 表面12点の三角形
+_TPILLAR_FRONT_FACES = np.array([
+    [0, 1, 2], [1, 3, 2], [2, 5, 4], [3, 7, 6], [2, 3, 9],
+    [3, 10, 9], [4, 5, 8], [5, 9, 8], [6, 7, 10], [7, 11, 10]])
+# T型橋脚: 左側面・右側面・上下面
+_TPILLAR_SIDE_FACES = np.array([
+    [0, 2, 12], [12, 2, 14], [4, 14, 2], [4, 16, 14], [4, 8, 20], [4, 20, 16],   # 左側面
+    [1, 13, 3], [13, 15, 3], [7, 3, 15], [7, 15, 19], [7, 23, 11], [7, 19, 23],  # 右側面
+    [8, 11, 20], [20, 11, 23], [0, 12, 13], [0, 13, 1]])                         # 上下面
+_TPILLAR_FACES = np.vstack([
+    _TPILLAR_FRONT_FACES,
+    _TPILLAR_FRONT_FACES[:, ::-1] + 12,  # 裏面は向きを反転
+    _TPILLAR_SIDE_FACES,
+]).astype(np.int32)
+
+# I形断面（12点, 反時計回り）の端面三角形
+_I_SECTION_CAP = np.array([
+    [0, 1, 2], [0, 2, 3], [0, 3, 10], [0, 10, 11],  # 下フランジ
+    [10, 3, 4], [10, 4, 9],                          # ウェブ
+    [7, 8, 9], [7, 9, 4], [7, 4, 5], [7, 5, 6]])     # 上フランジ
+_I_SECTION_LOOPS = [np.arange(12)]
+
+# 箱形断面（外周4点 反時計回り + 内周4点）の端面三角形
+_BOX_SECTION_CAP = np.array([
+    [0, 1, 5], [0, 5, 4],
+    [1, 2, 6], [1, 6, 5],
+    [2, 3, 7], [2, 7, 6],
+    [3, 0, 4], [3, 4, 7]])
+_BOX_SECTION_LOOPS = [np.arange(4), np.array([7, 6, 5, 4])]  # 内周は時計回りにして面を外向きにする
+
+# 直方体: 8頂点の符号（頂点番号 = bx + 2*by + 4*bz）と外向きの12三角形
+_BOX_SIGNS = np.array([[(c >> a & 1) * 2 - 1 for a in range(3)] for c in range(8)], dtype=np.float64)
+_BOX_FACES = np.array([
+    [0, 4, 6], [0, 6, 2],  # -x
+    [1, 3, 7], [1, 7, 5],  # +x
+    [0, 1, 5], [0, 5, 4],  # -y
+    [2, 6, 7], [2, 7, 3],  # +y
+    [0, 2, 3], [0, 3, 1],  # -z
+    [4, 5, 7], [4, 7, 6]])  # +z
+
+
+def _freeze(vertices: np.ndarray, triangles: np.ndarray):
+    """キャッシュした配列が呼び出し側で書き換えられないように読み取り専用にする"""
+    vertices = np.ascontiguousarray(vertices, dtype=np.float64)
+    triangles = np.ascontiguousarray(triangles, dtype=np.int32)
+    vertices.flags.writeable = False
+    triangles.flags.writeable = False
+    return vertices, triangles
+
+
+def _extrude(profile: np.ndarray, loops: list, cap: np.ndarray, length: float):
+    """
+    (y, z) 平面の断面を x 方向に length だけ押し出す。
+    profile は反時計回り（+x 側から見て）、穴の周回は時計回りで渡す。
+    """
+    n = len(profile)
+    vertices = np.zeros((2 * n, 3))
+    vertices[:n, 1:] = profile
+    vertices[n:, 1:] = profile
+    vertices[n:, 0] = length
+
+    sides = []
+    for loop in loops:
+        i = loop
+        j = np.roll(loop, -1)
+        sides.append(np.stack([i, j, j + n], axis=1))
+        sides.append(np.stack([i, j + n, i + n], axis=1))
+
+    triangles = np.vstack([cap[:, ::-1], cap + n, *sides])
+    return vertices, triangles
+
+
+def _boxes(centers: np.ndarray, axes: np.ndarray, half_sizes: np.ndarray):
+    """k個の直方体（中心, 軸方向 (k,3,3), 半分の辺長 (k,3)）をまとめて作る"""
+    k = len(centers)
+    corners = centers[:, None, :] + np.einsum("ca,ka,kad->kcd", _BOX_SIGNS, half_sizes, axes)
+    triangles = _BOX_FACES[None, :, :] + (8 * np.arange(k))[:, None, None]
+    return corners.reshape(-1, 3), triangles.reshape(-1, 3)
+
+
+def _bars(starts: np.ndarray, ends: np.ndarray, width: float, thickness: float):
+    """始点・終点を結ぶ角材（断面 width × thickness）をまとめて作る。断面の thickness 方向は y 軸"""
+    direction = ends - starts
+    length = np.linalg.norm(direction, axis=1)
+    d = direction / length[:, None]
+    y = np.broadcast_to(np.array([0.0, 1.0, 0.0]), d.shape)
+    side = np.cross(y, d)
+    side /= np.linalg.norm(side, axis=1)[:, None]
+    up = np.cross(d, side)
+    axes = np.stack([d, side, up], axis=1)
+    half = np.column_stack([length / 2, np.full(len(d), width / 2), np.full(len(d), thickness / 2)])
+    return _boxes((starts + ends) / 2, axes, half)
+
+
+# ==== プリミティブ ====
+
+@lru_cache(maxsize=256)
+def tpillar(p1: float, p2: float, p3: float, p4: float, p5: float, p6: float):
+    """T型橋脚（p1: 梁幅, p2: 全高, p3: 梁高, p4: 柱高, p5: 柱幅, p6: 奥行き）"""
+    overhang = (p1 - p5) / 2
+    front = np.array([
+        [0, 0, 0], [p5, 0, 0], [0, 0, p4], [p5, 0, p4],
+        [-overhang, 0, p2 - p3], [0, 0, p2 - p3], [p5, 0, p2 - p3], [p5 + overhang, 0, p2 - p3],
+        [-overhang, 0, p2], [0, 0, p2], [p5, 0, p2], [p5 + overhang, 0, p2]])
+    vertices = np.vstack([front, front + [0, p6, 0]])
+    return _freeze(vertices, _TPILLAR_FACES)
+
+
+@lru_cache(maxsize=256)
+def i_girder(length: float, height: float, top_width: float, bottom_width: float,
+             top_thickness: float, bottom_thickness: float, web_thickness: float):
+    """I形断面の桁（主桁・横桁）。x 方向に length、断面は y（幅）, z（高さ）"""
+    bt, bb, tw = top_width / 2, bottom_width / 2, web_thickness / 2
+    tb, zt = bottom_thickness, height - top_thickness
+    profile = np.array([
+        [-bb, 0], [bb, 0], [bb, tb], [tw, tb], [tw, zt], [bt, zt],
+        [bt, height], [-bt, height], [-bt, zt], [-tw, zt], [-tw, tb], [-bb, tb]])
+    return _freeze(*_extrude(profile, _I_SECTION_LOOPS, _I_SECTION_CAP, length))
+
+
+@lru_cache(maxsize=256)
+def box_girder(length: float, height: float, width: float, flange_thickness: float, web_thickness: float):
+    """箱桁。x 方向に length、断面は外形 width × height の中空矩形"""
+    w, tw, tf = width / 2, web_thickness, flange_thickness
+    profile = np.array([
+        [-w, 0], [w, 0], [w, height], [-w, height],
+        [-w + tw, tf], [w - tw, tf], [w - tw, height - tf], [-w + tw, height - tf]])
+    return _freeze(*_extrude(profile, _BOX_SECTION_LOOPS, _BOX_SECTION_CAP, length))
+
+
+@lru_cache(maxsize=256)
+def cross_frame(width: float, height: float, member_size: float):
+    """X形の対傾構（上弦材・下弦材・斜材2本）。x-z 平面内に幅 width、高さ height"""
+    starts = np.array([[0, 0, height], [0, 0, 0], [0, 0, 0], [0, 0, height]], dtype=np.float64)
+    ends = np.array([[width, 0, height], [width, 0, 0], [width, 0, height], [width, 0, 0]], dtype=np.float64)
+    return _freeze(*_bars(starts, ends, member_size, member_size))
+
+
+@lru_cache(maxsize=256)
+def bearing(width: float, depth: float, height: float, plate_thickness: float):
+    """支承（下沓・本体・上沓の3段）。底面中心が原点"""
+    body_height = height - 2 * plate_thickness
+    centers = np.array([
+        [0, 0, plate_thickness / 2],
+        [0, 0, plate_thickness + body_height / 2],
+        [0, 0, height - plate_thickness / 2]])
+    half = np.array([
+        [width / 2, depth / 2, plate_thickness / 2],
+        [width * 0.4, depth * 0.4, body_height / 2],
+        [width / 2, depth / 2, plate_thickness / 2]])
+    axes = np.broadcast_to(np.eye(3), (3, 3, 3))
+    return _freeze(*_boxes(centers, axes, half))
+
+
+@lru_cache(maxsize=256)
+def slab(length: float, width: float, thickness: float):
+    """床版（直方体）。x 方向に length、y 方向に width、下面が z=0"""
+    centers = np.array([[length / 2, 0, thickness / 2]])
+    half = np.array([[length / 2, width / 2, thickness / 2]])
+    return _freeze(*_boxes(centers, np.eye(3)[None], half))
+
+
+# 種類名 → (生成関数, パラメータ名)
+PRIMITIVES = {
+    "tpillar": (tpillar, ("p1", "p2", "p3", "p4", "p5", "p6")),
+    "i_girder": (i_girder, ("length", "height", "top_width", "bottom_width",
+                            "top_thickness", "bottom_thickness", "web_thickness")),
+    "box_girder": (box_girder, ("length", "height", "width", "flange_thickness", "web_thickness")),
+    "cross_frame": (cross_frame, ("width", "height", "member_size")),
+    "bearing": (bearing, ("width", "depth", "height", "plate_thickness")),
+    "slab": (slab, ("length", "width", "thickness")),
+}
+
+
+def generate_primitive(kind: str, params):
+    """
+    プリミティブの (頂点, 三角形) を返す。同じパラメータの結果はキャッシュされる。
+    戻り値の配列は読み取り専用なので、変形する場合はコピーして使う。
+    """
+    if kind not in PRIMITIVES:
+        raise ValueError(f"未対応のプリミティブです: {kind}")
+    func, names = PRIMITIVES[kind]
+    if len(params) != len(names):
+        raise ValueError(f"{kind} のパラメータは {len(names)} 個必要です: {', '.join(names)}")
+    return func(*(float(p) for p in params))
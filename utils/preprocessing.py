@@ -0,0 +1,154 @@
+import time
+
+import numpy as np
+import open3d as o3d
+
+# ==== 前処理パイプライン ====
+# パイプラインは {"type": 種類, ...パラメータ} のリスト（プロジェクト属性にJSONのまま保存できる）
+#   {"type": "crop_box", "min": [x, y, z], "max": [x, y, z]}
+#   {"type": "voxel_downsample", "voxel_size": 0.02}
+#   {"type": "statistical_outlier", "nb_neighbors": 20, "std_ratio": 2.0}
+#   {"type": "radius_outlier", "nb_points": 16, "radius": 0.05}
+#   {"type": "estimate_normals", "radius": 0.1, "max_nn": 30}
+# 先頭から続く crop_box と1つ目の voxel_downsample までは読み込みながらチャンク単位で処理する。
+
+STAGE_TYPES = ("crop_box", "voxel_downsample", "statistical_outlier", "radius_outlier", "estimate_normals")
+_STREAMING_TYPES = ("crop_box", "voxel_downsample")
+
+
+def validate_pipeline(pipeline: list):
+    for stage in pipeline:
+        if stage.get("type") not in STAGE_TYPES:
+            raise ValueError(f"未対応の前処理です: {stage.get('type')}（{', '.join(STAGE_TYPES)}）")
+
+
+def split_streaming_stages(pipeline: list):
+    """チャンク単位で処理できる先頭部分と、点群全体が必要な残りに分ける"""
+    count = 0
+    for stage in pipeline:
+        if stage["type"] not in _STREAMING_TYPES:
+            break
+        count += 1
+        if stage["type"] == "voxel_downsample":
+            break
+    return pipeline[:count], pipeline[count:]
+
+
+class VoxelAccumulator:
+    """
+    原点を固定したボクセルグリッドで、チャンクごとに座標と色の和・点数を集計する。
+    同じボクセルが複数のチャンクにまたがっても最後に合算するので、チャンクの分け方によらず
+    このグリッドで全点を一度に集計した場合と同じ結果になる（Open3D の voxel_down_sample とはグリッドの原点が違うため一致しない）。
+    """
+
+    def __init__(self, voxel_size: float, compact_rows: int = 4_000_000):
+        self.voxel_size = voxel_size
+        self.compact_rows = compact_rows
+        self._parts = []
+        self._rows = 0
+
+    def add(self, xyz: np.ndarray, colors):
+        if len(xyz) == 0:
+            return
+        keys = np.floor(xyz / self.voxel_size).astype(np.int64)
+        values = np.hstack([xyz, colors if colors is not None else np.zeros_like(xyz), np.ones((len(xyz), 1))])
+        self._parts.append(self._reduce(keys, values))
+        self._rows += len(self._parts[-1][0])
+        if self._rows > self.compact_rows:
+            self._parts = [self._reduce(*self._merged())]
+            self._rows = len(self._parts[0][0])
+
+    def result(self, has_colors: bool):
+        if not self._parts:
+            return np.empty((0, 3)), (np.empty((0, 3)) if has_colors else None)
+        _, values = self._reduce(*self._merged())
+        mean = values[:, :6] / values[:, 6:7]
+        return mean[:, :3], (mean[:, 3:6] if has_colors else None)
+
+    def _merged(self):
+        return np.concatenate([k for k, _ in self._parts]), np.concatenate([v for _, v in self._parts])
+
+    @staticmethod
+    def _reduce(keys: np.ndarray, values: np.ndarray):
+        """同じボクセルの行を合算する（ボクセル番号を1つの整数にしてから np.unique / bincount）"""
+        mins = keys.min(axis=0)
+        dims = keys.max(axis=0) - mins + 1
+        linear = ((keys[:, 0] - mins[0]) * dims[1] + (keys[:, 1] - mins[1])) * dims[2] + (keys[:, 2] - mins[2])
+        _, first, inverse = np.unique(linear, return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        sums = np.stack([np.bincount(inverse, weights=values[:, c], minlength=len(first))
+                         for c in range(values.shape[1])], axis=1)
+        return keys[first], sums
+
+
+def _crop_mask(xyz: np.ndarray, stage: dict) -> np.ndarray:
+    return np.all((xyz >= np.asarray(stage["min"])) & (xyz <= np.asarray(stage["max"])), axis=1)
+
+
+def run_streaming_stages(chunks, stages: list, report) -> o3d.geometry.PointCloud:
+    """(xyz, colors) のチャンク列にチャンク単位の前処理を適用し、1つの点群にまとめる"""
+    timings = {i: 0.0 for i in range(len(stages))}
+    counts_in = [0] * len(stages)
+    counts_out = [0] * len(stages)
+    accumulator = None
+    if stages and stages[-1]["type"] == "voxel_downsample":
+        accumulator = VoxelAccumulator(float(stages[-1]["voxel_size"]))
+
+    kept_xyz, kept_colors = [], []
+    has_colors = False
+    for xyz, colors in chunks:
+        has_colors = has_colors or colors is not None
+        for i, stage in enumerate(stages):
+            t = time.perf_counter()
+            counts_in[i] += len(xyz)
+            if stage["type"] == "crop_box":
+                mask = _crop_mask(xyz, stage)
+                xyz = xyz[mask]
+                colors = colors[mask] if colors is not None else None
+                counts_out[i] += len(xyz)
+            else:
+                accumulator.add(xyz, colors)
+            timings[i] += time.perf_counter() - t
+        if accumulator is None:
+            kept_xyz.append(xyz)
+            kept_colors.append(colors)
+
+    if accumulator is not None:
+        t = time.perf_counter()
+        xyz, colors = accumulator.result(has_colors)
+        timings[len(stages) - 1] += time.perf_counter() - t
+        counts_out[-1] = len(xyz)
+    else:
+        xyz = np.concatenate(kept_xyz) if kept_xyz else np.empty((0, 3))
+        colors = np.concatenate(kept_colors) if has_colors and kept_xyz else None
+
+    for i, stage in enumerate(stages):
+        report(stage["type"], counts_in[i], counts_out[i], timings[i])
+
+    pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(xyz))
+    if colors is not None:
+        pcd.colors = o3d.utility.Vector3dVector(colors)
+    return pcd
+
+
+def run_stage(pcd: o3d.geometry.PointCloud, stage: dict) -> o3d.geometry.PointCloud:
+    """点群全体に対して1段の前処理を行う"""
+    kind = stage["type"]
+    if kind == "crop_box":
+        box = o3d.geometry.AxisAlignedBoundingBox(np.asarray(stage["min"], dtype=np.float64),
+                                                  np.asarray(stage["max"], dtype=np.float64))
+        return pcd.crop(box)
+    if kind == "voxel_downsample":
+        return pcd.voxel_down_sample(float(stage["voxel_size"]))
+    if kind == "statistical_outlier":
+        filtered, _ = pcd.remove_statistical_outlier(int(stage.get("nb_neighbors", 20)),
+                                                     float(stage.get("std_ratio", 2.0)))
+        return filtered
+    if kind == "radius_outlier":
+        filtered, _ = pcd.remove_radius_outlier(int(stage.get("nb_points", 16)), float(stage["radius"]))
+        return filtered
+    if kind == "estimate_normals":
+        pcd.estimate_normals(o3d.geometry.KDTreeSearchParamHybrid(radius=float(stage.get("radius", 0.1)),
+                                                                  max_nn=int(stage.get("max_nn", 30))))
+        return pcd
+    raise ValueError(f"未対応の前処理です: {kind}")
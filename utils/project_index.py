@@ -0,0 +1,58 @@
+import json
+import os
+
+from geometry_manager.project_model import ProjectModel
+from repository.project_repository import ATTRIBUTES_FILE, JOURNAL_FILE, read_attributes
+from repository.sqlite_project_repository import DATABASE_FILE, read_project
+
+# プロジェクトの内容が変わったかの判定に使うファイル（どれかの更新日時・サイズが変われば読み直す）
+_PROJECT_FILES = (ATTRIBUTES_FILE, JOURNAL_FILE, DATABASE_FILE)
+
+def find_projects(root: str) -> list:
+    """
+    root 以下のプロジェクトフォルダ（project_attributes.json か project.sqlite のあるフォルダ）を探す。
+    プロジェクトフォルダの中（画像・モデルのコピーなど）と隠しフォルダはたどらない。
+    """
+    projects = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        if ATTRIBUTES_FILE in file_names or DATABASE_FILE in file_names:
+            projects.append(os.path.normpath(os.path.abspath(dir_path)))
+            dir_names[:] = []
+            continue
+        dir_names[:] = sorted(name for name in dir_names if not name.startswith("."))
+    return projects
+
+def project_stamp(project_path: str) -> str:
+    """プロジェクトのファイルの (名前, 更新日時, サイズ) を並べた文字列"""
+    stamp = []
+    for name in _PROJECT_FILES:
+        try:
+            stat = os.stat(os.path.join(project_path, name))
+        except FileNotFoundError:
+            continue
+        stamp.append([name, stat.st_mtime_ns, stat.st_size])
+    return json.dumps(stamp)
+
+def _value_text(value) -> str:
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+def extract_project(project_path: str) -> dict:
+    """
+    プロジェクト1つ分の索引の内容を読む（ワーカープロセス内で実行）。ファイルは書き換えない。
+    戻り値は {"path", "stamp", "name", "nodes": [(階層のパス, 属性 {名前: 値の文字列}), ...]}。
+    """
+    # 読んでいる間に更新された場合は次回の更新で読み直されるよう、読む前の状態を記録する
+    stamp = project_stamp(project_path)
+    if os.path.exists(os.path.join(project_path, DATABASE_FILE)):
+        # 他のプロジェクトのデータベースなので読み取り専用で開く（表の作成・形式の更新もしない）
+        attributes = read_project(project_path)
+    else:
+        attributes, _ = read_attributes(project_path)
+
+    model = ProjectModel(attributes)
+    nodes = []
+    for node in model.iter_nodes():
+        values = node.data.get("attributes") or {}
+        nodes.append((list(node.path), {name: _value_text(value) for name, value in values.items()}))
+    name = (attributes.get("project_info") or {}).get("name") or os.path.basename(project_path)
+    return {"path": project_path, "stamp": stamp, "name": name, "nodes": nodes}
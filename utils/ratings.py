@@ -0,0 +1,12 @@
+# 点検の判定区分（良い順）。「C以上」のような検索で、指定した区分より悪いものをまとめて探すのに使う
+RATING_SCALES = [
+    ["A", "B", "C", "C1", "C2", "E", "E1", "E2"],  # 対策区分
+    ["I", "II", "III", "IV"],                      # 健全性の診断
+]
+
+def ratings_at_least(rating: str) -> list:
+    """rating と、それより悪い判定区分のリスト（未知の区分はそれ自身だけ）"""
+    for scale in RATING_SCALES:
+        if rating in scale:
+            return scale[scale.index(rating):]
+    return [rating]
@@ -0,0 +1,157 @@
+import hashlib
+import os
+
+import numpy as np
+import open3d as o3d
+
+from utils.spatial_index import SpatialIndex, get_spatial_index
+
+# 法線・共分散の保存先（プロジェクトフォルダ内）。プロジェクト設定 settings.registration_cache が true のときだけ使う
+REGISTRATION_CACHE_DIR = ".registration_cache"
+
+def registration_cache_dir(project_path: str, attributes: dict):
+    """プロジェクトの設定で法線・共分散の保存が有効なら保存先のフォルダ、無効なら None"""
+    if not project_path or not (attributes or {}).get("settings", {}).get("registration_cache"):
+        return None
+    return os.path.join(project_path, REGISTRATION_CACHE_DIR)
+
+class RegistrationTarget:
+    """
+    位置合わせの対象点群について、法線・共分散・KD木を一度だけ計算して使い回す。
+    元の点群は変更せず、解像度（ボクセルサイズ）ごとに計算済みのコピーを保持する。
+    """
+
+    def __init__(self, pcd: o3d.geometry.PointCloud, persist_path: str = None, max_nn: int = 30,
+                 index: SpatialIndex = None):
+        self.pcd = pcd
+        self.persist_path = persist_path
+        self.max_nn = max_nn
+        self._levels = {}
+        self._features = {}
+        self._index = index
+        # crop で作った場合の元の RegistrationTarget と切り出し範囲（特徴量は元の計算結果から切り出す）
+        self._parent = None
+        self._region = None
+
+    def level(self, voxel_size: float = None, radius: float = None) -> o3d.geometry.PointCloud:
+        """ボクセルサイズに応じた法線・共分散付きの点群（None はフル解像度）"""
+        key = None if voxel_size is None else round(float(voxel_size), 9)
+        if key in self._levels:
+            return self._levels[key]
+
+        if voxel_size is None:
+            cloud = o3d.geometry.PointCloud(self.pcd)
+            if not self._load_persisted(cloud):
+                self._estimate(cloud, radius)
+                self._save_persisted(cloud)
+        else:
+            cloud = self.pcd.voxel_down_sample(voxel_size)
+            self._estimate(cloud, radius or 2.0 * voxel_size)
+
+        self._levels[key] = cloud
+        return cloud
+
+    def features(self, voxel_size: float):
+        """
+        ボクセルサイズごとの (ダウンサンプリングした点群, FPFH特徴量)。
+        crop で作った場合は元の点群の計算結果から範囲内の点だけを取り出すので、同じ点群で何度フィットしても計算は1回で済む。
+        """
+        key = round(float(voxel_size), 9)
+        if key in self._features:
+            return self._features[key]
+
+        if self._parent is not None:
+            down, fpfh = self._parent.features(voxel_size)
+            center, radius, bounds = self._region
+            points = np.asarray(down.points)
+            idx = np.flatnonzero(np.linalg.norm(points - center, axis=1) <= radius)
+            if bounds is not None and len(idx):
+                inside = bounds.get_point_indices_within_bounding_box(o3d.utility.Vector3dVector(points[idx]))
+                idx = idx[np.asarray(inside, dtype=np.int64)]
+            cropped = o3d.pipelines.registration.Feature()
+            cropped.data = np.ascontiguousarray(fpfh.data[:, idx])
+            result = (down.select_by_index(idx.tolist()), cropped)
+        else:
+            down = self.level(voxel_size)
+            fpfh = o3d.pipelines.registration.compute_fpfh_feature(
+                down, o3d.geometry.KDTreeSearchParamHybrid(radius=5.0 * voxel_size, max_nn=100))
+            result = (down, fpfh)
+
+        self._features[key] = result
+        return result
+
+    @property
+    def index(self) -> SpatialIndex:
+        """フル解像度の点群の空間インデックス（KD木は最初の問い合わせのときに作る）"""
+        if self._index is None:
+            self._index = SpatialIndex(self.pcd)
+        return self._index
+
+    def crop(self, center, radius: float, bounds: o3d.geometry.OrientedBoundingBox = None) -> "RegistrationTarget":
+        """
+        center から radius 以内（bounds を渡した場合はさらにその箱の内側）の点だけを持つ RegistrationTarget を返す。
+        近傍探索は空間インデックスのKD木で行うので、点群全体を走査しない。
+        """
+        idx = self.index.radius(center, radius, bounds)
+        cropped = RegistrationTarget(self.pcd.select_by_index(idx.tolist()), max_nn=self.max_nn)
+        cropped._parent = self
+        cropped._region = (np.asarray(center, dtype=np.float64), float(radius), bounds)
+        return cropped
+
+    def _estimate(self, cloud: o3d.geometry.PointCloud, radius: float = None):
+        if radius is None:
+            search = o3d.geometry.KDTreeSearchParamKNN(knn=self.max_nn)
+        else:
+            search = o3d.geometry.KDTreeSearchParamHybrid(radius=radius, max_nn=self.max_nn)
+        cloud.estimate_normals(search)
+        cloud.estimate_covariances(search)
+
+    def _checksum(self, cloud: o3d.geometry.PointCloud) -> str:
+        """点の座標のバイト列のハッシュ（並べ替え・編集した点群の保存結果を使わないように）"""
+        points = np.ascontiguousarray(np.asarray(cloud.points), dtype=np.float64)
+        return hashlib.sha1(points.tobytes()).hexdigest()
+
+    def _load_persisted(self, cloud: o3d.geometry.PointCloud) -> bool:
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return False
+        try:
+            cached = np.load(self.persist_path)
+            if str(cached["checksum"]) != self._checksum(cloud):
+                return False
+            cloud.normals = o3d.utility.Vector3dVector(cached["normals"])
+            cloud.covariances = o3d.utility.Matrix3dVector(cached["covariances"])
+            print(f"[Registration] 法線・共分散をキャッシュから読み込みました: {self.persist_path}")
+            return True
+        except Exception as e:
+            print(f"[Registration] キャッシュの読み込みに失敗しました: {e}")
+            return False
+
+    def _save_persisted(self, cloud: o3d.geometry.PointCloud):
+        if not self.persist_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.persist_path), exist_ok=True)
+            np.savez(self.persist_path,
+                     checksum=self._checksum(cloud),
+                     normals=np.asarray(cloud.normals),
+                     covariances=np.asarray(cloud.covariances))
+        except Exception as e:
+            print(f"[Registration] キャッシュの保存に失敗しました: {e}")
+
+
+def get_registration_target(item, cache_dir: str = None) -> RegistrationTarget:
+    """
+    GeometryItem ごとの RegistrationTarget を返す（なければ作成してアイテムのキャッシュに保持）。
+    cache_dir を渡すと、フル解像度の法線・共分散を点群ファイルごとにそのフォルダへ保存し、次回の起動でも使い回す
+    （点群の内容が変わっていれば計算し直す）。
+    """
+    target = item.cache.get("registration")
+    if target is None:
+        persist_path = None
+        if cache_dir and item.file_path:
+            key = hashlib.sha1(os.path.abspath(item.file_path).encode("utf-8")).hexdigest()[:16]
+            persist_path = os.path.join(cache_dir, f"{os.path.basename(item.file_path)}.{key}.gicp.npz")
+        # 空間インデックスはアイテムのものを共有する（KD木は切り出しなどで必要になったときに作る）
+        target = RegistrationTarget(item.data, persist_path, index=get_spatial_index(item))
+        item.cache["registration"] = target
+    return target
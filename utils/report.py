@@ -0,0 +1,219 @@
+import csv
+import hashlib
+import html
+import os
+
+import numpy as np
+
+# 画像のパスを値に持つ属性（属性名にこれらの語を含むもの）
+IMAGE_KEYWORDS = ["画像", "写真", "損傷写真", "点検写真", "全体写真"]
+HIERARCHY_COLUMNS = ["第1階層", "第2階層", "第3階層", "配置モデル"]
+# PDF で日本語を表示するためのフォントの候補（見つかったものを使う）
+PDF_FONTS = ["Yu Gothic", "Meiryo", "MS Gothic", "Hiragino Sans", "Noto Sans CJK JP", "IPAexGothic", "DejaVu Sans"]
+
+def is_image_attribute(name: str, value) -> bool:
+    return (isinstance(value, str) and any(keyword in name for keyword in IMAGE_KEYWORDS)
+            and bool(os.path.splitext(value.replace("\\", "/"))[1]))
+
+def report_columns(members: list) -> list:
+    """部材の属性名を初出順に並べた列（CSV の見出しは最初に書くので、属性の辞書だけを先に一通り見る）"""
+    columns = {}
+    for _, _, attributes in members:
+        for name in attributes:
+            columns.setdefault(name, None)
+    return list(columns)
+
+def _file_key(path: str, *extra) -> str:
+    stat = os.stat(path)
+    return hashlib.sha1(repr((os.path.abspath(path), stat.st_mtime_ns, stat.st_size) + extra).encode()).hexdigest()
+
+def make_thumbnail(image_path: str, cache_dir: str, max_size: int = 320) -> str:
+    """長辺 max_size に縮小した JPEG を作る（元画像のパス・更新日時・サイズが同じなら作り直さない）"""
+    from PIL import Image
+
+    path = os.path.join(cache_dir, f"{_file_key(image_path, max_size)}.jpg")
+    if os.path.exists(path):
+        return path
+    os.makedirs(cache_dir, exist_ok=True)
+    with Image.open(image_path) as image:
+        # JPEG はデコード時に縮小できるので、大きな写真でも全体を展開しない
+        image.draft("RGB", (max_size, max_size))
+        image = image.convert("RGB")
+        image.thumbnail((max_size, max_size))
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        image.save(temp_path, "JPEG", quality=85)
+    os.replace(temp_path, path)
+    return path
+
+class SnapshotRenderer:
+    """
+    部材のメッシュをオフスクリーンで描画した PNG を作る。
+    メッシュの頂点・三角形とカメラ・画像サイズのハッシュをファイル名にしてキャッシュし、同じものは描画しない。
+    描画用の Plotter は1つだけ作って使い回す。
+    """
+
+    def __init__(self, cache_dir: str, size: tuple = (480, 360), view: str = "isometric", color: str = "lightgray"):
+        self.cache_dir = cache_dir
+        self.size = tuple(size)
+        self.view = view
+        self.color = color
+        self._plotter = None
+        self.rendered = 0
+        self.cached = 0
+
+    def key(self, mesh) -> str:
+        digest = hashlib.sha1()
+        digest.update(np.ascontiguousarray(np.asarray(mesh.vertices, dtype=np.float64)).tobytes())
+        digest.update(np.ascontiguousarray(np.asarray(mesh.triangles, dtype=np.int64)).tobytes())
+        digest.update(repr((self.size, self.view, self.color)).encode())
+        return digest.hexdigest()
+
+    def render(self, mesh) -> str:
+        path = os.path.join(self.cache_dir, f"{self.key(mesh)}.png")
+        if os.path.exists(path):
+            self.cached += 1
+            return path
+        import pyvista as pv
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if self._plotter is None:
+            self._plotter = pv.Plotter(off_screen=True, window_size=list(self.size))
+            self._plotter.set_background("white")
+        vertices = np.asarray(mesh.vertices)
+        triangles = np.asarray(mesh.triangles)
+        faces = np.hstack([np.full((len(triangles), 1), 3), triangles]).ravel()
+        self._plotter.clear_actors()
+        self._plotter.add_mesh(pv.PolyData(vertices, faces), color=self.color, show_edges=False)
+        getattr(self._plotter, f"view_{self.view}")()
+        self._plotter.reset_camera()
+        temp_path = f"{path}.{os.getpid()}.tmp.png"
+        self._plotter.screenshot(temp_path)
+        os.replace(temp_path, path)
+        self.rendered += 1
+        return path
+
+    def close(self):
+        if self._plotter is not None:
+            self._plotter.close()
+            self._plotter = None
+
+class CsvReportWriter:
+    """1部材1行の CSV（画像はパスを書く）。Excel で開けるよう BOM 付き UTF-8 にする"""
+
+    def __init__(self, path: str, columns: list, title: str, bridge_attributes: dict):
+        self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._file)
+        self.columns = columns
+        self._writer.writerow(HIERARCHY_COLUMNS + columns + ["スナップショット"])
+
+    def write_member(self, path: tuple, attributes: dict, snapshot: str, thumbnails: dict):
+        hierarchy = list(path) + [""] * (len(HIERARCHY_COLUMNS) - len(path))
+        self._writer.writerow(hierarchy + [attributes.get(name, "") for name in self.columns] + [snapshot or ""])
+
+    def close(self):
+        self._file.close()
+
+class HtmlReportWriter:
+    """橋梁の属性と部材ごとの表（スナップショット・写真の縮小画像付き）の HTML。画像は相対パスで参照する"""
+
+    def __init__(self, path: str, columns: list, title: str, bridge_attributes: dict):
+        self._file = open(path, "w", encoding="utf-8")
+        self._base = os.path.dirname(os.path.abspath(path))
+        self._file.write(f"<!DOCTYPE html>\n<html lang=\"ja\"><head><meta charset=\"utf-8\">"
+                         f"<title>{html.escape(title)}</title><style>"
+                         f"body{{font-family:sans-serif}} table{{border-collapse:collapse;margin-bottom:1em}}"
+                         f"td,th{{border:1px solid #999;padding:4px;vertical-align:top}} th{{background:#eee}}"
+                         f"img{{max-width:320px}}</style></head><body>\n<h1>{html.escape(title)}</h1>\n<table>\n")
+        for name, value in bridge_attributes.items():
+            self._file.write(f"<tr><th>{html.escape(name)}</th><td>{self._value(name, value)}</td></tr>\n")
+        self._file.write("</table>\n")
+
+    def _image(self, path: str) -> str:
+        return f"<img src=\"{html.escape(os.path.relpath(path, self._base).replace(os.sep, '/'))}\" loading=\"lazy\">"
+
+    def _value(self, name: str, value, thumbnails: dict = None) -> str:
+        if thumbnails and thumbnails.get(name):
+            return self._image(thumbnails[name])
+        return html.escape(str(value))
+
+    def write_member(self, path: tuple, attributes: dict, snapshot: str, thumbnails: dict):
+        self._file.write(f"<h2>{html.escape(' > '.join(path))}</h2>\n<table><tr>")
+        if snapshot:
+            self._file.write(f"<td>{self._image(snapshot)}</td>")
+        self._file.write("<td><table>\n")
+        for name, value in attributes.items():
+            self._file.write(f"<tr><th>{html.escape(name)}</th><td>{self._value(name, value, thumbnails)}</td></tr>\n")
+        self._file.write("</table></td></tr></table>\n")
+
+    def close(self):
+        self._file.write("</body></html>\n")
+        self._file.close()
+
+class PdfReportWriter:
+    """
+    A4 縦に members_per_page 部材ずつ（スナップショット・写真・属性）並べた PDF。
+    1ページ描くごとに書き出して閉じるので、部材数が多くてもメモリに溜めない。
+    """
+
+    def __init__(self, path: str, columns: list, title: str, bridge_attributes: dict, members_per_page: int = 3):
+        # pyplot は使わない（GUI のバックエンドを切り替えない）
+        import matplotlib
+        from matplotlib.backends.backend_pdf import PdfPages
+        from matplotlib.figure import Figure
+
+        self._figure = Figure
+        self._rc_context = matplotlib.rc_context
+        self._pdf = PdfPages(path)
+        self.members_per_page = members_per_page
+        self._page = []
+
+        with self._fonts():
+            figure = Figure(figsize=(8.27, 11.69))
+            figure.text(0.08, 0.94, title, fontsize=18)
+            lines = [f"{name}: {value}" for name, value in bridge_attributes.items()
+                     if not is_image_attribute(name, value)]
+            figure.text(0.08, 0.90, "\n".join(lines), fontsize=10, va="top", linespacing=1.6)
+            self._save(figure)
+
+    def _fonts(self):
+        """日本語フォントの設定は描画・書き出しの間だけにする（アプリの他の図に影響させない）"""
+        return self._rc_context({"font.family": PDF_FONTS})
+
+    def _save(self, figure):
+        self._pdf.savefig(figure)
+
+    def _read_image(self, path: str):
+        from PIL import Image
+        with Image.open(path) as image:
+            return np.asarray(image.convert("RGB"))
+
+    def write_member(self, path: tuple, attributes: dict, snapshot: str, thumbnails: dict):
+        self._page.append((path, attributes, snapshot, thumbnails))
+        if len(self._page) >= self.members_per_page:
+            self._flush_page()
+
+    def _flush_page(self):
+        if not self._page:
+            return
+        with self._fonts():
+            figure = self._figure(figsize=(8.27, 11.69))
+            height = 0.92 / self.members_per_page
+            for row, (path, attributes, snapshot, thumbnails) in enumerate(self._page):
+                top = 0.96 - row * height
+                figure.text(0.05, top, " > ".join(path), fontsize=11, weight="bold", va="top")
+                images = [image for image in [snapshot, *thumbnails.values()] if image]
+                for column, image_path in enumerate(images[:2]):
+                    axes = figure.add_axes([0.05 + column * 0.3, top - height + 0.03, 0.28, height - 0.06])
+                    axes.imshow(self._read_image(image_path))
+                    axes.axis("off")
+                lines = [f"{name}: {value}" for name, value in attributes.items() if name not in thumbnails]
+                figure.text(0.66, top - 0.03, "\n".join(lines), fontsize=8, va="top", linespacing=1.5)
+            self._save(figure)
+        self._page = []
+
+    def close(self):
+        self._flush_page()
+        self._pdf.close()
+
+REPORT_WRITERS = {".csv": CsvReportWriter, ".html": HtmlReportWriter, ".htm": HtmlReportWriter,
+                  ".pdf": PdfReportWriter}
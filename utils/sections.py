@@ -0,0 +1,60 @@
+import numpy as np
+
+class SectionIndex:
+    """
+    軸方向への射影値で点を並べ替えておき、断面（軸に垂直な薄い板）の点を二分探索で取り出す。
+    断面1つあたり O(log n + 断面の点数)。
+    """
+
+    def __init__(self, points: np.ndarray, origin, axis):
+        self.points = points
+        self.origin = np.asarray(origin, dtype=np.float64)
+        axis = np.asarray(axis, dtype=np.float64)
+        self.axis = axis / np.linalg.norm(axis)
+
+        # 断面の2D座標系: u は軸と鉛直に直交する横断方向、v は軸に直交する上向き
+        up = np.array([0.0, 0.0, 1.0])
+        u = np.cross(up, self.axis)
+        if np.linalg.norm(u) < 1e-6:
+            u = np.cross(np.array([0.0, 1.0, 0.0]), self.axis)  # 軸が鉛直な場合
+        self.u = u / np.linalg.norm(u)
+        self.v = np.cross(self.axis, self.u)
+
+        stations = (points - self.origin) @ self.axis
+        self.order = np.argsort(stations, kind="stable")
+        self.sorted_stations = stations[self.order]
+
+    @property
+    def range(self):
+        """点の射影値の範囲 (最小, 最大)"""
+        if len(self.sorted_stations) == 0:
+            return 0.0, 0.0
+        return float(self.sorted_stations[0]), float(self.sorted_stations[-1])
+
+    def slice(self, station: float, thickness: float) -> np.ndarray:
+        """射影値が station ± thickness / 2 の点の番号"""
+        lo = np.searchsorted(self.sorted_stations, station - thickness / 2, side="left")
+        hi = np.searchsorted(self.sorted_stations, station + thickness / 2, side="right")
+        return self.order[lo:hi]
+
+    def profile(self, indices: np.ndarray) -> np.ndarray:
+        """断面の点の2D座標 (横断方向, 上向き)"""
+        offsets = self.points[indices] - self.origin
+        return np.stack([offsets @ self.u, offsets @ self.v], axis=1)
+
+    def sections(self, stations, thickness: float) -> list:
+        """複数の位置の断面を {"station", "indices", "profile"} のリストで返す"""
+        result = []
+        for station in stations:
+            indices = self.slice(station, thickness)
+            result.append({"station": float(station), "indices": indices, "profile": self.profile(indices)})
+        return result
+
+
+def get_section_index(item, origin, axis) -> SectionIndex:
+    """GeometryItem ごと・軸ごとに SectionIndex をキャッシュして返す"""
+    key = (tuple(np.round(np.asarray(origin, dtype=np.float64), 6)), tuple(np.round(np.asarray(axis, dtype=np.float64), 6)))
+    indices = item.cache.setdefault("section_index", {})
+    if key not in indices:
+        indices[key] = SectionIndex(np.asarray(item.data.points), origin, axis)
+    return indices[key]
@@ -0,0 +1,175 @@
+import numpy as np
+import open3d as o3d
+
+# 隣接ボクセルの探索に使う26近傍の半分（逆向きは相手側から見つかる）
+_HALF_NEIGHBORS = np.array([(i, j, k) for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)
+                            if (i, j, k) > (0, 0, 0)], dtype=np.int64)
+
+
+def voxelize(points: np.ndarray, voxel_size: float):
+    """点をボクセルにまとめ、(ボクセル番号 (m,3), ボクセル重心 (m,3), 点→ボクセルの対応 (n,)) を返す"""
+    keys = np.floor(points / voxel_size).astype(np.int64)
+    mins = keys.min(axis=0)
+    dims = keys.max(axis=0) - mins + 1
+    linear = ((keys[:, 0] - mins[0]) * dims[1] + (keys[:, 1] - mins[1])) * dims[2] + (keys[:, 2] - mins[2])
+    _, first, inverse = np.unique(linear, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    counts = np.bincount(inverse)
+    centroids = np.stack([np.bincount(inverse, weights=points[:, c]) for c in range(3)], axis=1) / counts[:, None]
+    return keys[first], centroids, inverse
+
+
+def group_by_tile(centroids: np.ndarray, tile_size: float) -> list:
+    """水平面のタイルごとにボクセルの番号をまとめる"""
+    tiles = np.floor(centroids[:, :2] / tile_size).astype(np.int64)
+    _, inverse = np.unique(tiles, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    order = np.argsort(inverse, kind="stable")
+    splits = np.flatnonzero(np.diff(inverse[order])) + 1
+    return np.split(order, splits)
+
+
+def fit_cylinder(points: np.ndarray, distance_threshold: float, iterations: int = 200,
+                 min_inlier_ratio: float = 0.7, max_samples: int = 2000, rng=None):
+    """
+    細長い点の塊に円柱を当てはめる。主軸に垂直な断面で3点から円を作るRANSACを一括で評価する。
+    当てはまれば {"axis", "center", "radius"}、そうでなければ None。
+    """
+    if len(points) < 10:
+        return None
+    rng = rng or np.random.default_rng(0)
+    center = points.mean(axis=0)
+    values, vectors = np.linalg.eigh(np.cov((points - center).T))
+    if values[2] < 4.0 * values[1]:
+        return None  # 細長くない
+    axis = vectors[:, 2]
+    u, v = vectors[:, 1], vectors[:, 0]
+    plane = np.stack([(points - center) @ u, (points - center) @ v], axis=1)
+    if len(plane) > max_samples:
+        plane = plane[rng.choice(len(plane), max_samples, replace=False)]
+
+    # 3点の外接円（iterations 通りをまとめて計算）
+    a, b, c = (plane[rng.integers(0, len(plane), iterations)] for _ in range(3))
+    d = 2.0 * (a[:, 0] * (b[:, 1] - c[:, 1]) + b[:, 0] * (c[:, 1] - a[:, 1]) + c[:, 0] * (a[:, 1] - b[:, 1]))
+    valid = np.abs(d) > 1e-12
+    if not np.any(valid):
+        return None
+    a, b, c, d = a[valid], b[valid], c[valid], d[valid]
+    sa, sb, sc = (np.sum(p ** 2, axis=1) for p in (a, b, c))
+    cx = (sa * (b[:, 1] - c[:, 1]) + sb * (c[:, 1] - a[:, 1]) + sc * (a[:, 1] - b[:, 1])) / d
+    cy = (sa * (c[:, 0] - b[:, 0]) + sb * (a[:, 0] - c[:, 0]) + sc * (b[:, 0] - a[:, 0])) / d
+    radius = np.hypot(a[:, 0] - cx, a[:, 1] - cy)
+
+    residual = np.abs(np.hypot(plane[None, :, 0] - cx[:, None], plane[None, :, 1] - cy[:, None]) - radius[:, None])
+    scores = np.mean(residual <= distance_threshold, axis=1)
+    best = int(np.argmax(scores))
+    if scores[best] < min_inlier_ratio:
+        return None
+    return {
+        "axis": axis.tolist(),
+        "center": (center + cx[best] * u + cy[best] * v).tolist(),
+        "radius": float(radius[best]),
+    }
+
+
+def segment_tile(points: np.ndarray, distance_threshold: float, eps: float, min_points: int,
+                 max_planes: int = 10, ransac_iterations: int = 1000) -> list:
+    """
+    1タイル分の点を部材候補に分ける（ワーカープロセス内で実行）。
+    RANSACで平面を順に取り出して平面ごとにDBSCANで分け、残りはDBSCANのクラスタごとに円柱かどうかを調べる。
+    戻り値は [(タイル内の点番号, 種類 "plane" / "cylinder" / "cluster", 形状パラメータ)]。
+    """
+    pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(points))
+    remaining = np.arange(len(points))
+    segments = []
+
+    for _ in range(max_planes):
+        if len(remaining) < min_points:
+            break
+        plane, inliers = pcd.select_by_index(remaining.tolist()).segment_plane(
+            distance_threshold, 3, ransac_iterations)
+        if len(inliers) < min_points:
+            break
+        inliers = remaining[np.asarray(inliers, dtype=np.int64)]
+        # 同じ平面上の離れた部材（複数の主桁の下フランジなど）を分ける
+        labels = np.asarray(pcd.select_by_index(inliers.tolist()).cluster_dbscan(eps, 3))
+        for label in np.unique(labels[labels >= 0]):
+            idx = inliers[labels == label]
+            if len(idx) >= min_points:
+                segments.append((idx, "plane", {"plane": [float(p) for p in plane]}))
+        remaining = np.setdiff1d(remaining, inliers, assume_unique=True)
+
+    if len(remaining) >= min_points:
+        labels = np.asarray(pcd.select_by_index(remaining.tolist()).cluster_dbscan(eps, 3))
+        for label in np.unique(labels[labels >= 0]):
+            idx = remaining[labels == label]
+            if len(idx) < min_points:
+                continue
+            cylinder = fit_cylinder(points[idx], distance_threshold)
+            if cylinder is not None:
+                segments.append((idx, "cylinder", cylinder))
+            else:
+                segments.append((idx, "cluster", {}))
+    return segments
+
+
+def _compatible(a: dict, b: dict, centroid_b: np.ndarray, distance_threshold: float,
+                max_angle: float = np.radians(10.0)) -> bool:
+    """タイル境界で接する2つのセグメントを1つにしてよいか"""
+    if a["kind"] != b["kind"]:
+        return False
+    if a["kind"] == "plane":
+        na, nb = np.asarray(a["model"]["plane"][:3]), np.asarray(b["model"]["plane"][:3])
+        if abs(na @ nb) < np.cos(max_angle):
+            return False
+        return abs(na @ centroid_b + a["model"]["plane"][3]) <= 3.0 * distance_threshold
+    if a["kind"] == "cylinder":
+        if abs(np.asarray(a["model"]["axis"]) @ np.asarray(b["model"]["axis"])) < np.cos(max_angle):
+            return False
+        ra, rb = a["model"]["radius"], b["model"]["radius"]
+        return abs(ra - rb) <= 0.2 * max(ra, rb)
+    return True
+
+
+def merge_across_tiles(voxel_keys: np.ndarray, voxel_labels: np.ndarray, voxel_tiles: np.ndarray,
+                       segments: list, centroids: list, distance_threshold: float) -> np.ndarray:
+    """
+    タイル境界で分断されたセグメントをつなぐ。異なるタイルに属する隣接ボクセルのセグメントが
+    同じ種類で形状も一致すれば統合し、統合後のボクセルごとのラベルを返す。
+    """
+    parent = np.arange(len(segments))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    labeled = np.flatnonzero(voxel_labels >= 0)
+    keys = voxel_keys[labeled]
+    mins = keys.min(axis=0) - 1
+    dims = keys.max(axis=0) - mins + 2
+
+    def encode(k):
+        return ((k[:, 0] - mins[0]) * dims[1] + (k[:, 1] - mins[1])) * dims[2] + (k[:, 2] - mins[2])
+
+    codes = encode(keys)
+    order = np.argsort(codes)
+    sorted_codes = codes[order]
+    for offset in _HALF_NEIGHBORS:
+        neighbor = encode(keys + offset)
+        pos = np.minimum(np.searchsorted(sorted_codes, neighbor), len(sorted_codes) - 1)
+        found = sorted_codes[pos] == neighbor
+        src = labeled[found]
+        dst = labeled[order[pos[found]]]
+        crossing = voxel_tiles[src] != voxel_tiles[dst]
+        pairs = np.unique(np.stack([voxel_labels[src[crossing]], voxel_labels[dst[crossing]]], axis=1), axis=0)
+        for a, b in pairs:
+            ra, rb = find(a), find(b)
+            if ra != rb and _compatible(segments[a], segments[b], centroids[b], distance_threshold):
+                parent[rb] = ra
+
+    roots = np.array([find(i) for i in range(len(segments))])
+    merged = voxel_labels.copy()
+    merged[labeled] = roots[voxel_labels[labeled]]
+    return merged
@@ -0,0 +1,172 @@
+import numpy as np
+import open3d as o3d
+
+class MeshScene:
+    """
+    メッシュの三角形のBVH（RaycastingScene）に距離を問い合わせる。
+    RaycastingScene は float32 で計算するため、平面直角座標のような大きな座標のままでは mm 単位の差が丸められる。
+    頂点・問い合わせ点とも範囲の中心（origin）を引いた局所座標にしてから float32 にする。
+    符号付き距離は、閉じたメッシュなら内外判定（compute_signed_distance）で、閉じていないメッシュなら
+    最も近い三角形の法線の向き（法線側が正）で符号を決める。
+    """
+
+    def __init__(self, mesh: o3d.geometry.TriangleMesh):
+        vertices = np.asarray(mesh.vertices)
+        self.origin = (vertices.min(axis=0) + vertices.max(axis=0)) / 2 if len(vertices) else np.zeros(3)
+        self.closed = mesh.is_watertight()
+        self.scene = o3d.t.geometry.RaycastingScene()
+        self.scene.add_triangles(o3d.core.Tensor(np.ascontiguousarray(vertices - self.origin, dtype=np.float32)),
+                                 o3d.core.Tensor(np.ascontiguousarray(np.asarray(mesh.triangles), dtype=np.uint32)))
+
+    def _query(self, points: np.ndarray) -> o3d.core.Tensor:
+        return o3d.core.Tensor(np.ascontiguousarray(np.asarray(points, dtype=np.float64) - self.origin,
+                                                    dtype=np.float32))
+
+    def distance(self, points: np.ndarray) -> np.ndarray:
+        """各点から最も近い表面までの距離"""
+        return self.scene.compute_distance(self._query(points)).numpy()
+
+    def cast_ray(self, origin, direction):
+        """半直線が最初に当たる三角形の (番号, 原点からの距離)。当たらなければ None"""
+        rays = np.r_[np.asarray(origin, dtype=np.float64) - self.origin, direction][None]
+        hit = self.scene.cast_rays(o3d.core.Tensor(rays.astype(np.float32)))
+        t = float(hit["t_hit"].numpy()[0])
+        return None if not np.isfinite(t) else (int(hit["primitive_ids"].numpy()[0]), t)
+
+    def signed_distance(self, points: np.ndarray) -> np.ndarray:
+        """各点から最も近い表面までの符号付き距離（外側・法線側が正）"""
+        query = self._query(points)
+        if self.closed:
+            return self.scene.compute_signed_distance(query).numpy()
+        closest = self.scene.compute_closest_points(query)
+        offsets = query.numpy() - closest["points"].numpy()
+        sign = np.where(np.einsum("ij,ij->i", offsets, closest["primitive_normals"].numpy()) < 0, -1.0, 1.0)
+        return (np.linalg.norm(offsets, axis=1) * sign).astype(np.float32)
+
+
+class SpatialIndex:
+    """
+    GeometryItem 1つ分の空間インデックス。点（点群の点・メッシュの頂点）のKD木と、
+    メッシュの三角形のBVH（MeshScene）を最初に必要になったときに作る。
+    近傍・箱・半直線・距離の問い合わせ（radius / knn / box / ray / distance）はこのクラスを通して行う。
+    アイテムの data を変形したら GeometryItem.invalidate_cache で作り直す。
+    """
+
+    def __init__(self, geometry):
+        self.geometry = geometry
+        self._points = None
+        self._kdtree = None
+        self._scene = None
+        self._bounds = None
+
+    @property
+    def is_mesh(self) -> bool:
+        return isinstance(self.geometry, o3d.geometry.TriangleMesh)
+
+    @property
+    def points(self) -> np.ndarray:
+        if self._points is None:
+            self._points = np.asarray(self.geometry.vertices if self.is_mesh else self.geometry.points)
+        return self._points
+
+    @property
+    def kdtree(self) -> o3d.geometry.KDTreeFlann:
+        if self._kdtree is None:
+            source = self.geometry
+            if self.is_mesh:
+                source = o3d.geometry.PointCloud(self.geometry.vertices)
+            self._kdtree = o3d.geometry.KDTreeFlann(source)
+        return self._kdtree
+
+    @property
+    def scene(self) -> MeshScene:
+        """メッシュの三角形のBVH（メッシュでなければ None）"""
+        if self._scene is None and self.is_mesh:
+            self._scene = MeshScene(self.geometry)
+        return self._scene
+
+    def bounds(self):
+        """軸に平行な範囲 (最小, 最大)。点がなければ None"""
+        if self._bounds is None and len(self.points):
+            self._bounds = (self.points.min(axis=0), self.points.max(axis=0))
+        return self._bounds
+
+    # ==== 問い合わせ ====
+
+    def radius(self, center, radius: float, bounds: o3d.geometry.OrientedBoundingBox = None) -> np.ndarray:
+        """center から radius 以内（bounds を渡した場合はさらにその箱の内側）の点の番号（昇順）"""
+        if len(self.points) == 0:
+            return np.empty(0, dtype=np.int64)
+        _, idx, _ = self.kdtree.search_radius_vector_3d(np.asarray(center, dtype=np.float64), float(radius))
+        idx = np.asarray(idx, dtype=np.int64)
+        if bounds is not None and len(idx):
+            inside = bounds.get_point_indices_within_bounding_box(o3d.utility.Vector3dVector(self.points[idx]))
+            idx = idx[np.asarray(inside, dtype=np.int64)]
+        return np.sort(idx)
+
+    def knn(self, point, k: int):
+        """point に近い k 点の (番号, 距離)"""
+        if len(self.points) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        _, idx, sq = self.kdtree.search_knn_vector_3d(np.asarray(point, dtype=np.float64), int(k))
+        return np.asarray(idx, dtype=np.int64), np.sqrt(np.asarray(sq))
+
+    def box(self, min_bound, max_bound) -> np.ndarray:
+        """軸に平行な箱の中の点の番号（箱を包む球で絞ってから判定する）"""
+        lo, hi = np.asarray(min_bound, dtype=np.float64), np.asarray(max_bound, dtype=np.float64)
+        idx = self.radius((lo + hi) / 2, np.linalg.norm(hi - lo) / 2)
+        points = self.points[idx]
+        return idx[np.all((points >= lo) & (points <= hi), axis=1)]
+
+    def distance(self, query: np.ndarray) -> np.ndarray:
+        """各点から最も近い表面（メッシュは三角形、点群は点）までの距離"""
+        query = np.asarray(query, dtype=np.float64).reshape(-1, 3)
+        if self.is_mesh:
+            return self.scene.distance(query).astype(np.float64)
+        return np.array([self.knn(q, 1)[1][0] if len(self.points) else np.inf for q in query])
+
+    def ray(self, origin, direction, tolerance: float = 0.05):
+        """
+        半直線と最初に交わる位置を (点の番号または三角形の番号, 原点からの距離) で返す。交わらなければ None。
+        点群は半直線から tolerance 以内の点を、範囲内を tolerance 刻みで近い方から探す。
+        """
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        direction = direction / np.linalg.norm(direction)
+        if self.is_mesh:
+            return self.scene.cast_ray(origin, direction)
+
+        bounds = self.bounds()
+        if bounds is None:
+            return None
+        # 範囲（tolerance だけ広げた箱）に入ってから出るまでの区間
+        lo, hi = bounds[0] - tolerance, bounds[1] + tolerance
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t1, t2 = (lo - origin) / direction, (hi - origin) / direction
+        t_near = np.nanmax(np.r_[np.minimum(t1, t2), 0.0])
+        t_far = np.nanmin(np.maximum(t1, t2))
+        t = t_near
+        while t <= t_far:
+            idx = self.radius(origin + t * direction, tolerance * 2)
+            if len(idx):
+                offsets = self.points[idx] - origin
+                along = offsets @ direction
+                off_ray = np.linalg.norm(offsets - along[:, None] * direction, axis=1)
+                near = (off_ray <= tolerance) & (along >= 0)
+                if np.any(near):
+                    best = np.flatnonzero(near)[np.argmin(along[near])]
+                    return int(idx[best]), float(along[best])
+            t += tolerance
+        return None
+
+
+def get_spatial_index(item) -> SpatialIndex:
+    """GeometryItem ごとの空間インデックス（タイル点群は対象外で None）"""
+    if item.geometry_type == "octree":
+        return None
+    index = item.cache.get("spatial_index")
+    if index is None:
+        geometry = item.data["mesh"] if isinstance(item.data, dict) else item.data
+        index = SpatialIndex(geometry)
+        item.cache["spatial_index"] = index
+    return index